@@ -0,0 +1,109 @@
+"""
+Benchmarks of v2 API responses and of models they are built from. Not
+collected by the regular test run - run them explicitly (on the test
+database), eg.:
+
+    python manage.py test dnsaas.api.v2.benchmarks
+"""
+import time
+import timeit
+
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from powerdns.models import Domain, Record
+from powerdns.tests.utils import DomainFactory, UserFactory
+from powerdns.utils import AutoPtrOptions
+
+
+class ColumnarRendererBenchmark(TestCase):
+    """
+    Size and CPU time of one page of 10k records rendered as regular JSON
+    and as columnar JSON (see `ColumnarJSONRenderer`).
+    """
+    rows = 10000
+    repeat = 3
+    media_types = (
+        ('default', 'application/json'),
+        ('columnar', 'application/vnd.dnsaas.columnar+json'),
+    )
+
+    def setUp(self):
+        self.user = UserFactory(is_superuser=True, is_staff=True)
+        domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+            owner=self.user,
+        )
+        Record.objects.bulk_create([
+            Record(
+                domain=domain, name='host{}.example.com'.format(i), type='A',
+                content='10.{}.{}.{}'.format(i >> 16, (i >> 8) & 255, i & 255),
+                ttl=3600, owner=self.user, auth=True,
+            )
+            for i in range(self.rows)
+        ], batch_size=500)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_record_list(self):
+        print('\n{} A records, one page (process CPU time):'.format(
+            self.rows,
+        ))
+        for label, media_type in self.media_types:
+            best = None
+            for _ in range(self.repeat):
+                start = time.process_time()
+                response = self.client.get(
+                    reverse('api:v2:record-list'),
+                    {'limit': self.rows, 'type': 'A'},
+                    HTTP_ACCEPT=media_type,
+                )
+                elapsed = time.process_time() - start
+                self.assertEqual(response.status_code, 200)
+                best = elapsed if best is None else min(best, elapsed)
+            print('  {:9} {:>10,} bytes {:7.2f} s'.format(
+                label, len(response.content), best,
+            ))
+
+
+class ModelConstructionBenchmark(TestCase):
+    """
+    CPU time of constructing a single Record or Domain instance, as done for
+    every row of list pages (see `TrackedField` of `powerdns.models`).
+    """
+    number = 50000
+    repeat = 5
+
+    def _row(self, instance):
+        fields = instance._meta.concrete_fields
+        return (
+            [field.attname for field in fields],
+            [getattr(instance, field.attname) for field in fields],
+        )
+
+    def test_construction(self):
+        record_fields, record_row = self._row(Record(
+            pk=1, domain_id=1, name='www.example.com', type='A',
+            content='192.168.0.1', ttl=3600, auth=True,
+        ))
+        domain_fields, domain_row = self._row(Domain(
+            pk=1, name='example.com', type='NATIVE',
+        ))
+        cases = (
+            ('Record(*row)', lambda: Record(*record_row)),
+            ('Record.from_db', lambda: Record.from_db(
+                'default', record_fields, record_row,
+            )),
+            ('Domain(*row)', lambda: Domain(*domain_row)),
+        )
+        print('\nPer-instance construction cost (best of {} x {}):'.format(
+            self.repeat, self.number,
+        ))
+        for label, construct in cases:
+            best = min(timeit.repeat(
+                construct, number=self.number, repeat=self.repeat,
+            ))
+            print('  {:15} {:6.2f} us'.format(
+                label, best / self.number * 10 ** 6,
+            ))
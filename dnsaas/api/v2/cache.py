@@ -0,0 +1,124 @@
+"""Cache of rendered responses of rarely changing API endpoints"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+
+from powerdns.models import (
+    DomainTemplate,
+    RecordTemplate,
+    Service,
+    ServiceOwner,
+    SuperMaster,
+    TsigKey,
+)
+
+
+# models whose version is bumped whenever any of their rows changes
+VERSIONED_MODELS = (
+    DomainTemplate, RecordTemplate, Service, ServiceOwner, SuperMaster,
+    TsigKey,
+)
+
+
+def _label(model):
+    return '{}.{}'.format(model._meta.app_label, model._meta.model_name)
+
+
+def _version_key(model):
+    return 'api:v2:model-version:{}'.format(_label(model))
+
+
+def get_model_versions(models):
+    """
+    Return tuple of current versions of `models` (from VERSIONED_MODELS).
+    A version missing in the cache (eg. evicted) is replaced by a new one.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = uuid.uuid4().hex
+            cache.set(key, versions[key], None)
+    return tuple(versions[key] for key in keys)
+
+
+def bump_model_version(sender, **kwargs):
+    cache.set(_version_key(sender), uuid.uuid4().hex, None)
+
+
+def connect_version_receivers():
+    """
+    Bump versions of VERSIONED_MODELS on every save and delete. Connected
+    when the app is ready (see `dnsaas.apps`), so changes made outside of
+    the API (eg. by `run_jobs`) invalidate cached responses too.
+    """
+    for model in VERSIONED_MODELS:
+        post_save.connect(
+            bump_model_version, sender=model,
+            dispatch_uid='model_version_{}'.format(_label(model)),
+        )
+        post_delete.connect(
+            bump_model_version, sender=model,
+            dispatch_uid='model_version_delete_{}'.format(_label(model)),
+        )
+
+
+class CachedResponseMixin(object):
+    """
+    Serves GET responses from the cache, as rendered bytes, as long as none
+    of `cached_models` (from VERSIONED_MODELS) has changed - without queries
+    or serializers. Permissions are checked before as usual. Responses of
+    the browsable API are not cached.
+    """
+    cached_models = ()
+
+    def get_response_cache_key(self, request):
+        return 'api:v2:response:{}:{}:{}:{}'.format(
+            ':'.join(get_model_versions(self.cached_models)),
+            type(self).__name__,
+            request.get_full_path(),
+            request.accepted_media_type,
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache_key = None
+        if (
+            request.method == 'GET' and
+            request.accepted_renderer.format != 'api'
+        ):
+            self.response_cache_key = self.get_response_cache_key(request)
+
+    def handle_cached(self, handler, request, *args, **kwargs):
+        if self.response_cache_key:
+            cached = cache.get(self.response_cache_key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+        return handler(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.handle_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.handle_cached(super().retrieve, request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            getattr(self, 'response_cache_key', None) and
+            response.status_code == 200 and
+            not getattr(response, 'is_rendered', True)
+        ):
+            response.render()
+            cache.set(
+                self.response_cache_key,
+                (response.content, response['Content-Type']),
+                getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 3600),
+            )
+        return response
@@ -0,0 +1,156 @@
+"""Pagination of v2 API lists"""
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    LimitOffsetPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination seeking on `cursor_ordering` of the view (primary key
+    by default), so pages deep into large tables are as fast as the first
+    one and no total count is computed.
+    """
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        return (getattr(view, 'cursor_ordering', self.ordering),)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # names of columns of values_list() rows
+        self.row_fields = getattr(queryset, '_fields', None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, tuple):
+            field_name = ordering[0].lstrip('-')
+            return str(instance[self.row_fields.index(field_name)])
+        return super()._get_position_from_instance(instance, ordering)
+
+
+class OptionalCursorPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination, switched to `KeysetPagination` by
+    `?pagination=cursor` (or by the `cursor` parameter of its links).
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = KeysetPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        query_params = request.query_params
+        return (
+            query_params.get(self.mode_query_param) == self.cursor_mode or
+            self.cursor_pagination_class.cursor_query_param in query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view,
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    @property
+    def display_page_controls(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.display_page_controls
+        return self.__dict__.get('display_page_controls', False)
+
+    @display_page_controls.setter
+    def display_page_controls(self, value):
+        self.__dict__['display_page_controls'] = value
+
+
+class SequencePagination(BasePagination):
+    """
+    Keyset pagination of logs by their sequence number (`sequence_field` of
+    the view, primary key by default) - with `?since=<seq>` only entries
+    after it are listed, oldest first. `last_seq` of the response is the
+    `since` of the next request; `next` link is set while there may be more
+    entries.
+    """
+    since_query_param = 'since'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 1000
+    invalid_since_message = 'Invalid since.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        since = self.get_since(request)
+        field = getattr(view, 'sequence_field', 'pk')
+        page = list(queryset.filter(**{
+            '{}__gt'.format(field): since,
+        }).order_by(field)[:self.limit])
+        self.has_more = len(page) == self.limit
+        self.last_seq = getattr(page[-1], field) if page else since
+        return page
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit,
+            )
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def get_since(self, request):
+        try:
+            return _positive_int(
+                request.query_params.get(self.since_query_param, 0),
+            )
+        except ValueError:
+            raise NotFound(self.invalid_since_message)
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.since_query_param, self.last_seq,
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('last_seq', self.last_seq),
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
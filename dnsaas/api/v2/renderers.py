@@ -0,0 +1,71 @@
+"""Additional renderers of DNSaaS API"""
+from itertools import islice
+
+from powerdns.export import (
+    EXPORT_CHUNK_SIZE,
+    format_bind_header,
+    format_bind_line,
+    format_jsonl_line,
+    iter_zone_records,
+)
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ZoneRenderer(BaseRenderer):
+    """
+    Base for zone export formats - `format_line` formats a record as a line,
+    `format_header` (if set) the header of the zone. Zones are streamed by
+    `render_zone`; `render` only handles regular responses, such as errors.
+    """
+    charset = 'utf-8'
+    format_header = None
+    format_line = None
+
+    def render_zone(self, domain, serial):
+        """Yield text of the zone in chunks of `EXPORT_CHUNK_SIZE` records"""
+        if self.format_header:
+            yield self.format_header(domain, serial)
+        records = iter_zone_records(domain)
+        while True:
+            chunk = ''.join(
+                self.format_line(record)
+                for record in islice(records, EXPORT_CHUNK_SIZE)
+            )
+            if not chunk:
+                return
+            yield chunk
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # eg. 304 Not Modified
+        if data is None:
+            return b''
+        return self.format_data(data)
+
+    def format_data(self, data):
+        """Format `data` of a regular response (eg. an error)"""
+        return self.format_line(data)
+
+
+class BindZoneRenderer(ZoneRenderer):
+    media_type = 'text/dns'
+    format = 'bind'
+    format_header = staticmethod(format_bind_header)
+    format_line = staticmethod(format_bind_line)
+
+    def format_data(self, data):
+        return ''.join('; {}: {}\n'.format(*item) for item in data.items())
+
+
+class JSONLinesRenderer(ZoneRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    format_line = staticmethod(format_jsonl_line)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON with list results as `{"columns": [...], "rows": [[...], ...]}`
+    (see `ColumnarListMixin`), so keys aren't repeated in every row.
+    """
+    media_type = 'application/vnd.dnsaas.columnar+json'
+    format = 'columnar'
@@ -1,15 +1,22 @@
 """Serializer classes for DNSaaS API"""
 import ipaddress
+import re
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from powerdns.utils import find_domain_for_record
+from powerdns.utils import (
+    AutoPtrOptions,
+    find_domain_for_record,
+    validate_domain_name,
+)
 from powerdns.models import (
     RECORD_A_TYPES,
+    Change,
     CryptoKey,
     Domain,
     DomainMetadata,
     DomainTemplate,
+    Job,
     Record,
     RecordRequest,
     RecordTemplate,
@@ -27,6 +34,20 @@ from rest_framework.serializers import (
 )
 
 
+class SelectedFieldsMixin(object):
+    """
+    Renders only fields listed in `selected_fields` item of the context
+    (see `SelectedFieldsMixin` of views), all of them when it's empty.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('selected_fields')
+        if selected:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+
 class OwnerSerializer(ModelSerializer):
 
     owner = SlugRelatedField(
@@ -37,7 +58,7 @@ class OwnerSerializer(ModelSerializer):
     )
 
 
-class DomainSerializer(OwnerSerializer):
+class DomainSerializer(SelectedFieldsMixin, OwnerSerializer):
 
     id = ReadOnlyField()
     service_name = serializers.SerializerMethodField()
@@ -76,10 +97,10 @@ class RecordRequestSerializer(OwnerSerializer):
         model = RecordRequest
 
     def get_last_change(self, obj):
-        if obj.state == RequestStates.OPEN:
+        if obj.state == RequestStates.OPEN and not obj.last_change_json:
+            # stored since creation, except for requests older than that
             return obj._get_json_history(obj.get_object())
-        else:
-            return obj.last_change_json
+        return obj.last_change_json
 
 
 def _trim_whitespace(data_dict, trim_fields):
@@ -90,7 +111,51 @@ def _trim_whitespace(data_dict, trim_fields):
     return data_dict
 
 
-class RecordSerializer(OwnerSerializer):
+def _validate_ip_content(record_type, content):
+    if record_type in RECORD_A_TYPES:
+        try:
+            ipaddress.ip_address(content)
+        except ValueError:
+            raise serializers.ValidationError({
+                'content': ['Content should be valid IP address']
+            })
+
+
+def _clean_txt_content(record_type, attrs):
+    """
+    Remove backslashes form `content` (from `attrs`) inplace when
+    `type`=TXT
+    """
+    # DNS servers don't accept backslashes (\) in content so we neither
+    if record_type == 'TXT' and attrs.get('content'):
+        attrs['content'] = attrs['content'].replace('\\', '')
+
+
+def _validate_service(has_service):
+    if settings.REQUIRED_SERVICE_FIELD and not has_service:
+        raise serializers.ValidationError({
+            'service': [
+                'Service is required. Please provide DNSaaS internal '
+                'service ID in field `service` or global service UID in '
+                'field `service_uid`.'
+            ]
+        })
+
+
+def _validate_public_address(domain, record_type, content):
+    if (
+        domain and domain.template and
+        domain.template.is_public_domain and
+        content and record_type == 'A'
+    ):
+        address = ipaddress.ip_address(content)
+        if address.is_private:
+            raise serializers.ValidationError(
+                {'content': ['IP address cannot be private.']}
+            )
+
+
+class RecordSerializer(SelectedFieldsMixin, OwnerSerializer):
 
     class Meta:
         model = Record
@@ -154,15 +219,6 @@ class RecordSerializer(OwnerSerializer):
             return delete_request[0].key
         return None
 
-    def _clean_txt_content(self, record_type, attrs):
-        """
-        Remove backslashes form `content` (from `attrs`) inplace when
-        `type`=TXT
-        """
-        # DNS servers don't accept backslashes (\) in content so we neither
-        if record_type == 'TXT':
-            attrs['content'] = attrs['content'].replace('\\', '')
-
     def _ensure_owner_is_set(self):
         if self.instance and not self.instance.has_owner():
             raise serializers.ValidationError({
@@ -171,18 +227,6 @@ class RecordSerializer(OwnerSerializer):
                 ]
             })
 
-    def _validate_service(self, attrs):
-        if not settings.REQUIRED_SERVICE_FIELD or self.instance:
-            return
-        if 'service' not in attrs:
-            raise serializers.ValidationError({
-                'service': [
-                    'Service is required. Please provide DNSaaS internal '
-                    'service ID in field `service` or global service UID in '
-                    'field `service_uid`.'
-                ]
-            })
-
     def validate(self, attrs):
         self._ensure_owner_is_set()
         _trim_whitespace(attrs, ['name', 'content'])
@@ -190,26 +234,9 @@ class RecordSerializer(OwnerSerializer):
             attrs.get('domain'), attrs.get('content'), attrs.get('type')
         )
 
-        if record_type in RECORD_A_TYPES:
-            try:
-                ipaddress.ip_address(content)
-            except ValueError:
-                raise serializers.ValidationError({
-                    'content': ['Content should be valid IP address']
-                })
-
-        self._clean_txt_content(record_type, attrs)
-
-        if (
-            domain and domain.template and
-            domain.template.is_public_domain and
-            content and record_type == 'A'
-        ):
-            address = ipaddress.ip_address(content)
-            if address.is_private:
-                raise serializers.ValidationError(
-                    {'content': ['IP address cannot be private.']}
-                )
+        _validate_ip_content(record_type, content)
+        _clean_txt_content(record_type, attrs)
+        _validate_public_address(domain, record_type, content)
 
         if not self.instance:
             # get domain from name only for creation
@@ -225,11 +252,95 @@ class RecordSerializer(OwnerSerializer):
                     })
                 attrs['domain'] = domain
 
-        self._validate_service(attrs)
+        if not self.instance:
+            _validate_service('service' in attrs)
+
+        return attrs
+
 
+class BulkRecordSerializer(serializers.Serializer):
+    """
+    Validates a single item of bulk record creation.
+
+    Unlike `RecordSerializer` it doesn't touch the database - related objects
+    are passed as plain identifiers and resolved for the whole batch at once.
+    """
+
+    name = serializers.CharField(
+        max_length=255,
+        validators=Record._meta.get_field('name').validators,
+    )
+    type = serializers.ChoiceField(choices=Record.RECORD_TYPE)
+    content = serializers.CharField(
+        max_length=255, required=False, allow_blank=True, allow_null=True,
+    )
+    ttl = serializers.IntegerField(min_value=0, required=False)
+    prio = serializers.IntegerField(
+        min_value=0, required=False, allow_null=True,
+    )
+    auth = serializers.NullBooleanField(required=False)
+    disabled = serializers.BooleanField(required=False)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    domain = serializers.IntegerField(required=False, allow_null=True)
+    service = serializers.IntegerField(required=False, allow_null=True)
+    service_uid = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True,
+    )
+    owner = serializers.CharField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        _trim_whitespace(attrs, ['name', 'content'])
+        record_type, content = attrs['type'], attrs.get('content')
+        _validate_ip_content(record_type, content)
+        _clean_txt_content(record_type, attrs)
+        _validate_service(attrs.get('service') or attrs.get('service_uid'))
         return attrs
 
 
+class DomainCloneSerializer(serializers.Serializer):
+    """
+    Validates parameters of domain cloning - name of the new domain and
+    optional `rewrite` of record names: `[pattern, replacement]` of `re.sub`.
+    """
+
+    name = serializers.CharField(
+        max_length=255, validators=[validate_domain_name],
+    )
+    rewrite = serializers.ListField(
+        child=serializers.CharField(allow_blank=True), required=False,
+        allow_null=True,
+    )
+    auto_ptr = serializers.ChoiceField(
+        choices=AutoPtrOptions(), default=AutoPtrOptions.NEVER.id,
+    )
+
+    def validate_name(self, value):
+        value = value.strip()
+        if Domain.objects.filter(name=value).exists():
+            raise serializers.ValidationError(
+                'Domain with this name already exists.'
+            )
+        return value
+
+    def validate_rewrite(self, value):
+        if not value:
+            return None
+        if len(value) != 2:
+            raise serializers.ValidationError(
+                'Expected [pattern, replacement].'
+            )
+        try:
+            re.compile(value[0])
+        except re.error as e:
+            raise serializers.ValidationError(
+                'Invalid pattern: {}'.format(e)
+            )
+        return value
+
+    def validate_auto_ptr(self, value):
+        return AutoPtrOptions.from_id(value)
+
+
 class CryptoKeySerializer(ModelSerializer):
 
     class Meta:
@@ -264,3 +375,26 @@ class TsigKeysTemplateSerializer(ModelSerializer):
 
     class Meta:
         model = TsigKey
+
+
+class JobSerializer(ModelSerializer):
+
+    class Meta:
+        model = Job
+
+
+class ChangeSerializer(ModelSerializer):
+    data = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Change
+        fields = (
+            'seq', 'model', 'object_id', 'domain_id', 'action', 'data',
+            'created',
+        )
+
+    def get_data(self, obj):
+        # tombstone
+        if obj.action == Change.DELETE:
+            return None
+        return obj.data
@@ -1,21 +1,31 @@
 # -*- encoding: utf-8 -*-
 import json
 import unittest
+from unittest import mock
 from urllib.parse import urlencode
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection
 from django.core.urlresolvers import reverse
 from django.http import QueryDict
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient, APIRequestFactory
 
 from powerdns.models import (
+    Change,
     DeleteRequest,
+    Domain,
+    Job,
+    JobStates,
     Record,
     RecordRequest,
     RequestStates,
+    Service,
 )
+from powerdns.utils import AutoPtrOptions
 from powerdns.tests.utils import (
     DomainFactory,
     DomainTemplateFactory,
@@ -283,7 +293,9 @@ class TestRecords(BaseApiTestCase):
             id=response.data['record_request_id']
         )
 
-        self.assertFalse(record_request.last_change_json)
+        self.assertEqual(
+            record_request.last_change_json['_request_type'], 'create',
+        )
         record_request.reject()
         self.assertEqual(record_request.last_change_json, {
             'content': {'new': 'example.com', 'old': ''},
@@ -613,7 +625,9 @@ class TestRecords(BaseApiTestCase):
             id=response.data['record_request_id']
         )
 
-        self.assertFalse(record_request.last_change_json)
+        self.assertEqual(
+            record_request.last_change_json['_request_type'], 'update',
+        )
         record_request.reject()
         self.assertEqual(record_request.last_change_json, {
             'content': {'new': '', 'old': self.default_data['content']},
@@ -846,6 +860,26 @@ class TestRecordValidation(BaseApiTestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_validation_error_when_record_conflicts_with_CNAME(self):
+        cname = RecordFactory(
+            domain=self.domain, type='CNAME', name='www.' + self.domain.name,
+            content='web.' + self.domain.name,
+        )
+        self.default_data.update({
+            'type': 'A',
+            'name': 'www.' + self.domain.name,
+            'content': '192.168.1.1',
+        })
+        response = self.client.post(
+            reverse('api:v2:record-list'), self.default_data, format='json',
+            **{'HTTP_ACCEPT': 'application/json; version=v2'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {
+            'error': 'Cannot create a record. Following conflicting CNAME '
+            'record exists: {}'.format(cname.id),
+        })
+
 
 class TestObtainAuthToken(TestCase):
 
@@ -934,6 +968,38 @@ class TestRecordRequestSerializer(TestCase):
             serializer.instance.target_remarks
         )
 
+    def test_open_requests_are_listed_without_record_lookups(self):
+        get_user_model().objects.create_superuser(
+            'super_user', 'test@test.test', 'super_user'
+        )
+        self.client.login(username='super_user', password='super_user')
+        requests = [
+            RecordRequestFactory(
+                state=RequestStates.OPEN,
+                target_remarks='update {}'.format(i),
+                record__remarks='initial',
+            )
+            for i in range(5)
+        ]
+        # as if created before diffs were stored
+        RecordRequest.objects.filter(pk=requests[0].pk).update(
+            last_change_json=None,
+        )
+
+        response = self.client.get(reverse('api:v2:recordrequest-list'))
+        self.assertEqual(
+            response.data['results'][-1]['last_change']['remarks'],
+            {'old': 'initial', 'new': 'update 0'},
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('api:v2:recordrequest-list'))
+
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT "records"')
+            for q in context.captured_queries
+        ))
+
 
 class TestDomainSelecting(BaseApiTestCase):
     def setUp(self):
@@ -1306,6 +1372,119 @@ class TestIPRecordTest(BaseApiTestCase):
         }
         self._send_post_data_to_endpoint()
 
+    def test_batch_of_actions(self):
+        updated = RecordFactory(
+            type='A', content='127.0.0.9',
+            name='update_test_1.{}'.format(self.domain.name),
+            domain=self.domain,
+        )
+        deleted = RecordFactory(
+            type='A', content='127.0.0.10',
+            name='delete_test_1.{}'.format(self.domain.name),
+            domain=self.domain,
+        )
+        added = {'address': '127.0.0.11', 'hostname': 'add.example.com'}
+        self.data = [
+            {'action': 'add', 'old': added, 'new': added},
+            {
+                'action': 'update',
+                'old': {'address': '127.0.0.9', 'hostname': updated.name},
+                'new': {'address': '127.0.0.12', 'hostname': 'new.google.com'},
+            },
+            {
+                'action': 'delete',
+                'address': '127.0.0.10', 'hostname': deleted.name,
+            },
+            {'action': 'add', 'old': added, 'new': added},
+            {'action': 'unknown'},
+            'invalid',
+        ]
+
+        response = self._send_post_data_to_endpoint()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(r['status_code'], r['status']) for r in response.data][:3],
+            [(200, 'created'), (200, 'updated'), (200, 'deleted')],
+        )
+        self.assertEqual(
+            [r['status_code'] for r in response.data][3:], [409, 400, 400],
+        )
+        self.assertTrue(Record.objects.filter(
+            name='add.example.com', content='127.0.0.11',
+        ).exists())
+        updated.refresh_from_db()
+        self.assertEqual(updated.domain_id, self.domain_2.pk)
+        self.assertEqual(updated.content, '127.0.0.12')
+        self.assertFalse(Record.objects.filter(pk=deleted.pk).exists())
+
+    def test_batch_sees_its_own_changes(self):
+        first = {'address': '127.0.0.11', 'hostname': 'first.example.com'}
+        second = {'address': '127.0.0.12', 'hostname': 'second.example.com'}
+        self.data = [
+            {'action': 'add', 'old': first, 'new': first},
+            {'action': 'update', 'old': first, 'new': second},
+            dict(second, action='delete'),
+        ]
+
+        response = self._send_post_data_to_endpoint()
+
+        self.assertEqual(
+            [r['status'] for r in response.data],
+            ['created', 'updated', 'deleted'],
+        )
+        self.assertFalse(Record.objects.filter(
+            name__in=['first.example.com', 'second.example.com'],
+        ).exists())
+
+    def test_batch_action_failure_keeps_other_actions(self):
+        first = {'address': '10.0.0.1', 'hostname': 'h1.example.com'}
+        second = {'address': '10.0.0.2', 'hostname': 'h2.example.com'}
+        self.data = [
+            {'action': 'add', 'old': first, 'new': first},
+            {'action': 'add', 'old': second, 'new': second},
+            # conflicts with the first record
+            {'action': 'update', 'old': second, 'new': first},
+            dict(second, action='delete'),
+        ]
+
+        response = self._send_post_data_to_endpoint()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r['status_code'] for r in response.data], [200, 200, 409, 200],
+        )
+        self.assertEqual(response.data[3]['status'], 'deleted')
+        self.assertEqual(
+            list(Record.objects.filter(
+                name__in=['h1.example.com', 'h2.example.com'],
+            ).values_list('name', 'content')),
+            [('h1.example.com', '10.0.0.1')],
+        )
+
+    def test_batch_bumps_serial_once_per_zone(self):
+        self.data = [
+            {'action': 'add', 'old': new, 'new': new}
+            for new in (
+                {
+                    'address': '127.0.1.{}'.format(i),
+                    'hostname': 'host{}.example.com'.format(i),
+                }
+                for i in range(5)
+            )
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self._send_post_data_to_endpoint()
+
+        self.assertEqual(
+            [r['status'] for r in response.data], ['created'] * 5,
+        )
+        self.assertEqual(len([
+            q for q in context.captured_queries
+            if 'UPDATE "records" SET "change_date"' in q['sql']
+        ]), 1)
+
 
 class TestServiceField(BaseApiTestCase):
     def setUp(self):
@@ -1445,3 +1624,1245 @@ class TestServiceField(BaseApiTestCase):
         record.refresh_from_db()
         self.assertEqual(record.service.id, new_service.id)
         self.assertEqual(response.data['service'], new_service.id)
+
+
+class TestBulkRecords(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = get_user_model().objects.create_user(
+            'owner', 'owner@example.com', 'owner'
+        )
+        self.guest = get_user_model().objects.create_user(
+            'guest', 'guest@example.com', 'guest'
+        )
+        self.domain = DomainFactory(
+            name='example.com', owner=self.owner,
+            auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.service = ServiceFactory()
+
+    def _record_data(self, **kwargs):
+        data = {
+            'type': 'A',
+            'name': 'host.example.com',
+            'content': '192.168.0.1',
+            'service': self.service.id,
+        }
+        data.update(kwargs)
+        return data
+
+    def test_records_are_created_in_bulk(self):
+        self.client.login(username='owner', password='owner')
+
+        response = self.send_post(reverse('api:v2:record-bulk'), [
+            self._record_data(
+                name='host{}.example.com'.format(i),
+                content='192.168.0.{}'.format(i),
+            )
+            for i in range(10)
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in response.data], ['created'] * 10
+        )
+        record = Record.objects.get(pk=response.data[3]['id'])
+        self.assertEqual(record.name, 'host3.example.com')
+        self.assertEqual(record.domain, self.domain)
+        self.assertEqual(record.owner, self.owner)
+        self.assertEqual(record.number, 3232235523)
+        self.assertTrue(record.change_date)
+        self.assertEqual(
+            RecordRequest.objects.get(record=record).state,
+            RequestStates.ACCEPTED,
+        )
+
+    def test_bulk_creation_reports_errors_per_item(self):
+        self.client.login(username='owner', password='owner')
+        RecordFactory(
+            domain=self.domain, type='CNAME', name='www.example.com',
+            content='host.example.com',
+        )
+
+        response = self.send_post(reverse('api:v2:record-bulk'), [
+            self._record_data(),
+            self._record_data(content='not-an-ip'),
+            self._record_data(name='www.example.com'),
+            self._record_data(name='host.unknown.org'),
+            self._record_data(type='CNAME', content='www.example.com'),
+            self._record_data(name='bad name.example.com'),
+        ])
+
+        self.assertEqual(
+            [result['status'] for result in response.data],
+            ['created', 'error', 'error', 'error', 'error', 'error'],
+        )
+        self.assertIn('content', response.data[1]['errors'])
+        self.assertIn('domain', response.data[3]['errors'])
+        self.assertEqual(
+            response.data[5]['errors'], {'name': ['Enter a valid value.']},
+        )
+        self.assertEqual(
+            Record.objects.filter(name='host.example.com').count(), 1
+        )
+
+    def test_bulk_conflicts_refer_to_request_items(self):
+        self.client.login(username='owner', password='owner')
+
+        response = self.send_post(reverse('api:v2:record-bulk'), [
+            self._record_data(content='not-an-ip'),
+            self._record_data(name='a.example.com'),
+            self._record_data(name='a.example.com'),
+        ])
+
+        self.assertEqual(
+            [result['status'] for result in response.data],
+            ['error', 'created', 'error'],
+        )
+        self.assertEqual(
+            response.data[2]['errors'],
+            {'error': ['Conflicts with item 1 of the batch']},
+        )
+
+    def test_bulk_creation_creates_requests_when_cant_auto_accept(self):
+        self.client.login(username='guest', password='guest')
+
+        response = self.send_post(
+            reverse('api:v2:record-bulk'), [self._record_data()]
+        )
+
+        self.assertEqual(response.data[0]['status'], 'pending')
+        record_request = RecordRequest.objects.get(
+            pk=response.data[0]['record_request_id']
+        )
+        self.assertEqual(record_request.state, RequestStates.OPEN)
+        self.assertFalse(Record.objects.filter(name='host.example.com'))
+
+    def test_bulk_creation_creates_ptrs_and_bumps_soa_once(self):
+        self.client.login(username='owner', password='owner')
+        self.domain.auto_ptr = AutoPtrOptions.ONLY_IF_DOMAIN
+        self.domain.save()
+        reverse_domain = DomainFactory(name='0.168.192.in-addr.arpa')
+        soa = RecordFactory(
+            domain=reverse_domain, type='SOA', name=reverse_domain.name,
+            content='ns1.example.com hostmaster.example.com 0 1 1 1 1',
+        )
+        Record.objects.filter(pk=soa.pk).update(change_date=1)
+
+        response = self.send_post(reverse('api:v2:record-bulk'), [
+            self._record_data(
+                name='host{}.example.com'.format(i),
+                content='192.168.0.{}'.format(i),
+            )
+            for i in range(5)
+        ])
+
+        ptrs = Record.objects.filter(type='PTR', domain=reverse_domain)
+        self.assertEqual(ptrs.count(), 5)
+        self.assertEqual(
+            ptrs.get(name='2.0.168.192.in-addr.arpa').depends_on_id,
+            response.data[2]['id'],
+        )
+        self.assertGreater(Record.objects.get(pk=soa.pk).change_date, 1)
+
+    def test_bulk_creation_requires_list(self):
+        self.client.login(username='owner', password='owner')
+
+        response = self.send_post(
+            reverse('api:v2:record-bulk'), self._record_data()
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestDomainPurge(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.reverse_domain = DomainFactory(
+            name='1.168.192.in-addr.arpa', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.reverse_soa = RecordFactory(
+            domain=self.reverse_domain, type='SOA',
+            name='1.168.192.in-addr.arpa',
+            content='ns.example.com. hostmaster.example.com. 0 43200 600 '
+            '1209600 600',
+        )
+        Record.objects.filter(pk=self.reverse_soa.pk).update(change_date=1)
+        self.records = [
+            RecordFactory(
+                domain=self.domain, type='A',
+                name='host{}.example.com'.format(i),
+                content='192.168.1.{}'.format(i),
+            )
+            for i in range(5)
+        ]
+        self.ptr = RecordFactory(
+            domain=self.reverse_domain, type='PTR',
+            name='1.1.168.192.in-addr.arpa', content='host1.example.com',
+            depends_on=self.records[1],
+        )
+        self.delete_request = DeleteRequest.objects.create(
+            target=self.records[0], owner=self.super_user,
+        )
+
+    def test_superuser_purges_domain(self):
+        self.client.login(username='super_user', password='super_user')
+
+        response = self.send_post(
+            reverse('api:v2:domain-purge', args=(self.domain.id,)), {}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['records'], 5)
+        self.assertEqual(response.data['dependent_records'], 1)
+        self.assertFalse(Domain.objects.filter(pk=self.domain.pk).exists())
+        self.assertFalse(Record.objects.filter(
+            pk__in=[r.pk for r in self.records + [self.ptr]]
+        ).exists())
+        self.assertFalse(
+            DeleteRequest.objects.filter(pk=self.delete_request.pk).exists()
+        )
+        self.assertGreater(
+            Record.objects.get(pk=self.reverse_soa.pk).change_date, 1
+        )
+        audit = DeleteRequest.objects.get(target_id=self.domain.pk)
+        self.assertEqual(audit.state, RequestStates.ACCEPTED)
+        self.assertEqual(audit.last_change_json['_request_type'], 'purge')
+        self.assertEqual(
+            audit.last_change_json['records'], {'old': 5, 'new': ''}
+        )
+
+    def test_regular_user_cant_purge_domain(self):
+        get_user_model().objects.create_user('user', 'user@test.test', 'user')
+        self.client.login(username='user', password='user')
+
+        response = self.send_post(
+            reverse('api:v2:domain-purge', args=(self.domain.id,)), {}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Domain.objects.filter(pk=self.domain.pk).exists())
+
+
+class TestDomainClone(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+            remarks='production',
+        )
+        self.reverse_domain = DomainFactory(
+            name='2.168.192.in-addr.arpa', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        for name, type_, content in (
+            ('www.example.com', 'A', '192.168.2.1'),
+            ('alias.example.com', 'CNAME', 'www.example.com'),
+            ('example.com', 'MX', 'www.example.com.'),
+            ('external.example.com', 'CNAME', 'www.example.org'),
+        ):
+            RecordFactory(
+                domain=self.domain, name=name, type=type_, content=content,
+                owner=self.super_user,
+            )
+        self.url = reverse('api:v2:domain-clone', args=(self.domain.id,))
+
+    def _cloned_records(self, domain_id):
+        return set(Record.objects.filter(domain_id=domain_id).values_list(
+            'name', 'type', 'content',
+        ))
+
+    def test_superuser_clones_domain(self):
+        self.client.login(username='super_user', password='super_user')
+
+        response = self.send_post(self.url, {
+            'name': 'staging.example.net', 'rewrite': ['^www\\.', 'web.'],
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['records'], 4)
+        domain = Domain.objects.get(pk=response.data['domain'])
+        self.assertEqual(domain.name, 'staging.example.net')
+        self.assertEqual(domain.remarks, 'production')
+        self.assertEqual(self._cloned_records(domain.pk), {
+            ('web.staging.example.net', 'A', '192.168.2.1'),
+            ('alias.staging.example.net', 'CNAME', 'web.staging.example.net'),
+            ('staging.example.net', 'MX', 'web.staging.example.net.'),
+            ('external.staging.example.net', 'CNAME', 'www.example.org'),
+        })
+        self.assertFalse(
+            Record.objects.filter(domain=self.reverse_domain).exists()
+        )
+        self.assertEqual(
+            Change.objects.filter(
+                domain_id=domain.pk, model='record', action=Change.CREATE,
+            ).count(),
+            4,
+        )
+
+    def test_clone_rejects_bad_rewrites(self):
+        self.client.login(username='super_user', password='super_user')
+
+        for rewrite in (
+            # both www and alias to x
+            ['^(www|alias)\\.', 'x.'],
+            ['example\\.net$', 'evil.org'],
+            ['^www\\.', 'bad name.'],
+        ):
+            response = self.send_post(self.url, {
+                'name': 'example.net', 'rewrite': rewrite,
+            })
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, rewrite,
+            )
+            self.assertTrue(response.data['rewrite'])
+        self.assertFalse(Domain.objects.filter(name='example.net').exists())
+
+    @mock.patch('powerdns.bulk.clone_records', side_effect=IntegrityError)
+    def test_clone_is_atomic(self, clone_records):
+        self.client.login(username='super_user', password='super_user')
+
+        with self.assertRaises(IntegrityError):
+            self.send_post(self.url, {'name': 'example.net'})
+
+        self.assertFalse(Domain.objects.filter(name='example.net').exists())
+
+    def test_clone_creates_ptrs(self):
+        self.client.login(username='super_user', password='super_user')
+
+        response = self.send_post(self.url, {
+            'name': 'example.net', 'auto_ptr': AutoPtrOptions.ALWAYS.id,
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ptr = Record.objects.get(type='PTR', domain=self.reverse_domain)
+        self.assertEqual(ptr.content, 'www.example.net')
+        self.assertEqual(ptr.depends_on.domain_id, response.data['domain'])
+
+    @override_settings(ZONE_CLONE_INLINE_LIMIT=2)
+    def test_large_domain_is_cloned_by_job(self):
+        self.client.login(username='super_user', password='super_user')
+
+        response = self.send_post(self.url, {'name': 'example.net'})
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(
+            Record.objects.filter(domain_id=response.data['domain']).exists()
+        )
+        job = Job.objects.get(pk=response.data['job'])
+        job.run()
+        self.assertEqual(job.state, JobStates.DONE)
+        self.assertEqual(job.result, {'records': 4})
+        self.assertEqual(job.done, 4)
+        self.assertEqual(len(self._cloned_records(response.data['domain'])), 4)
+
+    def test_clone_validates_parameters(self):
+        self.client.login(username='super_user', password='super_user')
+
+        for data in (
+            {'name': 'example.com'},
+            {'name': 'bad name'},
+            {'name': 'example.net', 'rewrite': ['(']},
+            {'name': 'example.net', 'rewrite': ['(', 'x']},
+        ):
+            response = self.send_post(self.url, data)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, data,
+            )
+        self.assertFalse(Domain.objects.filter(name='example.net').exists())
+
+    def test_regular_user_cant_clone_domain(self):
+        get_user_model().objects.create_user('user', 'user@test.test', 'user')
+        self.client.login(username='user', password='user')
+
+        response = self.send_post(self.url, {'name': 'example.net'})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Domain.objects.filter(name='example.net').exists())
+
+
+class TestCursorPagination(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(name='example.com')
+        self.records = [
+            RecordFactory(
+                domain=self.domain, type='A',
+                name='host{}.example.com'.format(i),
+                content='192.168.1.{}'.format(i),
+            )
+            for i in range(5)
+        ]
+
+    def get(self, url, data=None):
+        return self.client.get(
+            url, data, HTTP_ACCEPT='application/json; version=v2',
+        )
+
+    def test_limit_offset_is_default(self):
+        response = self.get(reverse('api:v2:record-list'), {'limit': 2})
+        self.assertEqual(response.data['count'], 5)
+
+    def test_records_are_paged_by_cursor(self):
+        response = self.get(
+            reverse('api:v2:record-list'),
+            {'pagination': 'cursor', 'limit': 2},
+        )
+
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        seen = [r['id'] for r in response.data['results']]
+        while response.data['next']:
+            response = self.get(response.data['next'])
+            self.assertIsNotNone(response.data['previous'])
+            seen.extend(r['id'] for r in response.data['results'])
+        self.assertEqual(
+            seen, sorted((r.pk for r in self.records), reverse=True),
+        )
+
+        response = self.get(response.data['previous'])
+        self.assertEqual(
+            [r['id'] for r in response.data['results']], seen[2:4],
+        )
+
+    def test_cursor_seeks_instead_of_counting(self):
+        response = self.get(
+            reverse('api:v2:record-list'),
+            {'pagination': 'cursor', 'limit': 2},
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.get(response.data['next'])
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_domains_are_paged_by_name(self):
+        DomainFactory(name='a.example.com')
+        DomainFactory(name='z.example.com')
+        response = self.get(
+            reverse('api:v2:domain-list'),
+            {'pagination': 'cursor', 'limit': 2},
+        )
+        names = [d['name'] for d in response.data['results']]
+        response = self.get(response.data['next'])
+        names.extend(d['name'] for d in response.data['results'])
+        self.assertEqual(
+            names, ['a.example.com', 'example.com', 'z.example.com'],
+        )
+
+    def test_record_requests_are_paged_by_cursor(self):
+        requests = [
+            RecordRequestFactory(record=record, domain=self.domain)
+            for record in self.records[:3]
+        ]
+        response = self.get(
+            reverse('api:v2:recordrequest-list'),
+            {'pagination': 'cursor', 'limit': 2},
+        )
+        self.assertEqual(
+            [r['id'] for r in response.data['results']],
+            [requests[2].pk, requests[1].pk],
+        )
+        self.assertIsNotNone(response.data['next'])
+
+
+class TestDomainExport(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.soa = RecordFactory(
+            domain=self.domain, type='SOA', name='example.com',
+            content='ns.example.com hostmaster.example.com 0 43200 600 '
+            '1209600 600',
+        )
+        RecordFactory(
+            domain=self.domain, type='MX', name='example.com',
+            content='mail.example.com', prio=10, ttl=600,
+        )
+        RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.1.1', ttl=600,
+        )
+        RecordFactory(
+            domain=self.domain, type='A', name='old.example.com',
+            content='192.168.1.2', ttl=600, disabled=True,
+        )
+        RecordFactory(
+            domain=self.domain, type='TXT', name='www.example.com',
+            content='hello "world" \\o/', ttl=600,
+        )
+        RecordFactory(
+            domain=self.domain, type='TXT', name='mail.example.com',
+            content='"v=spf1 mx -all"', ttl=600,
+        )
+
+    def export(self, format):
+        response = self.client.get(
+            reverse('api:v2:domain-export', args=(self.domain.id,)),
+            {'format': format},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_bind_export(self):
+        response = self.export('bind')
+
+        self.assertEqual(
+            response['X-SOA-Serial'],
+            str(Record.objects.get(pk=self.soa.pk).change_date),
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[1], '$ORIGIN example.com.')
+        self.assertTrue(lines[2].startswith(
+            'example.com.\t3600\tIN\tSOA\tns.example.com. '
+            'hostmaster.example.com. 0 '
+        ))
+        self.assertEqual(lines[3:], [
+            'example.com.\t600\tIN\tMX\t10\tmail.example.com.',
+            'www.example.com.\t600\tIN\tA\t192.168.1.1',
+            '; old.example.com.\t600\tIN\tA\t192.168.1.2',
+            'www.example.com.\t600\tIN\tTXT\t"hello \\"world\\" \\\\o/"',
+            'mail.example.com.\t600\tIN\tTXT\t"v=spf1 mx -all"',
+        ])
+
+    def test_jsonl_export(self):
+        response = self.export('jsonl')
+
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8',
+        )
+        records = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(r['type'], r['name']) for r in records],
+            [
+                ('SOA', 'example.com'),
+                ('MX', 'example.com'),
+                ('A', 'www.example.com'),
+                ('A', 'old.example.com'),
+                ('TXT', 'www.example.com'),
+                ('TXT', 'mail.example.com'),
+            ],
+        )
+        self.assertTrue(records[3]['disabled'])
+
+    def test_serial_from_soa_content(self):
+        Record.objects.filter(pk=self.soa.pk).update(
+            content='ns.example.com hostmaster.example.com 2016010101 43200 '
+            '600 1209600 600',
+        )
+        self.assertEqual(self.domain.get_serial(), 2016010101)
+
+
+class TestZoneETag(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.soa = RecordFactory(
+            domain=self.domain, type='SOA', name='example.com',
+            content='ns.example.com hostmaster.example.com 0 43200 600 '
+            '1209600 600',
+        )
+        Record.objects.filter(pk=self.soa.pk).update(change_date=1)
+        self.record = RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.1.1',
+        )
+        Record.objects.filter(pk=self.soa.pk).update(change_date=2)
+        self.url = reverse('api:v2:record-list')
+
+    def get(self, url, data, etag=None):
+        headers = {}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(url, data, **headers)
+
+    def test_unchanged_zone_is_not_modified(self):
+        response = self.get(self.url, {'domain': self.domain.id})
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.get(self.url, {'domain': self.domain.id}, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(any(
+            'SELECT "records"."id"' in query['sql']
+            for query in context.captured_queries
+        ))
+
+    def test_changed_zone_is_sent_again(self):
+        response = self.get(self.url, {'domain': self.domain.id})
+        etag = response['ETag']
+        Record.objects.filter(pk=self.soa.pk).update(change_date=3)
+
+        response = self.get(self.url, {'domain': self.domain.id}, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_new_request_changes_etag(self):
+        response = self.get(self.url, {'domain': self.domain.id})
+        etag = response['ETag']
+        DeleteRequest.objects.create(
+            target=self.record, owner=self.super_user,
+        )
+
+        response = self.get(self.url, {'domain': self.domain.id}, etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_query(self):
+        first = self.get(self.url, {'domain': self.domain.id})
+        second = self.get(self.url, {'domain': self.domain.id, 'type': 'A'})
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_unfiltered_list_has_no_etag(self):
+        response = self.get(self.url, {})
+        self.assertNotIn('ETag', response)
+
+    def test_export_is_not_modified(self):
+        url = reverse('api:v2:domain-export', args=(self.domain.id,))
+        for format_ in ('jsonl', 'bind'):
+            response = self.get(url, {'format': format_})
+            etag = response['ETag']
+
+            response = self.get(url, {'format': format_}, etag)
+
+            self.assertEqual(
+                response.status_code, status.HTTP_304_NOT_MODIFIED, format_,
+            )
+            # the test client drops bodies of 304 responses by itself
+            self.assertEqual(response.rendered_content, b'', format_)
+
+    def test_zone_without_soa_changes_etag(self):
+        self.soa.delete()
+        response = self.get(self.url, {'domain': self.domain.id})
+        etag = response['ETag']
+
+        self.record.delete()
+        response = self.get(self.url, {'domain': self.domain.id}, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.1.2',
+        )
+        response = self.get(self.url, {'domain': self.domain.id}, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestRecordNameFilters(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.records = {
+            name: RecordFactory(
+                domain=domain, type='CNAME', name=name,
+                content='target.example.com',
+            )
+            for name in (
+                'svc.dc1.example.com',
+                'a.svc.dc1.example.com',
+                'b.a.svc.dc1.example.com',
+                'xsvc.dc1.example.com',
+                'svc.dc2.example.com',
+            )
+        }
+
+    def get_names(self, **params):
+        response = self.client.get(reverse('api:v2:record-list'), params)
+        return {r['name'] for r in response.data['results']}
+
+    def test_exact(self):
+        self.assertEqual(
+            self.get_names(name__exact='svc.dc1.example.com'),
+            {'svc.dc1.example.com'},
+        )
+
+    def test_startswith(self):
+        self.assertEqual(
+            self.get_names(name__startswith='svc.'),
+            {'svc.dc1.example.com', 'svc.dc2.example.com'},
+        )
+
+    def test_endswith(self):
+        self.assertEqual(
+            self.get_names(name__endswith='svc.dc1.example.com'),
+            {
+                'svc.dc1.example.com', 'a.svc.dc1.example.com',
+                'b.a.svc.dc1.example.com', 'xsvc.dc1.example.com',
+            },
+        )
+
+    def test_subtree(self):
+        self.assertEqual(
+            self.get_names(subtree='svc.dc1.example.com'),
+            {
+                'svc.dc1.example.com', 'a.svc.dc1.example.com',
+                'b.a.svc.dc1.example.com',
+            },
+        )
+
+
+class TestRecordsByIP(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        reverse_domain = DomainFactory(
+            name='0.168.192.in-addr.arpa', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.related = set()
+        for i in range(3):
+            self.related |= {
+                RecordFactory(
+                    domain=domain, type='A',
+                    name='host{}.example.com'.format(i),
+                    content='192.168.0.{}'.format(i),
+                ).pk,
+                RecordFactory(
+                    domain=domain, type='CNAME',
+                    name='www.host{}.example.com'.format(i),
+                    content='host{}.example.com'.format(i),
+                ).pk,
+                RecordFactory(
+                    domain=domain, type='TXT',
+                    name='host{}.example.com'.format(i),
+                    content='info',
+                ).pk,
+                RecordFactory(
+                    domain=reverse_domain, type='PTR',
+                    name='{}.0.168.192.in-addr.arpa'.format(i),
+                    content='host{}.example.com'.format(i),
+                ).pk,
+            }
+        self.v6 = RecordFactory(
+            domain=domain, type='AAAA', name='v6.example.com',
+            content='2001:db8::1',
+        )
+
+    def test_by_ip_returns_related_records(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.send_post(reverse('api:v2:record-by-ip'), {
+                'ips': ['192.168.0.{}'.format(i) for i in range(3)] +
+                ['2001:0db8:0:0::1', 'not an ip'],
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {r['id'] for r in response.data['results']},
+            self.related | {self.v6.pk},
+        )
+        self.assertEqual(sum(
+            'FROM "records"' in query['sql'] and 'COUNT' not in query['sql']
+            for query in context.captured_queries
+        ), 1)
+
+    def test_by_ip_respects_filters(self):
+        response = self.send_post(
+            reverse('api:v2:record-by-ip') + '?type=PTR',
+            {'ips': ['192.168.0.1']},
+        )
+        self.assertEqual(
+            [r['name'] for r in response.data['results']],
+            ['1.0.168.192.in-addr.arpa'],
+        )
+
+    def test_by_ip_requires_ips(self):
+        response = self.send_post(reverse('api:v2:record-by-ip'), {})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestSelectedFields(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        for i in range(3):
+            RecordFactory(
+                domain=self.domain, type='A',
+                name='host{}.example.com'.format(i),
+                content='192.168.0.{}'.format(i),
+                service=ServiceFactory(),
+            )
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, context.captured_queries
+
+    def test_selected_fields_of_records(self):
+        response, queries = self.get(
+            reverse('api:v2:record-list'), fields='name,type,content',
+        )
+
+        self.assertEqual(
+            [set(r) for r in response.data['results']],
+            [{'name', 'type', 'content'}] * 3,
+        )
+        records_query, = [
+            q['sql'] for q in queries
+            if 'FROM "records"' in q['sql'] and 'COUNT' not in q['sql']
+        ]
+        self.assertNotIn('JOIN', records_query)
+        self.assertNotIn('"records"."remarks"', records_query)
+        self.assertFalse(any(
+            'powerdns_recordrequest' in q['sql'] or
+            'powerdns_deleterequest' in q['sql']
+            for q in queries
+        ))
+
+    def test_derived_fields_load_their_relations(self):
+        response, queries = self.get(
+            reverse('api:v2:record-list'),
+            fields='id,service_name,owner,change_request',
+        )
+
+        self.assertEqual(
+            set(response.data['results'][0]),
+            {'id', 'service_name', 'owner', 'change_request'},
+        )
+        self.assertTrue(all(
+            r['service_name'] for r in response.data['results']
+        ))
+        self.assertEqual(len([
+            q for q in queries if 'powerdns_recordrequest' in q['sql']
+        ]), 1)
+        self.assertFalse(any(
+            'powerdns_service' in q['sql'] and 'JOIN' not in q['sql']
+            for q in queries
+        ))
+
+    def test_all_fields_by_default(self):
+        response, queries = self.get(reverse('api:v2:record-list'))
+        self.assertIn('service_name', response.data['results'][0])
+        self.assertIn('remarks', response.data['results'][0])
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT "powerdns_service"')
+            for q in queries
+        ))
+
+    def test_selected_fields_of_domains(self):
+        response, _ = self.get(
+            reverse('api:v2:domain-list'), fields='name,owner',
+        )
+        self.assertEqual(set(response.data['results'][0]), {'name', 'owner'})
+
+
+class TestCachedResponses(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.login(username='super_user', password='super_user')
+        self.service = ServiceFactory(name='first')
+        self.url = reverse('api:v2:service-list')
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, context.captured_queries
+
+    def service_queries(self, queries):
+        return [q for q in queries if 'powerdns_service' in q['sql']]
+
+    def test_response_is_served_from_cache(self):
+        first, _ = self.get(self.url)
+        second, queries = self.get(self.url)
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.service_queries(queries), [])
+
+    def test_change_invalidates_cache(self):
+        self.get(self.url)
+        self.service.name = 'renamed'
+        self.service.save()
+
+        response, queries = self.get(self.url)
+
+        self.assertIn(b'renamed', response.content)
+        self.assertTrue(self.service_queries(queries))
+
+    def test_change_outside_of_api_invalidates_cache(self):
+        # eg. by run_jobs, which never loads the API - receivers are
+        # connected when apps are ready
+        self.get(self.url)
+        Service.objects.create(name='third', uid='third')
+
+        _, queries = self.get(self.url)
+
+        self.assertTrue(self.service_queries(queries))
+
+    def test_related_model_change_invalidates_cache(self):
+        self.get(self.url)
+        ServiceOwnerFactory(service=self.service)
+
+        _, queries = self.get(self.url)
+
+        self.assertTrue(self.service_queries(queries))
+
+    def test_detail_is_cached_per_object(self):
+        other = ServiceFactory(name='second')
+        self.get(reverse('api:v2:service-detail', args=(self.service.pk,)))
+
+        response, _ = self.get(
+            reverse('api:v2:service-detail', args=(other.pk,))
+        )
+
+        self.assertEqual(response.data['name'], 'second')
+
+    def test_anonymous_user_is_not_served_from_cache(self):
+        self.get(self.url)
+        self.client.logout()
+
+        response = self.client.get(self.url)
+
+        self.assertIn(response.status_code, (
+            status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN,
+        ))
+
+
+class TestColumnarRecords(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+            owner=self.super_user,
+        )
+        self.records = [
+            RecordFactory(
+                domain=self.domain, type='A', owner=self.super_user,
+                name='host{}.example.com'.format(i),
+                content='192.168.2.{}'.format(i),
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('api:v2:record-list')
+
+    def get(self, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                self.url, data,
+                HTTP_ACCEPT='application/vnd.dnsaas.columnar+json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Type'], 'application/vnd.dnsaas.columnar+json',
+        )
+        return json.loads(response.content.decode()), context.captured_queries
+
+    def test_rows_are_listed_under_columns(self):
+        data, _ = self.get({'domain': self.domain.pk})
+
+        columns = data['results']['columns']
+        self.assertEqual(columns, list(RecordViewSet.columnar_fields))
+        rows = [dict(zip(columns, row)) for row in data['results']['rows']]
+        self.assertEqual(
+            sorted(row['name'] for row in rows if row['type'] == 'A'),
+            ['host0.example.com', 'host1.example.com', 'host2.example.com'],
+        )
+        self.assertTrue(all(
+            row['owner'] == 'super_user' for row in rows if row['type'] == 'A'
+        ))
+
+    def test_selected_columns_are_queried_only(self):
+        data, queries = self.get(
+            {'type': 'A', 'fields': 'name,content'},
+        )
+
+        self.assertEqual(data['results']['columns'], ['name', 'content'])
+        self.assertEqual(len(data['results']['rows']), 3)
+        records_query, = [
+            q['sql'] for q in queries
+            if 'FROM "records"' in q['sql'] and 'LIMIT 50' in q['sql']
+        ]
+        self.assertNotIn('"records"."remarks"', records_query)
+        self.assertFalse(any(
+            'powerdns_recordrequest' in q['sql'] for q in queries
+        ))
+
+    def test_rows_are_paged_by_cursor(self):
+        seen = []
+        # without the ordering (id) column
+        data, _ = self.get({
+            'type': 'A', 'pagination': 'cursor', 'limit': 2, 'fields': 'name',
+        })
+        self.assertEqual(data['results']['columns'], ['name'])
+        seen.extend(data['results']['rows'])
+        self.assertIsNotNone(data['next'])
+        while data['next']:
+            data, _ = self.get(
+                dict(QueryDict(data['next'].split('?', 1)[1]).items()),
+            )
+            seen.extend(data['results']['rows'])
+        self.assertEqual(seen, [
+            [r.name] for r in sorted(
+                self.records, key=lambda r: r.pk, reverse=True,
+            )
+        ])
+
+    def test_domains_can_be_listed_in_columns(self):
+        self.url = reverse('api:v2:domain-list')
+
+        data, _ = self.get({'fields': 'name,owner'})
+
+        self.assertIn(
+            ['example.com', 'super_user'],
+            data['results']['rows'],
+        )
+
+
+class TestHosts(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.www = RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.3.1',
+        )
+        self.txt = RecordFactory(
+            domain=self.domain, type='TXT', name='www.example.com',
+            content='Rack 1',
+        )
+
+    def test_hosts_by_query(self):
+        response = self.client.get(
+            reverse('api:v2:hosts'),
+            {'host': ['www.example.com', '192.168.3.1']},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [host['host'] for host in response.data],
+            ['www.example.com', '192.168.3.1'],
+        )
+        for host in response.data:
+            self.assertEqual([r['id'] for r in host['A']], [self.www.pk])
+            self.assertEqual([r['id'] for r in host['TXT']], [self.txt.pk])
+
+    def test_hosts_by_post(self):
+        response = self.send_post(
+            reverse('api:v2:hosts'), {'hosts': ['www.example.com']},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['A'][0]['content'], '192.168.3.1')
+
+    def test_hosts_are_required(self):
+        self.assertEqual(
+            self.client.get(reverse('api:v2:hosts')).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        response = self.send_post(reverse('api:v2:hosts'), {'hosts': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestChanges(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        Change.objects.all().delete()
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.records = [
+            RecordFactory(
+                domain=self.domain, type='A',
+                name='host{}.example.com'.format(i),
+                content='192.168.4.{}'.format(i),
+            )
+            for i in range(3)
+        ]
+
+    def get(self, data=None):
+        response = self.client.get(reverse('api:v2:change-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_changes_are_paged_by_sequence(self):
+        seen = []
+        data = self.get({'limit': 2})
+        while True:
+            seen.extend(change['seq'] for change in data['results'])
+            if not data['next']:
+                break
+            data = self.get(QueryDict(data['next'].split('?', 1)[1]))
+
+        self.assertEqual(seen, list(Change.objects.order_by(
+            'seq',
+        ).values_list('seq', flat=True)))
+        self.assertEqual(data['last_seq'], seen[-1])
+
+    def test_changes_since(self):
+        last_seq = self.get()['last_seq']
+        deleted_pk = self.records[0].pk
+        self.records[0].delete()
+
+        data = self.get({'since': last_seq})
+
+        self.assertEqual(
+            [(c['model'], c['object_id'], c['data'])
+             for c in data['results'] if c['action'] == 'delete'],
+            [('record', deleted_pk, None)],
+        )
+        self.assertEqual(self.get({'since': data['last_seq']})['results'], [])
+
+    def test_changes_are_listed_in_commit_order(self):
+        last_seq = self.get()['last_seq']
+        for record in self.records:
+            record.ttl = 600
+            record.save()
+        first, late, last = Change.objects.filter(seq__isnull=True)
+        # not committed yet (or rolled back) - leaves a gap in ids
+        late.delete()
+
+        data = self.get({'since': last_seq})
+
+        self.assertEqual(
+            [change['object_id'] for change in data['results']],
+            [first.object_id, last.object_id],
+        )
+        self.assertIsNone(data['next'])
+        # committed after the later ones were listed
+        late.save(force_insert=True)
+        data = self.get({'since': data['last_seq']})
+        self.assertEqual(
+            [change['object_id'] for change in data['results']],
+            [late.object_id],
+        )
+        self.assertEqual(data['last_seq'], last_seq + 3)
+
+    def test_invalid_since(self):
+        response = self.client.get(
+            reverse('api:v2:change-list'), {'since': 'x'},
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestRecordsBulkDelete(BaseApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='super_user', password='super_user')
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.reverse_domain = DomainFactory(
+            name='6.168.192.in-addr.arpa', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.reverse_soa = RecordFactory(
+            domain=self.reverse_domain, type='SOA',
+            name='6.168.192.in-addr.arpa',
+            content='ns.example.com. hostmaster.example.com. 0 43200 600 '
+            '1209600 600',
+        )
+        Record.objects.filter(pk=self.reverse_soa.pk).update(change_date=1)
+        self.cluster = [
+            RecordFactory(
+                domain=self.domain, type='A', owner=self.super_user,
+                name='node{}.cluster.example.com'.format(i),
+                content='192.168.6.{}'.format(i),
+            )
+            for i in range(3)
+        ]
+        self.ptr = RecordFactory(
+            domain=self.reverse_domain, type='PTR',
+            name='1.6.168.192.in-addr.arpa',
+            content='node1.cluster.example.com',
+            depends_on=self.cluster[1],
+        )
+        self.other = RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.7.1',
+        )
+        self.url = '{}?name__endswith=.cluster.example.com'.format(
+            reverse('api:v2:record-bulk-delete'),
+        )
+
+    def test_preview(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['dependent_records'], 1)
+        self.assertEqual(response.data['domains'], {'example.com': 3})
+        self.assertEqual(
+            [r['id'] for r in response.data['sample']],
+            [r.pk for r in self.cluster],
+        )
+
+    def test_delete_matched_records(self):
+        response = self.send_post(self.url, {'count': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'records': 3, 'dependent_records': 1, 'domains': 2,
+        })
+        deleted_pks = [r.pk for r in self.cluster + [self.ptr]]
+        self.assertFalse(Record.objects.filter(pk__in=deleted_pks).exists())
+        self.assertTrue(Record.objects.filter(pk=self.other.pk).exists())
+        history = DeleteRequest.objects.filter(target_id__in=deleted_pks)
+        self.assertEqual(history.count(), 4)
+        self.assertTrue(all(
+            request.state == RequestStates.ACCEPTED and
+            request.owner == self.super_user and
+            request.last_change_json['_request_type'] == 'delete'
+            for request in history
+        ))
+        self.assertGreater(
+            Record.objects.get(pk=self.reverse_soa.pk).change_date, 1,
+        )
+
+    def test_changed_set_is_not_deleted(self):
+        response = self.send_post(self.url, {'count': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            Record.objects.filter(name__endswith='.cluster.example.com')
+            .count(),
+            3,
+        )
+
+    def test_filters_are_required(self):
+        for url in (
+            reverse('api:v2:record-bulk-delete'),
+            reverse('api:v2:record-bulk-delete') + '?nmae=cluster',
+        ):
+            response = self.send_post(url, {'count': 4})
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST,
+            )
+        self.assertEqual(Record.objects.filter(type='A').count(), 4)
+
+    def test_regular_user_cant_bulk_delete(self):
+        get_user_model().objects.create_user('user', 'user@test.test', 'user')
+        self.client.login(username='user', password='user')
+
+        response = self.send_post(self.url, {'count': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
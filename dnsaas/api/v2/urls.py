@@ -5,11 +5,14 @@ from rest_framework.routers import DefaultRouter
 from powerdns.utils import patterns
 
 from .views import (
+    ChangeViewSet,
     CryptoKeyViewSet,
     DomainMetadataViewSet,
     DomainTemplateViewSet,
     DomainViewSet,
+    HostsView,
     IPRecordView,
+    JobViewSet,
     RecordRequestsViewSet,
     RecordTemplateViewSet,
     RecordViewSet,
@@ -20,10 +23,12 @@ from .views import (
 
 
 router = DefaultRouter()
+router.register(r'changes', ChangeViewSet)
 router.register(r'crypto-keys', CryptoKeyViewSet)
 router.register(r'domain-templates', DomainTemplateViewSet)
 router.register(r'domains', DomainViewSet)
 router.register(r'domains-metadata', DomainMetadataViewSet)
+router.register(r'jobs', JobViewSet)
 router.register(r'record-requests', RecordRequestsViewSet)
 router.register(r'record-templates', RecordTemplateViewSet)
 router.register(r'records', RecordViewSet)
@@ -34,4 +39,5 @@ urlpatterns = router.urls
 urlpatterns += patterns(
     '',
     url(r'^ip_record/', IPRecordView.as_view(), name='ip-record'),
+    url(r'^hosts/', HostsView.as_view(), name='hosts'),
 )
@@ -1,50 +1,97 @@
 
 """Views and viewsets for DNSaaS API"""
 import django_filters
+import hashlib
 import ipaddress
 import logging
 
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import MultipleObjectsReturned, ValidationError
 from django.core.urlresolvers import reverse
-from django.db import IntegrityError
-from django.db.models import Prefetch, Q
-
-from powerdns.utils import find_domain_for_record
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
+
+from powerdns.bulk import (
+    BULK_CHUNK_SIZE,
+    bulk_create_records,
+    clone_domain,
+    delete_records,
+    find_batch_conflicts,
+    preview_delete_records,
+    purge_domain,
+)
+from powerdns.hosts import get_host_records
+from powerdns.search import (
+    contains_q,
+    ip_records_q,
+    search_q,
+    subtree_q,
+)
+from powerdns.utils import find_domain_for_record, find_domains_for_records
 from powerdns.models import (
     RECORD_A_TYPES,
+    Change,
     CryptoKey,
     DeleteRequest,
     Domain,
     DomainMetadata,
     DomainTemplate,
+    Job,
     Record,
     RecordRequest,
     RecordTemplate,
     RequestStates,
     Service,
+    ServiceOwner,
     SuperMaster,
     TsigKey,
     can_auto_accept_record_request,
+    coalesce_serial_bumps,
+    get_zone_version,
+    index_records,
+    log_changes,
+    schedule_serial_bump,
+    sequence_changes,
 )
 from rest_framework import filters, serializers, status
+from rest_framework.decorators import detail_route, list_route
 from rest_framework.permissions import DjangoObjectPermissions, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.views import APIView
 
+from .cache import CachedResponseMixin
+from .pagination import (
+    KeysetPagination,
+    OptionalCursorPagination,
+    SequencePagination,
+)
+from .renderers import (
+    BindZoneRenderer,
+    ColumnarJSONRenderer,
+    JSONLinesRenderer,
+)
 from .serializers import (
+    BulkRecordSerializer,
+    ChangeSerializer,
     CryptoKeySerializer,
+    DomainCloneSerializer,
     DomainMetadataSerializer,
     DomainSerializer,
     DomainTemplateSerializer,
+    JobSerializer,
     RecordRequestSerializer,
     RecordSerializer,
     RecordTemplateSerializer,
     ServiceSerializer,
     SuperMasterSerializer,
     TsigKeysTemplateSerializer,
+    _validate_public_address,
 )
-from powerdns.utils import reverse_pointer
 
 
 log = logging.getLogger(__name__)
@@ -63,6 +110,130 @@ class FiltersMixin(object):
     filter_backends = (filters.DjangoFilterBackend,)
 
 
+class SelectedFieldsMixin(object):
+    """
+    Lets GET requests select fields of the response with `?fields=a,b`. The
+    queryset then loads only columns and relations needed for them, as
+    declared in `field_dependencies` - serializer field name mapped to model
+    fields (`relation__field` for related ones) and Prefetch objects.
+    Fields without an entry depend on the model field of the same name.
+    """
+    fields_query_param = 'fields'
+    field_dependencies = {}
+
+    def get_selected_fields(self):
+        if self.request.method != 'GET':
+            return []
+        value = self.request.query_params.get(self.fields_query_param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['selected_fields'] = self.get_selected_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        selected = self.get_selected_fields()
+        if not selected:
+            return queryset
+        model_fields = {
+            field.name for field in queryset.model._meta.concrete_fields
+        }
+        only = {getattr(self, 'cursor_ordering', 'pk').lstrip('-')}
+        related = set()
+        prefetches = []
+        for name in selected:
+            for dependency in self.field_dependencies.get(name, (name,)):
+                if isinstance(dependency, Prefetch):
+                    prefetches.append(dependency)
+                elif '__' in dependency:
+                    related.add(dependency.rsplit('__', 1)[0])
+                    only.add(dependency)
+                elif dependency in model_fields:
+                    only.add(dependency)
+        return queryset.select_related(None).select_related(
+            *related
+        ).prefetch_related(None).prefetch_related(*prefetches).only(*only)
+
+
+class ColumnarListMixin(object):
+    """
+    Lists in `ColumnarJSONRenderer` format (`?format=columnar` or its media
+    type in Accept), built straight from `values_list()` rows - without
+    model instances or serializers. Columns are `columnar_fields` (mapped
+    to lookups by `columnar_lookups`) or the ones selected by `?fields=`.
+    """
+    renderer_classes = (
+        tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (ColumnarJSONRenderer,)
+    )
+    columnar_fields = ()
+    columnar_lookups = {}
+
+    def get_columnar_fields(self):
+        selected = self.request.query_params.get('fields', '').split(',')
+        columns = [
+            name.strip() for name in selected
+            if name.strip() in self.columnar_fields
+        ]
+        return columns or list(self.columnar_fields)
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != ColumnarJSONRenderer.format:
+            return super().list(request, *args, **kwargs)
+        columns = self.get_columnar_fields()
+        lookups = [
+            self.columnar_lookups.get(column, column) for column in columns
+        ]
+        # keyset pagination reads its position from the ordering column
+        ordering_field = getattr(
+            self, 'cursor_ordering', KeysetPagination.ordering,
+        ).lstrip('-')
+        if ordering_field not in lookups:
+            lookups.append(ordering_field)
+        rows = self.filter_queryset(self.get_queryset()).select_related(
+            None,
+        ).prefetch_related(None).values_list(*lookups)
+        page = self.paginate_queryset(rows)
+        rows = rows if page is None else page
+        if len(lookups) > len(columns):
+            rows = [row[:len(columns)] for row in rows]
+        data = {'columns': columns, 'rows': rows}
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+
+class ZoneETagMixin(object):
+    """
+    Conditional GET of responses built from records of a single zone: their
+    ETag is computed from the zone version (see `get_zone_version`), so
+    unchanged zones get 304 without querying the records.
+    """
+
+    def get_zone_etag(self, domain_id, *versions):
+        version = get_zone_version(domain_id)
+        if version is None:
+            return None
+        key = ':'.join(str(part) for part in (
+            (domain_id, version) + versions +
+            (self.request.get_full_path(), self.request.accepted_media_type)
+        ))
+        return quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def is_not_modified(self, etag):
+        if etag is None:
+            return False
+        etags = parse_etags(self.request.META.get('HTTP_IF_NONE_MATCH', ''))
+        # parse_etags() unquotes the tags before Django 1.11
+        return etag in etags or etag.strip('"') in etags
+
+    def not_modified_response(self, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={
+            'ETag': etag,
+        })
+
+
 class OwnerViewSet(FiltersMixin, ModelViewSet):
     """Base view for objects with owner"""
 
@@ -81,18 +252,89 @@ class DomainFilter(django_filters.FilterSet):
         fields = ['name', 'owner', 'type']
 
 
-class DomainViewSet(OwnerViewSet):
+class DomainViewSet(
+    ZoneETagMixin, SelectedFieldsMixin, ColumnarListMixin, OwnerViewSet,
+):
 
-    queryset = Domain.objects.all().select_related('owner')
+    queryset = Domain.objects.all().select_related('owner', 'service')
     serializer_class = DomainSerializer
     permission_classes = (DomainPermission,)
     filter_backends = (filters.DjangoFilterBackend, filters.SearchFilter)
     filter_class = DomainFilter
     search_fields = ['name', 'owner__username']
+    pagination_class = OptionalCursorPagination
+    cursor_ordering = 'name'
+    field_dependencies = {
+        'owner': ('owner__username',),
+        'service_name': ('service__name',),
+        'direct_owners': (Prefetch('direct_owners'),),
+    }
+    columnar_fields = (
+        'id', 'name', 'type', 'master', 'account', 'owner', 'service',
+        'template', 'reverse_template', 'auto_ptr', 'unrestricted',
+    )
+    columnar_lookups = {'owner': 'owner__username'}
+
+    @detail_route(methods=['post'])
+    def purge(self, request, pk=None):
+        """Delete the domain with all its records in one fast operation"""
+        return Response(purge_domain(self.get_object()))
+
+    @detail_route(methods=['post'])
+    def clone(self, request, pk=None):
+        """
+        Create domain `name` with settings and records of this one. Record
+        names can be changed by `rewrite` - `[pattern, replacement]`. Large
+        zones are copied by a background job.
+        """
+        source = self.get_object()
+        serializer = DomainCloneSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            domain, job = clone_domain(
+                source, data['name'], rewrite=data.get('rewrite'),
+                owner=request.user, auto_ptr=data['auto_ptr'],
+            )
+        except ValidationError as e:
+            return Response(
+                {'rewrite': e.messages}, status=status.HTTP_400_BAD_REQUEST,
+            )
+        result = {'domain': domain.pk, 'name': domain.name}
+        if job is not None:
+            result['job'] = job.pk
+            return Response(result, status=status.HTTP_202_ACCEPTED)
+        result['records'] = Record.objects.filter(domain=domain).count()
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    @detail_route(
+        methods=['get'],
+        renderer_classes=(BindZoneRenderer, JSONLinesRenderer),
+    )
+    def export(self, request, pk=None):
+        """Stream all records of the domain as `?format=bind` or `jsonl`"""
+        domain = self.get_object()
+        etag = self.get_zone_etag(domain.id)
+        if self.is_not_modified(etag):
+            return self.not_modified_response(etag)
+        serial = domain.get_serial()
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.render_zone(domain, serial),
+            content_type='{}; charset={}'.format(
+                renderer.media_type, renderer.charset,
+            ),
+        )
+        if serial is not None:
+            response['X-SOA-Serial'] = serial
+        if etag is not None:
+            response['ETag'] = etag
+        return response
 
 
-class ServiceViewSet(FiltersMixin, ModelViewSet):
+class ServiceViewSet(CachedResponseMixin, FiltersMixin, ModelViewSet):
 
+    cached_models = (Service, ServiceOwner)
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     filter_backends = (filters.DjangoFilterBackend, filters.SearchFilter)
@@ -105,41 +347,113 @@ class RecordRequestsViewSet(FiltersMixin, ReadOnlyModelViewSet):
     ).order_by('-id')
     filter_fields = ('owner', 'state')
     serializer_class = RecordRequestSerializer
+    pagination_class = OptionalCursorPagination
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        # open requests created before their diffs were stored
+        RecordRequest.refresh_open_diffs([
+            request for request in page or ()
+            if not request.last_change_json
+        ])
+        return page
+
+
+class JobViewSet(FiltersMixin, ReadOnlyModelViewSet):
+    """Background jobs, eg. to follow their progress"""
+    queryset = Job.objects.all().order_by('-id')
+    serializer_class = JobSerializer
+    filter_fields = ('state', 'handler')
+
+
+class ChangeViewSet(FiltersMixin, ReadOnlyModelViewSet):
+    """
+    Log of changes of domains and records, for mirrors syncing only what has
+    changed - `?since=<seq>` lists changes after the given sequence number.
+    Only committed changes are listed (see `sequence_changes`).
+    """
+    queryset = Change.objects.filter(seq__isnull=False)
+    serializer_class = ChangeSerializer
+    pagination_class = SequencePagination
+    sequence_field = 'seq'
+    filter_fields = ('model', 'domain_id', 'action')
+
+    def get_queryset(self):
+        sequence_changes()
+        return super().get_queryset()
 
 
 class RecordFilter(django_filters.FilterSet):
-    content = django_filters.CharFilter(
-        name='content', lookup_type='icontains'
-    )
-    name = django_filters.CharFilter(
-        name='name', lookup_type='icontains'
+    content = django_filters.CharFilter(method='filter_contains')
+    name = django_filters.CharFilter(method='filter_contains')
+    name__exact = django_filters.CharFilter(name='name', lookup_type='exact')
+    name__startswith = django_filters.CharFilter(
+        name='name', lookup_type='startswith',
     )
+    name__endswith = django_filters.CharFilter(method='filter_endswith')
+    subtree = django_filters.CharFilter(method='filter_subtree')
 
     class Meta:
         model = Record
         fields = ['name', 'content', 'domain', 'owner']
 
+    def filter_contains(self, queryset, name, value):
+        return queryset.filter(contains_q(value, fields=(name,)))
+
+    def filter_endswith(self, queryset, name, value):
+        return queryset.filter(reversed_name__startswith=value[::-1])
+
+    def filter_subtree(self, queryset, name, value):
+        return queryset.filter(subtree_q(value))
+
+
+class RecordSearchFilter(filters.SearchFilter):
+    """
+    Search of records by the search index (see `powerdns.search`), instead
+    of `icontains` lookups of `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            queryset = queryset.filter(search_q(term))
+        return queryset
+
 
-class RecordViewSet(OwnerViewSet):
+class RecordViewSet(
+    ZoneETagMixin, SelectedFieldsMixin, ColumnarListMixin, OwnerViewSet,
+):
 
+    open_requests = Prefetch(
+        "requests",
+        queryset=RecordRequest.objects.filter(state=RequestStates.OPEN)
+    )
+    open_delete_requests = Prefetch(
+        "delete_request",
+        queryset=DeleteRequest.objects.filter(state=RequestStates.OPEN)
+    )
     queryset = Record.objects.all().select_related(
-        'owner', 'domain'
+        'owner', 'domain', 'service',
     ).prefetch_related(
-        Prefetch(
-            "requests",
-            queryset=RecordRequest.objects.filter(state=RequestStates.OPEN)
-        ),
-        Prefetch(
-            "delete_request",
-            queryset=DeleteRequest.objects.filter(state=RequestStates.OPEN)
-        )
+        open_requests, open_delete_requests,
     ).order_by('-id')
     serializer_class = RecordSerializer
-    filter_backends = (filters.DjangoFilterBackend, filters.SearchFilter)
+    filter_backends = (filters.DjangoFilterBackend, RecordSearchFilter)
     filter_class = RecordFilter
-    search_fields = [
-        'name', 'content', 'type', 'domain__name', 'owner__username'
-    ]
+    pagination_class = OptionalCursorPagination
+    field_dependencies = {
+        'owner': ('owner__username',),
+        'service_uid': ('service__uid',),
+        'service_name': ('service__name',),
+        'unrestricted_domain': ('domain__unrestricted',),
+        'change_request': (open_requests,),
+        'delete_request': (open_delete_requests,),
+    }
+    columnar_fields = (
+        'id', 'domain', 'name', 'type', 'content', 'ttl', 'prio', 'auth',
+        'disabled', 'change_date', 'owner', 'service', 'depends_on',
+        'remarks',
+    )
+    columnar_lookups = {'owner': 'owner__username'}
 
     def _set_owner(self, data):
         if 'owner' not in data:
@@ -297,22 +611,272 @@ class RecordViewSet(OwnerViewSet):
             code = status.HTTP_202_ACCEPTED
         return Response(status=code)
 
+    def _bulk_resolve_related(self, items):
+        """Fetch objects referenced by bulk `items` with few queries"""
+        def _values(key):
+            return {item[key] for item in items if item.get(key)}
+
+        domains_by_id = Domain.objects.select_related(
+            'template', 'reverse_template',
+        ).in_bulk(_values('domain'))
+        domains_by_name = find_domains_for_records(
+            item['name'] for item in items if not item.get('domain')
+        )
+        services_by_id = Service.objects.in_bulk(_values('service'))
+        services_by_uid = {
+            service.uid: service
+            for service in Service.objects.filter(
+                uid__in=_values('service_uid')
+            )
+        }
+        owners = {
+            user.username: user
+            for user in get_user_model().objects.filter(
+                username__in=_values('owner')
+            )
+        }
+
+        def _resolve(item):
+            if item.get('domain'):
+                domain = domains_by_id.get(item['domain'])
+            else:
+                domain = domains_by_name.get(item['name'])
+            if not domain:
+                raise serializers.ValidationError({
+                    'domain': ['No domain found for name {}'.format(
+                        item['name']
+                    )]
+                })
+            service = None
+            if item.get('service'):
+                service = services_by_id.get(item['service'])
+            elif item.get('service_uid'):
+                service = services_by_uid.get(item['service_uid'])
+            if (item.get('service') or item.get('service_uid')) and (
+                not service
+            ):
+                raise serializers.ValidationError({
+                    'service': ['Service does not exist.']
+                })
+            owner = owners.get(item.get('owner'))
+            if item.get('owner') and not owner:
+                raise serializers.ValidationError({
+                    'owner': [
+                        'Object with username={} does not exist.'.format(
+                            item['owner']
+                        )
+                    ]
+                })
+            return domain, service, owner
+        return _resolve
+
+    @list_route(methods=['post'])
+    def bulk(self, request):
+        """
+        Create many records in a single request.
+
+        Expects a list of records (as for a regular create). Related objects,
+        conflicts and permissions are checked for the whole batch at once and
+        auto-accepted records are inserted in bulk. Returns a list of results
+        in the order of sent items.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {'error': 'Expected a list of records'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = [None] * len(request.data)
+        valid = []
+        for index, item in enumerate(request.data):
+            if isinstance(item, dict):
+                item = self._set_owner(item.copy())
+            serializer = BulkRecordSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {
+                    'status': 'error', 'errors': serializer.errors,
+                }
+
+        resolve = self._bulk_resolve_related([attrs for _, attrs in valid])
+        record_requests = []
+        for index, attrs in valid:
+            try:
+                domain, service, owner = resolve(attrs)
+                _validate_public_address(
+                    domain, attrs['type'], attrs.get('content'),
+                )
+                record_request = RecordRequest(
+                    domain=domain, owner=request.user, target_owner=owner,
+                )
+                record_request.copy_records_data(
+                    (key, value) for key, value in attrs.items()
+                    if key not in {'domain', 'service', 'service_uid', 'owner'}
+                )
+                record_request.target_service = service
+                record_request.clean_content_field()
+                record_request.force_case()
+            except serializers.ValidationError as e:
+                results[index] = {'status': 'error', 'errors': e.detail}
+            except ValidationError as e:
+                results[index] = {
+                    'status': 'error', 'errors': {'error': e.messages},
+                }
+            else:
+                record_requests.append((index, record_request))
+
+        conflicts = find_batch_conflicts(
+            [
+                (rr.target_name, rr.target_type, rr.target_content)
+                for _, rr in record_requests
+            ],
+            positions=[index for index, _ in record_requests],
+        )
+        auto_acceptable_domains = {}
+        to_accept, to_save = [], []
+        for i, (index, record_request) in enumerate(record_requests):
+            if i in conflicts:
+                results[index] = {
+                    'status': 'error', 'errors': {'error': conflicts[i]},
+                }
+                continue
+            domain = record_request.domain
+            if domain.id not in auto_acceptable_domains:
+                auto_acceptable_domains[domain.id] = domain.can_auto_accept(
+                    request.user
+                )
+            if (
+                auto_acceptable_domains[domain.id] and
+                not record_request.is_sec_acceptance_required()
+            ):
+                to_accept.append((index, record_request))
+            else:
+                to_save.append((index, record_request))
+
+        with transaction.atomic():
+            records = []
+            for index, record_request in to_accept:
+                record = record_request.get_object()
+                record_request.last_change_json = (
+                    record_request._get_json_history(record)
+                )
+                record_request.copy_to_object(record)
+                records.append(record)
+            bulk_create_records(records)
+            for (index, record_request), record in zip(to_accept, records):
+                record_request.record = record
+                record_request.state = RequestStates.ACCEPTED
+                results[index] = {'status': 'created', 'id': record.id}
+            RecordRequest.objects.bulk_create(
+                [record_request for _, record_request in to_accept],
+                batch_size=BULK_CHUNK_SIZE,
+            )
+            for index, record_request in to_save:
+                record_request.save()
+                results[index] = {
+                    'status': 'pending',
+                    'record_request_id': record_request.id,
+                }
+        return Response(results, status=status.HTTP_200_OK)
+
+    def _get_related_versions(self, domain_id):
+        """Versions of the domain and requests shown with its records"""
+        return (
+            Domain.objects.filter(pk=domain_id).values_list(
+                'modified', flat=True,
+            ).first(),
+            RecordRequest.objects.filter(domain_id=domain_id).aggregate(
+                version=Max('modified'),
+            )['version'],
+            DeleteRequest.objects.filter(
+                content_type=ContentType.objects.get_for_model(Record),
+                target_id__in=Record.objects.filter(
+                    domain_id=domain_id,
+                ).values('pk'),
+            ).aggregate(version=Max('modified'))['version'],
+        )
+
+    def list(self, request, *args, **kwargs):
+        """
+        Records filtered by `domain` get ETag and honour `If-None-Match`.
+        """
+        domain_id = request.query_params.get('domain', '')
+        etag = None
+        if domain_id.isdigit():
+            etag = self.get_zone_etag(
+                int(domain_id), *self._get_related_versions(domain_id)
+            )
+        if self.is_not_modified(etag):
+            return self.not_modified_response(etag)
+        response = super().list(request, *args, **kwargs)
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+    def _get_ips(self):
+        if getattr(self, 'action', None) == 'by_ip':
+            return self.request.data.get('ips', [])
+        return self.request.query_params.getlist('ip')
+
+    @list_route(methods=['post'], url_path='by-ip')
+    def by_ip(self, request):
+        """
+        Records related to many IPs, as `?ip=` does, but with the addresses
+        sent in the body: `{"ips": ["192.168.0.1", ...]}`.
+        """
+        ips = None
+        if isinstance(request.data, dict):
+            ips = request.data.get('ips')
+        if not isinstance(ips, list) or not ips:
+            return Response(
+                {'ips': ['Expected a non-empty list of IP addresses.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return self.list(request)
+
+    @list_route(
+        methods=['get', 'post'], url_path='bulk-delete',
+        permission_classes=(IsAdminUser,),
+    )
+    def bulk_delete(self, request):
+        """
+        Delete all records matching the filters of the list (sent as query
+        parameters) at once, with PTRs depending on them. SOA records are
+        never matched.
+
+        GET previews the matched records. POST `{"count": <previewed
+        count>}` deletes them, unless the matched set has changed since.
+        """
+        # unknown parameters would be ignored, matching too many records
+        filter_names = set(self.filter_class.base_filters) | {
+            'ip', 'type', api_settings.SEARCH_PARAM,
+        }
+        params = set(request.query_params) - {'format'}
+        if not params or not params <= filter_names:
+            return Response(
+                {'error': 'Expected filters out of: {}'.format(
+                    ', '.join(sorted(filter_names)),
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset()).exclude(
+            type='SOA',
+        )
+        preview = preview_delete_records(queryset)
+        if request.method == 'GET':
+            return Response(preview)
+        count = None
+        if isinstance(request.data, dict):
+            count = request.data.get('count')
+        if count != preview['count']:
+            return Response(preview, status=status.HTTP_409_CONFLICT)
+        return Response(delete_records(queryset, owner=request.user))
+
     def get_queryset(self):
         queryset = super().get_queryset()
-        ips = self.request.query_params.getlist('ip')
+        ips = self._get_ips()
         if ips:
-            a_records = Record.objects.filter(
-                content__in=ips, type__in=RECORD_A_TYPES,
-            )
-            ptrs = [
-                reverse_pointer(r.content) for r in a_records
-            ]
-            queryset = queryset.filter(
-                (Q(content__in=[r.content for r in a_records]) & Q(type__in=RECORD_A_TYPES)) |  # noqa
-                (Q(content__in=[r.name for r in a_records]) & Q(type='CNAME')) |  # noqa
-                (Q(name__in=[r.name for r in a_records]) & Q(type='TXT')) |
-                (Q(name__in=ptrs) & Q(type='PTR'))
-            )
+            queryset = queryset.filter(ip_records_q(ips))
         types = self.request.query_params.getlist('type')
         if types:
             queryset = queryset.filter(type__in=types)
@@ -333,37 +897,54 @@ class DomainMetadataViewSet(FiltersMixin, ModelViewSet):
     filter_fields = ('domain',)
 
 
-class SuperMasterViewSet(FiltersMixin, ModelViewSet):
+class SuperMasterViewSet(CachedResponseMixin, FiltersMixin, ModelViewSet):
 
+    cached_models = (SuperMaster,)
     queryset = SuperMaster.objects.all()
     serializer_class = SuperMasterSerializer
     filter_fields = ('ip', 'nameserver')
 
 
-class DomainTemplateViewSet(FiltersMixin, ModelViewSet):
+class DomainTemplateViewSet(CachedResponseMixin, FiltersMixin, ModelViewSet):
 
+    cached_models = (DomainTemplate,)
     queryset = DomainTemplate.objects.all()
     serializer_class = DomainTemplateSerializer
     filter_fields = ('name',)
 
 
-class RecordTemplateViewSet(FiltersMixin, ModelViewSet):
+class RecordTemplateViewSet(CachedResponseMixin, FiltersMixin, ModelViewSet):
 
+    cached_models = (RecordTemplate,)
     queryset = RecordTemplate.objects.all()
     serializer_class = RecordTemplateSerializer
     filter_fields = ('domain_template', 'name', 'content')
 
 
-class TsigKeysViewSet(FiltersMixin, ModelViewSet):
+class TsigKeysViewSet(CachedResponseMixin, FiltersMixin, ModelViewSet):
 
+    cached_models = (TsigKey,)
     queryset = TsigKey.objects.all()
     serializer_class = TsigKeysTemplateSerializer
     filter_fields = ('name', 'secret')
 
 
 class IPRecordView(APIView):
-    """Dedicated view for add/update/delete"""
+    """
+    Dedicated view for add/update/delete
+
+    Accepts a list of actions as well - processed `BULK_CHUNK_SIZE` at a time,
+    every chunk in its own transaction, with SOA serials bumped once per zone.
+    Every action runs in a savepoint, so a failed one doesn't undo the others.
+    Returns a list of results in the order of sent actions.
+    """
     permission_classes = (IsAdminUser,)
+    # lookups done up front for the whole batch (see `_prefetch_batch`)
+    _batch_domains = None
+    _batch_services = None
+    _batch_records = None
+    # changes of `_batch_records` by the current action, undone if it fails
+    _batch_undo = None
 
     @staticmethod
     def _validate_data(data):
@@ -381,8 +962,72 @@ class IPRecordView(APIView):
             return False
         return True
 
+    def _prefetch_batch(self, items):
+        hostnames, names, service_uids = set(), set(), set()
+        for item in items:
+            new = item.get('new')
+            new = new if isinstance(new, dict) else {}
+            old = item.get('old')
+            old = old if isinstance(old, dict) else {}
+            hostnames.add(new.get('hostname'))
+            names.update((new.get('hostname'), old.get('hostname')))
+            names.add(item.get('hostname'))
+            service_uids.add(item.get('service_uid'))
+        hostnames.discard(None)
+        names.discard(None)
+        service_uids.discard(None)
+        self._batch_domains = find_domains_for_records(hostnames)
+        self._batch_services = {
+            service.uid: service
+            for service in Service.objects.filter(uid__in=service_uids)
+        } if service_uids else {}
+        self._batch_records = {}
+        self._batch_undo = []
+        names = list(names)
+        for i in range(0, len(names), BULK_CHUNK_SIZE):
+            for record in Record.objects.filter(
+                type__in=RECORD_A_TYPES, name__in=names[i:i + BULK_CHUNK_SIZE],
+            ).exclude(number=None):
+                self._track_record(record)
+
+    def _track_record(self, record):
+        if self._batch_records is not None:
+            key = (int(record.number), record.name)
+            self._batch_records.setdefault(key, []).append(record)
+            self._batch_undo.append((self._untrack_key, key, record.pk))
+
+    def _untrack_record(self, record):
+        if self._batch_records is not None:
+            key = (int(record.number), record.name)
+            self._batch_records[key].remove(record)
+            self._batch_undo.append((self._track_key, key, record.pk))
+
+    def _track_key(self, key, pk):
+        # tracked object may have been changed by the failed action
+        self._batch_records.setdefault(key, []).append(
+            Record.objects.get(pk=pk),
+        )
+
+    def _untrack_key(self, key, pk):
+        self._batch_records[key] = [
+            record for record in self._batch_records[key] if record.pk != pk
+        ]
+
+    def _find_domain(self, hostname):
+        if self._batch_domains is not None and hostname in self._batch_domains:
+            return self._batch_domains[hostname]
+        return find_domain_for_record(hostname)
+
+    def _find_service(self, uid):
+        if self._batch_services is not None:
+            return self._batch_services.get(uid)
+        return Service.get_service_by_uid(uid)
+
     def _get_record(self, ip, hostname):
         ip = int(ipaddress.ip_address(ip))
+        if self._batch_records is not None:
+            records = self._batch_records.get((ip, hostname), [])
+            return records[0] if len(records) == 1 else None
         try:
             record = Record.objects.get(
                 type__in=RECORD_A_TYPES, number=ip, name=hostname
@@ -393,24 +1038,26 @@ class IPRecordView(APIView):
 
     def _add_record(self, data):
         new = data['new']
-        domain = find_domain_for_record(new['hostname'])
+        domain = self._find_domain(new['hostname'])
         if not domain:
             return status.HTTP_400_BAD_REQUEST, 'Domain not found'
         service = None
         if data.get('service_uid'):
-            service = Service.get_service_by_uid(data['service_uid'])
+            service = self._find_service(data['service_uid'])
         try:
-            Record.objects.create(
-                type='A',
-                name=new['hostname'],
-                domain=domain,
-                number=int(ipaddress.ip_address(new['address'])),
-                content=new['address'],
-                service=service
-            )
+            with transaction.atomic():
+                record = Record.objects.create(
+                    type='A',
+                    name=new['hostname'],
+                    domain=domain,
+                    number=int(ipaddress.ip_address(new['address'])),
+                    content=new['address'],
+                    service=service
+                )
         except IntegrityError as e:
             return status.HTTP_409_CONFLICT, str(e)
         else:
+            self._track_record(record)
             return status.HTTP_200_OK, 'created'
 
     def _update_record(self, data):
@@ -424,25 +1071,40 @@ class IPRecordView(APIView):
             return self._delete_record(dict(
                 address=old['address'], hostname=old['hostname']
             ))
-        domain = find_domain_for_record(new['hostname'])
+        domain = self._find_domain(new['hostname'])
         if not domain:
             return status.HTTP_400_BAD_REQUEST, 'Domain not found'
         if record:
+            # the zone the record is moved from changes as well
+            schedule_serial_bump(record.domain_id)
+            self._untrack_record(record)
             record.name = new['hostname']
             record.domain = domain
             record.content = new['address']
             record.save()
+            self._track_record(record)
             # If change hostname update name records txt.
             log.info('Update TXT records from: {} hostname to: {}'.format(
                 old['hostname'], new['hostname']
             ))
-            Record.objects.filter(
+            txt_records = Record.objects.filter(
                 name=old['hostname'],
                 type='TXT'
-            ).update(
+            )
+            # `update` sends no signals, so serials are bumped and search
+            # index is updated explicitly
+            txt_ids = []
+            for pk, domain_id in txt_records.values_list('pk', 'domain_id'):
+                txt_ids.append(pk)
+                schedule_serial_bump(domain_id)
+            txt_records.update(
                 name=new['hostname'],
+                reversed_name=new['hostname'][::-1],
                 domain=record.domain
             )
+            txt_records = list(Record.objects.filter(pk__in=txt_ids))
+            index_records(txt_records)
+            log_changes(Change.UPDATE, txt_records)
 
         return status.HTTP_200_OK, 'updated'
 
@@ -451,28 +1113,101 @@ class IPRecordView(APIView):
         record = self._get_record(ip, hostname)
         if record:
             log.warning('Delete record: {}'.format(record))
+            self._untrack_record(record)
             record.delete()
             log.warning('Delete TXT records for {} hostname'.format(hostname))
             Record.objects.filter(name=hostname, type='TXT').delete()
             return status.HTTP_200_OK, 'deleted'
         return status.HTTP_200_OK, 'noop'
 
-    def post(self, request):
-        data = request.data
-        action = data.get('action', None)
+    def _run_action(self, data):
         action_mapper = {
             'add': self._add_record,
             'update': self._update_record,
             'delete': self._delete_record,
         }
-        if not self._validate_data(data) or action not in action_mapper:
-            return Response(
-                data={'status': 'Invalid request data'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        action_func = action_mapper[action]
-        status_code, status_text = action_func(data=data)
+        if (
+            not self._validate_data(data) or
+            data.get('action') not in action_mapper
+        ):
+            return status.HTTP_400_BAD_REQUEST, 'Invalid request data'
+        return action_mapper[data['action']](data=data)
+
+    def _run_batch_action(self, data):
+        if not isinstance(data, dict):
+            return status.HTTP_400_BAD_REQUEST, 'Invalid request data'
+        self._batch_undo = []
+        try:
+            with transaction.atomic():
+                return self._run_action(data)
+        except (KeyError, TypeError):
+            result = status.HTTP_400_BAD_REQUEST, 'Invalid request data'
+        except IntegrityError as e:
+            result = status.HTTP_409_CONFLICT, str(e)
+        except ValidationError as e:
+            result = status.HTTP_400_BAD_REQUEST, '; '.join(e.messages)
+        except ValueError as e:
+            result = status.HTTP_400_BAD_REQUEST, str(e)
+        # the savepoint is rolled back, so are lookups of the batch
+        for undo, key, pk in reversed(self._batch_undo):
+            undo(key, pk)
+        return result
+
+    def _post_batch(self, actions):
+        self._prefetch_batch([
+            data for data in actions if isinstance(data, dict)
+        ])
+        results = []
+        for i in range(0, len(actions), BULK_CHUNK_SIZE):
+            with coalesce_serial_bumps():
+                for data in actions[i:i + BULK_CHUNK_SIZE]:
+                    status_code, status_text = self._run_batch_action(data)
+                    results.append({
+                        'status_code': status_code, 'status': status_text,
+                    })
+        return Response(data=results, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        data = request.data
+        if isinstance(data, list):
+            return self._post_batch(data)
+        with coalesce_serial_bumps():
+            status_code, status_text = self._run_action(data)
         return Response(
             data={'status': status_text},
             status=status_code
         )
+
+
+class HostsView(APIView):
+    """
+    Records related to many hosts (hostnames or IP addresses) at once, as
+    `?host=www.example.com&host=192.168.0.1` or `{"hosts": [...]}` in POST
+    body: A/AAAA records, their PTRs, TXT records and CNAMEs pointing to
+    them, grouped by host and record type.
+    """
+
+    def get(self, request):
+        return self._get_hosts_response(request.query_params.getlist('host'))
+
+    def post(self, request):
+        hosts = None
+        if isinstance(request.data, dict):
+            hosts = request.data.get('hosts')
+        return self._get_hosts_response(hosts)
+
+    def _get_hosts_response(self, hosts):
+        if (
+            not isinstance(hosts, list) or not hosts or
+            not all(isinstance(host, str) and host for host in hosts)
+        ):
+            return Response(
+                {'hosts': [
+                    'Expected a non-empty list of hostnames or IP addresses.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response([
+            dict(records, host=host)
+            for host, records in get_host_records(hosts).items()
+        ])
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class Dnsaas(AppConfig):
+
+    name = 'dnsaas'
+    verbose_name = 'DNSaaS'
+
+    def ready(self):
+        from dnsaas.api.v2.cache import connect_version_receivers
+        connect_version_receivers()
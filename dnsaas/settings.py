@@ -244,6 +244,27 @@ SEC_ACCEPTANCE_FOR_RECORD_TYPE = {'A', 'AAAA'}
 # see: DeleteRequest.is_seo_acceptance_required)
 SEO_ACCEPTANCE_FOR_RECORD_TYPE = {'A', 'AAAA', 'CNAME'}
 REQUIRED_SERVICE_FIELD = os.environ.get('REQUIRED_SERVICE_FIELD', True)
+# how long (in seconds) DNSSEC mode of a domain is cached (see
+# powerdns.dnssec.get_dnssec_mode)
+DNSSEC_MODE_CACHE_TIMEOUT = 300
+
+# Domains with more A/AAAA records have their PTRs reconciled (after
+# `auto_ptr` change) by a background job (see `run_jobs` command)
+PTR_RECONCILE_INLINE_LIMIT = 1000
+
+# Domains with more records are cloned (`/api/v2/domains/<id>/clone/`) by
+# a background job
+ZONE_CLONE_INLINE_LIMIT = 1000
+
+# how long (in seconds) responses of rarely changing endpoints (templates,
+# services, supermasters, TSIG keys) are cached (see dnsaas.api.v2.cache)
+API_RESPONSE_CACHE_TIMEOUT = 3600
+
+# HTTP endpoints changes of domains and records are delivered to by the
+# `dispatch_events` command, eg.
+# [{'name': 'cmdb', 'url': 'https://cmdb.local/dns/', 'concurrency': 2}]
+# (see powerdns.events.Webhook for all options)
+EVENT_WEBHOOKS = []
 
 if not TESTING:
     try:
@@ -0,0 +1,574 @@
+"""Set-based operations on records"""
+
+import re
+import time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+
+from .models import (
+    IP_TYPES_FOR_PTR,
+    Change,
+    DeleteRequest,
+    Domain,
+    Job,
+    Record,
+    RecordSearchToken,
+    RequestStates,
+    coalesce_serial_bumps,
+    get_default_reverse_domain,
+    index_records,
+    log_changes,
+    schedule_serial_bump,
+)
+from .utils import (
+    AutoPtrOptions,
+    chunks,
+    find_domains_for_records,
+    find_record_conflicts,
+    flat_dict_diff,
+    reverse_pointer,
+    to_reverse,
+    validate_domain_name,
+)
+
+
+BULK_CHUNK_SIZE = 500
+
+
+def find_batch_conflicts(candidates, positions=None):
+    """
+    Check (name, type, content) `candidates` against existing records and
+    against each other with a single query.
+
+    Returns dict mapping index of every conflicting candidate to a list of
+    error messages. Other candidates are referred to in messages by their
+    `positions` (eg. in the request they were sent in), by default by their
+    indexes.
+    """
+    if positions is None:
+        positions = range(len(candidates))
+    return {
+        index: [
+            conflict.message if conflict.item is None
+            else conflict._replace(item=positions[conflict.item]).message
+            for conflict in conflicts
+        ]
+        for index, conflicts in find_record_conflicts(candidates).items()
+    }
+
+
+def _assign_pks(records):
+    """Set primary keys of `records` inserted by `bulk_create`"""
+    # `bulk_create` doesn't return primary keys (on MySQL), but every record
+    # is unique by its name, type and content.
+    by_key = {(r.name, r.type, r.content): r for r in records}
+    for names_chunk in chunks({r.name for r in records}, BULK_CHUNK_SIZE):
+        for pk, name, type_, content in Record.objects.filter(
+            name__in=names_chunk,
+        ).values_list('id', 'name', 'type', 'content'):
+            record = by_key.get((name, type_, content))
+            if record is not None:
+                record.pk = pk
+
+
+def _delete_stale_ptrs(records):
+    """Delete PTRs pointing to `records` names, as `Record.create_ptr` does"""
+    pairs = {(ptr.name, ptr.content) for ptr in records}
+    stale_ids = [
+        pk for pk, name, content in Record.objects.filter(
+            type='PTR',
+            name__in={name for name, _ in pairs},
+            content__in={content for _, content in pairs},
+        ).values_list('id', 'name', 'content')
+        if (name, content) in pairs
+    ]
+    if stale_ids:
+        Record.objects.filter(pk__in=stale_ids).delete()
+
+
+def _desired_ptrs(records):
+    """
+    Return unsaved PTRs which should exist for saved A/AAAA `records`,
+    respecting `auto_ptr` of records' domains the same way the `create_ptr`
+    signal does. Missing reverse domains are created when needed.
+    """
+    records = [r for r in records if r.type in IP_TYPES_FOR_PTR]
+    if not records:
+        return []
+    reversed_ips = {r.pk: to_reverse(r.content) for r in records}
+    reverse_domains = find_domains_for_records(
+        base_domain_name for _, base_domain_name in reversed_ips.values()
+    )
+    ptrs = []
+    for record in records:
+        if record.domain.auto_ptr == AutoPtrOptions.NEVER:
+            continue
+        number, base_domain_name = reversed_ips[record.pk]
+        domain = reverse_domains.get(base_domain_name)
+        if not domain:
+            if record.domain.auto_ptr != AutoPtrOptions.ALWAYS:
+                continue
+            domain, created = Domain.objects.get_or_create(
+                name=base_domain_name,
+                defaults={
+                    'template': (
+                        record.domain.reverse_template or
+                        get_default_reverse_domain()
+                    ),
+                    'type': record.domain.type
+                }
+            )
+            reverse_domains[base_domain_name] = domain
+        ptrs.append(Record(
+            type='PTR',
+            domain=domain,
+            service_id=record.service_id,
+            name='.'.join([number, base_domain_name]),
+            content=record.name,
+            depends_on=record,
+            owner_id=record.owner_id,
+            ttl=record.ttl,
+            disabled=record.disabled,
+        ))
+    return ptrs
+
+
+def _insert_ptrs(ptrs):
+    change_date = int(time.time())
+    for ptr in ptrs:
+        ptr.fill_computed_fields(change_date)
+    Record.objects.bulk_create(ptrs, batch_size=BULK_CHUNK_SIZE)
+    _assign_pks(ptrs)
+    index_records(ptrs)
+    log_changes(Change.CREATE, ptrs)
+
+
+def bulk_create_ptrs(records):
+    """
+    Create PTRs for saved A/AAAA `records` with a single `bulk_create`.
+
+    Respects `auto_ptr` of records' domains the same way the `create_ptr`
+    signal does. Returns list of created PTRs.
+    """
+    ptrs = _desired_ptrs(records)
+    _delete_stale_ptrs(ptrs)
+    _insert_ptrs(ptrs)
+    return ptrs
+
+
+@coalesce_serial_bumps()
+def bulk_create_records(records):
+    """
+    Insert unsaved, already validated `records` in batches.
+
+    `Record.save` and its signals are bypassed, so computed fields are filled
+    here, PTRs are created in one batch and SOA of every touched domain is
+    bumped once. Returns `records` with primary keys set.
+    """
+    if not records:
+        return records
+    change_date = int(time.time())
+    for record in records:
+        record.fill_computed_fields(change_date)
+    Record.objects.bulk_create(records, batch_size=BULK_CHUNK_SIZE)
+    _assign_pks(records)
+    index_records(records)
+    log_changes(Change.CREATE, records)
+    ptrs = bulk_create_ptrs(records)
+    for domain_id in {r.domain_id for r in records + ptrs}:
+        schedule_serial_bump(domain_id)
+    return records
+
+
+def _raw_delete_records(queryset, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Delete records from `queryset` (with their delete requests and search
+    tokens) in chunks, with plain DELETE statements - without signals or
+    cascades. Deletes are added to the change log.
+
+    Returns number of deleted records.
+    """
+    record_type = ContentType.objects.get_for_model(Record)
+    deleted = 0
+    while True:
+        rows = list(queryset.values_list('pk', 'domain_id')[:chunk_size])
+        if not rows:
+            return deleted
+        pks = [pk for pk, _ in rows]
+        DeleteRequest.objects.filter(
+            content_type=record_type, target_id__in=pks,
+        )._raw_delete(DeleteRequest.objects.db)
+        RecordSearchToken.objects.filter(
+            record_id__in=pks,
+        )._raw_delete(RecordSearchToken.objects.db)
+        Record.objects.filter(pk__in=pks)._raw_delete(Record.objects.db)
+        log_changes(Change.DELETE, [
+            Record(pk=pk, domain_id=domain_id) for pk, domain_id in rows
+        ])
+        deleted += len(pks)
+
+
+def _delete_history(record):
+    result = flat_dict_diff(
+        record.as_history_dump(), record.as_empty_history(),
+    )
+    result['_request_type'] = 'delete'
+    return result
+
+
+def preview_delete_records(queryset, sample_size=20):
+    """
+    Return summary of what `delete_records` would delete: number of records
+    from `queryset` and of PTRs depending on them, numbers of records per
+    domain and a sample of the records.
+    """
+    queryset = queryset.order_by()
+    ids = queryset.values('pk')
+    return {
+        'count': queryset.count(),
+        'dependent_records': Record.objects.filter(
+            depends_on__in=ids,
+        ).exclude(pk__in=ids).count(),
+        'domains': {
+            row['domain__name']: row['count']
+            for row in queryset.values('domain__name').annotate(
+                count=Count('pk'),
+            )
+        },
+        'sample': list(queryset.order_by('pk').values(
+            'id', 'name', 'type', 'content',
+        )[:sample_size]),
+    }
+
+
+@coalesce_serial_bumps()
+def delete_records(queryset, owner=None, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Delete records from `queryset` (with PTRs depending on them) much faster
+    than one by one.
+
+    Records are removed in chunks with set-based statements, bypassing
+    signals. Every deleted record gets an accepted DeleteRequest (created by
+    `owner`) with its history, written in bulk, and every touched zone gets
+    a single serial bump. Returns summary of the delete.
+    """
+    record_type = ContentType.objects.get_for_model(Record)
+    summary = {'records': 0, 'dependent_records': 0, 'domains': 0}
+    domain_ids = set()
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).select_related(
+            'owner',
+        ).order_by('pk')[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        pks = {record.pk for record in chunk}
+        dependent = list(Record.objects.filter(
+            depends_on_id__in=pks,
+        ).exclude(pk__in=pks).select_related('owner'))
+        deleted = chunk + dependent
+        # dependent records go first, not to break their foreign keys
+        _raw_delete_records(Record.objects.filter(
+            depends_on_id__in=pks,
+        ), chunk_size)
+        _raw_delete_records(Record.objects.filter(pk__in=pks), chunk_size)
+        DeleteRequest.objects.bulk_create([
+            DeleteRequest(
+                content_type=record_type,
+                target_id=record.pk,
+                owner=owner,
+                state=RequestStates.ACCEPTED,
+                last_change_json=_delete_history(record),
+            )
+            for record in deleted
+        ], batch_size=chunk_size)
+        for record in deleted:
+            schedule_serial_bump(record.domain_id)
+            domain_ids.add(record.domain_id)
+        summary['records'] += len(chunk)
+        summary['dependent_records'] += len(dependent)
+    summary['domains'] = len(domain_ids)
+    return summary
+
+
+@coalesce_serial_bumps()
+def purge_domain(domain, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Delete `domain` with all its records much faster than `domain.delete()`.
+
+    Records are removed in chunks, bypassing signals (SOA of the purged zone
+    needs no bumps). PTRs in other zones that depend on the purged records
+    are removed as well and their zones get a single serial bump. The purge
+    is recorded as one accepted DeleteRequest of the domain.
+    Returns summary of the purge.
+    """
+    dependent = Record.objects.filter(
+        depends_on__domain=domain,
+    ).exclude(domain=domain)
+    for domain_id in set(dependent.values_list('domain_id', flat=True)):
+        schedule_serial_bump(domain_id)
+    dependent_count = _raw_delete_records(dependent, chunk_size)
+    # dependencies inside the zone would break chunked deletes
+    Record.objects.filter(
+        domain=domain, depends_on__isnull=False,
+    ).update(depends_on=None)
+    record_count = _raw_delete_records(
+        Record.objects.filter(domain=domain), chunk_size,
+    )
+
+    summary = {
+        'name': domain.name,
+        'records': record_count,
+        'dependent_records': dependent_count,
+    }
+    last_change_json = flat_dict_diff(
+        summary, {key: '' for key in summary}
+    )
+    last_change_json['_request_type'] = 'purge'
+    DeleteRequest(
+        content_type=ContentType.objects.get_for_model(Domain),
+        target_id=domain.pk,
+        state=RequestStates.ACCEPTED,
+        last_change_json=last_change_json,
+    ).save()
+    domain.delete()
+    return summary
+
+
+def _reconcile_ptrs_chunk(records):
+    """
+    Make PTRs of saved A/AAAA `records` match `auto_ptr` of their domains:
+    create missing ones and delete stale ones. Returns (created, deleted).
+    """
+    record_ids = {r.pk for r in records}
+    pairs = {(reverse_pointer(r.content), r.name) for r in records}
+    missing = {
+        (ptr.domain_id, ptr.name, ptr.content, ptr.depends_on_id): ptr
+        for ptr in _desired_ptrs(records)
+    }
+    stale_ids = []
+    for pk, domain_id, name, content, depends_on_id in Record.objects.filter(
+        Q(depends_on_id__in=record_ids) | Q(name__in={n for n, _ in pairs}),
+        type='PTR',
+    ).values_list('id', 'domain_id', 'name', 'content', 'depends_on_id'):
+        key = (domain_id, name, content, depends_on_id)
+        if key in missing:
+            del missing[key]  # already in place
+        elif depends_on_id in record_ids or (name, content) in pairs:
+            stale_ids.append(pk)
+            schedule_serial_bump(domain_id)
+    _raw_delete_records(Record.objects.filter(pk__in=stale_ids))
+    _insert_ptrs(list(missing.values()))
+    for ptr in missing.values():
+        schedule_serial_bump(ptr.domain_id)
+    return len(missing), len(stale_ids)
+
+
+def reconcile_ptrs(domain, progress=None, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Bring PTRs of all A/AAAA records of `domain` in line with its
+    `auto_ptr` (eg. after it has changed), `chunk_size` records at a time.
+
+    Every chunk is done in its own transaction (unless called inside one)
+    and reported by `progress(done, total)` callback.
+    Returns numbers of created and deleted PTRs.
+    """
+    records = Record.objects.filter(domain=domain, type__in=IP_TYPES_FOR_PTR)
+    total = records.count()
+    summary = {'created': 0, 'deleted': 0}
+    done = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            records.filter(pk__gt=last_pk).order_by('pk')[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        for record in chunk:
+            record.domain = domain
+        with coalesce_serial_bumps():
+            created, deleted = _reconcile_ptrs_chunk(chunk)
+        summary['created'] += created
+        summary['deleted'] += deleted
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+    return summary
+
+
+def reconcile_domain_ptrs(domain_id, progress=None):
+    """`reconcile_ptrs` as a Job handler"""
+    return reconcile_ptrs(Domain.objects.get(pk=domain_id), progress)
+
+
+# types of records with (in-zone) names in their content
+NAME_CONTENT_TYPES = ('CNAME', 'DNAME', 'MX', 'NS', 'PTR', 'SOA', 'SRV')
+
+
+def _rewrite_name(name, source, target, rewrite=None):
+    """
+    Return `name` from zone `source` moved to zone `target` and changed by
+    `rewrite` (pattern, replacement) pair. Names out of the zone are kept.
+    """
+    if name == source:
+        name = target
+    elif name.endswith('.' + source):
+        name = name[:-len(source)] + target
+    else:
+        return name
+    if rewrite:
+        name = re.sub(rewrite[0], rewrite[1], name)
+        try:
+            validate_domain_name(name)
+        except ValidationError:
+            raise ValidationError('Invalid name after rewrite: {}'.format(
+                name,
+            ))
+        if name != target and not name.endswith('.' + target):
+            raise ValidationError(
+                'Name {} is rewritten out of zone {}'.format(name, target)
+            )
+    return name
+
+
+def _rewrite_content(record, source, target, rewrite=None):
+    if record.type not in NAME_CONTENT_TYPES or not record.content:
+        return record.content
+    tokens = []
+    for token in record.content.split(' '):
+        name = token.rstrip('.')
+        tokens.append(
+            _rewrite_name(name, source, target, rewrite) +
+            token[len(name):]
+        )
+    return ' '.join(tokens)
+
+
+def check_clone_names(source, target_name, rewrite=None):
+    """
+    Raise ValidationError unless names of records of domain `source` moved
+    to zone `target_name` and changed by `rewrite` are valid names of that
+    zone and two different names aren't changed to the same one.
+    """
+    names = Record.objects.filter(
+        domain=source, template__isnull=True,
+    ).values_list('name', flat=True).distinct()
+    original_names = {}
+    for name in names.iterator():
+        new_name = _rewrite_name(name, source.name, target_name, rewrite)
+        if original_names.setdefault(new_name, name) != name:
+            raise ValidationError(
+                'Names {} and {} are both rewritten to {}'.format(
+                    original_names[new_name], name, new_name,
+                )
+            )
+
+
+def clone_records(
+    source, target, rewrite=None, progress=None, chunk_size=BULK_CHUNK_SIZE,
+):
+    """
+    Copy records of domain `source` to domain `target`, `chunk_size` at a
+    time with `bulk_create_records`. Names (and in-zone names in contents)
+    are moved to the target zone and changed by `rewrite` - (pattern,
+    replacement) pair for `re.sub`.
+
+    Records created from the domain template are skipped - the target gets
+    its own ones. PTRs are created in bulk as `auto_ptr` of the target says.
+    Every chunk is done in its own transaction (unless called inside one)
+    and reported by `progress(done, total)` callback.
+    Returns `{"records": <number of copied records>}`.
+    """
+    records = Record.objects.filter(domain=source, template__isnull=True)
+    total = records.count()
+    done = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            records.filter(pk__gt=last_pk).order_by('pk')[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        bulk_create_records([
+            Record(
+                domain=target,
+                name=_rewrite_name(
+                    record.name, source.name, target.name, rewrite,
+                ),
+                type=record.type,
+                content=_rewrite_content(
+                    record, source.name, target.name, rewrite,
+                ),
+                ttl=record.ttl,
+                prio=record.prio,
+                auth=record.auth,
+                disabled=record.disabled,
+                remarks=record.remarks,
+                owner_id=record.owner_id,
+                service_id=record.service_id,
+            )
+            for record in chunk
+        ])
+        done += len(chunk)
+        if progress:
+            progress(done, total)
+    return {'records': done}
+
+
+def clone_domain_records(source_id, target_id, rewrite=None, progress=None):
+    """`clone_records` as a Job handler"""
+    return clone_records(
+        Domain.objects.get(pk=source_id), Domain.objects.get(pk=target_id),
+        rewrite, progress,
+    )
+
+
+def clone_domain(
+    source, name, rewrite=None, owner=None, auto_ptr=AutoPtrOptions.NEVER,
+):
+    """
+    Create domain `name` with settings of domain `source` (but `owner` and
+    `auto_ptr`) and copy its records with `clone_records` - right away for
+    small zones (in the same transaction), in a background job otherwise.
+    Names are checked by `check_clone_names` first.
+
+    Returns the new domain and the job (or None).
+    """
+    check_clone_names(source, name, rewrite)
+    with coalesce_serial_bumps():
+        domain, job = _clone_domain(source, name, rewrite, owner, auto_ptr)
+    return domain, job
+
+
+def _clone_domain(source, name, rewrite, owner, auto_ptr):
+    domain = Domain.objects.create(
+        name=name,
+        master=source.master,
+        type=source.type,
+        account=source.account,
+        remarks=source.remarks,
+        template=source.template,
+        reverse_template=source.reverse_template,
+        auto_ptr=auto_ptr,
+        unrestricted=source.unrestricted,
+        require_sec_acceptance=source.require_sec_acceptance,
+        require_seo_acceptance=source.require_seo_acceptance,
+        owner=owner or source.owner,
+        service=source.service,
+    )
+    records_count = Record.objects.filter(
+        domain=source, template__isnull=True,
+    ).count()
+    if records_count > getattr(settings, 'ZONE_CLONE_INLINE_LIMIT', 1000):
+        return domain, Job.enqueue(
+            'powerdns.bulk.clone_domain_records',
+            source_id=source.pk, target_id=domain.pk, rewrite=rewrite,
+        )
+    clone_records(source, domain, rewrite)
+    return domain, None
@@ -0,0 +1,203 @@
+"""DNSSEC mode of domains and ordername generation"""
+
+import base64
+import binascii
+import functools
+import hashlib
+from collections import namedtuple
+from enum import Enum
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils import bulk_update_column
+
+
+# http://tools.ietf.org/html/rfc4648#section-7
+B32HEX_TRANS = bytes.maketrans(
+    b'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567',
+    b'0123456789ABCDEFGHIJKLMNOPQRSTUV',
+)
+
+
+class DNSSECMode(Enum):
+    UNSIGNED = 'unsigned'
+    NSEC = 'NSEC'
+    NSEC3 = 'NSEC3'
+    NSEC3_NARROW = 'NSEC3 narrow'
+
+
+NSEC3Params = namedtuple(
+    'NSEC3Params', ['algorithm', 'flags', 'iterations', 'salt']
+)
+
+
+def parse_nsec3param(content):
+    """
+    Parse content of NSEC3PARAM metadata, eg. '1 0 10 ab12'.
+
+    Returns NSEC3Params or None when content is malformed.
+    """
+    try:
+        algorithm, flags, iterations, salt = content.split()
+        return NSEC3Params(int(algorithm), int(flags), int(iterations), salt)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _cache_key(domain_id):
+    return 'powerdns:dnssec-mode:{}'.format(domain_id)
+
+
+def _load_dnssec_mode(domain_id):
+    from .models import CryptoKey, DomainMetadata
+    if not CryptoKey.objects.filter(domain_id=domain_id).exists():
+        return DNSSECMode.UNSIGNED, None
+    metadata = dict(DomainMetadata.objects.filter(
+        domain_id=domain_id, kind__in=('NSEC3PARAM', 'NSEC3NARROW'),
+    ).values_list('kind', 'content'))
+    if 'NSEC3PARAM' not in metadata:
+        return DNSSECMode.NSEC, None
+    if 'NSEC3NARROW' in metadata:
+        return DNSSECMode.NSEC3_NARROW, None
+    return DNSSECMode.NSEC3, parse_nsec3param(metadata['NSEC3PARAM'])
+
+
+def get_dnssec_mode(domain_id):
+    """
+    Return (DNSSECMode, NSEC3Params or None) for domain with `domain_id`.
+
+    The result is cached until keys or metadata of the domain change (see
+    signal receivers in `powerdns.models`) or `DNSSEC_MODE_CACHE_TIMEOUT`
+    passes - the latter covers changes made outside of Django (eg. by
+    pdnsutil).
+    """
+    key = _cache_key(domain_id)
+    mode = cache.get(key)
+    if mode is None:
+        mode = _load_dnssec_mode(domain_id)
+        cache.set(
+            key, mode,
+            getattr(settings, 'DNSSEC_MODE_CACHE_TIMEOUT', 300),
+        )
+    return mode
+
+
+def invalidate_dnssec_mode(domain_id):
+    if domain_id is not None:
+        cache.delete(_cache_key(domain_id))
+
+
+def to_wire_format(name):
+    """
+    Return `name` in the canonical DNS wire format (RFC 4034, section 6.2),
+    eg. b'\\x03www\\x07example\\x03com\\x00' for 'www.example.com'.
+    """
+    labels = [
+        label.encode('ascii')
+        for label in name.lower().rstrip('.').split('.') if label
+    ]
+    return b''.join(bytes([len(label)]) + label for label in labels) + b'\0'
+
+
+class NSEC3Hasher(object):
+    """
+    Computes NSEC3 hashes (RFC 5155, section 5) of names with parameters of
+    a single zone. Salt is decoded once, so reuse the instance (see
+    `get_nsec3_hasher`).
+    """
+
+    def __init__(self, params):
+        if params.algorithm != 1:
+            raise ValueError('Incompatible hash algorithm.')
+        if params.flags not in (0, 1):
+            raise ValueError('Incompatible flags.')
+        if params.iterations < 0:
+            raise ValueError('Incompatible iterations.')
+        self.iterations = params.iterations
+        self.salt = (
+            b'' if params.salt == '-' else binascii.unhexlify(params.salt)
+        )
+
+    def hash_name(self, name):
+        """Return lowercase base32hex NSEC3 hash of `name`"""
+        sha1, salt = hashlib.sha1, self.salt
+        digest = sha1(to_wire_format(name) + salt).digest()
+        for _ in range(self.iterations):
+            digest = sha1(digest + salt).digest()
+        return base64.b32encode(digest).translate(B32HEX_TRANS).decode(
+            'ascii'
+        ).lower()
+
+    def hash_names(self, names):
+        """Return dict mapping every distinct name from `names` to its hash"""
+        return {name: self.hash_name(name) for name in set(names)}
+
+
+@functools.lru_cache(maxsize=128)
+def get_nsec3_hasher(params):
+    """Return shared NSEC3Hasher for `params`; ValueError if invalid"""
+    return NSEC3Hasher(params)
+
+
+def nsec_ordername(name, domain_name):
+    """
+    In 'NSEC' mode ordername is the relative part of a domain name, in
+    reverse order, with dots replaced by spaces.
+    """
+    domain_words = domain_name.split('.')
+    host_words = name.split('.')
+    relative_word_count = len(host_words) - len(domain_words)
+    relative_words = host_words[0:relative_word_count]
+    return ' '.join(relative_words[::-1])
+
+
+def generate_ordernames(domain, names):
+    """Return dict mapping each of `names` to its ordername in `domain`"""
+    mode, nsec3param = get_dnssec_mode(domain.id)
+    names = set(names)
+    if mode == DNSSECMode.NSEC3:
+        try:
+            return get_nsec3_hasher(nsec3param).hash_names(names)
+        except (ValueError, TypeError, AttributeError, binascii.Error):
+            ordername = None  # incompatible input
+    elif mode == DNSSECMode.NSEC:
+        return {name: nsec_ordername(name, domain.name) for name in names}
+    elif mode == DNSSECMode.NSEC3_NARROW:
+        ordername = ''
+    else:
+        ordername = None
+    return {name: ordername for name in names}
+
+
+def rebuild_ordernames(domain, chunk_size=1000):
+    """
+    Recompute ordernames of all records of `domain`, eg. after its
+    NSEC3PARAM has changed.
+
+    Records are read in primary key order, `chunk_size` at a time, and only
+    changed ordernames are written back - with a single UPDATE per chunk.
+    Returns number of updated records.
+    """
+    from .models import Record
+    invalidate_dnssec_mode(domain.id)
+    updated = 0
+    last_pk = 0
+    while True:
+        chunk = list(Record.objects.filter(
+            domain=domain, pk__gt=last_pk,
+        ).order_by('pk').values_list('pk', 'name', 'ordername')[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        ordernames = generate_ordernames(
+            domain, (name for _, name, _ in chunk)
+        )
+        changed = {
+            pk: ordernames[name]
+            for pk, name, ordername in chunk
+            if ordernames[name] != ordername
+        }
+        bulk_update_column(Record, 'ordername', changed, chunk_size)
+        updated += len(changed)
+    return updated
@@ -0,0 +1,146 @@
+"""Delivery of the change log to HTTP endpoints (webhooks)"""
+
+import json
+import logging
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Change, ChangeCursor, sequence_changes
+
+
+log = logging.getLogger(__name__)
+
+EVENT_BATCH_SIZE = 100
+
+
+def get_event(change):
+    """Return JSON-serializable event of `change`"""
+    return {
+        'seq': change.seq,
+        'model': change.model,
+        'object_id': change.object_id,
+        'domain_id': change.domain_id,
+        'action': change.action,
+        'data': None if change.action == Change.DELETE else change.data,
+        'created': change.created,
+    }
+
+
+class Webhook(object):
+    """
+    HTTP endpoint the change log is POSTed to, as JSON batches of events
+    (`{"events": [...]}`) in order of their sequence numbers. Up to
+    `concurrency` batches are sent at once. After a failure the endpoint is
+    retried with exponential backoff (`retry_delay` doubled up to
+    `max_retry_delay` seconds).
+
+    Delivery is at least once - a batch may be sent again, eg. when one
+    sent before it has failed.
+    """
+
+    def __init__(
+        self, name, url, headers=None, timeout=10, concurrency=1,
+        batch_size=EVENT_BATCH_SIZE, retry_delay=1, max_retry_delay=300,
+    ):
+        self.name = name
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.failures = 0
+        self.retry_at = 0
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def from_settings(cls):
+        return [
+            cls(**config) for config in getattr(settings, 'EVENT_WEBHOOKS', [])
+        ]
+
+    def is_due(self, now):
+        return now >= self.retry_at
+
+    def send(self, changes):
+        body = json.dumps(
+            {'events': [get_event(change) for change in changes]},
+            cls=DjangoJSONEncoder,
+        ).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        headers.update(self.headers)
+        request = urllib.request.Request(self.url, body, headers)
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def try_send(self, changes):
+        try:
+            self.send(changes)
+        except Exception as e:
+            log.warning('Delivery of changes {}-{} to {} failed: {}'.format(
+                changes[0].seq, changes[-1].seq, self, e,
+            ))
+            return False
+        return True
+
+    def report(self, succeeded, now):
+        if succeeded:
+            self.failures = 0
+            self.retry_at = 0
+        else:
+            self.retry_at = now + min(
+                self.retry_delay * 2 ** self.failures, self.max_retry_delay,
+            )
+            self.failures += 1
+
+
+def dispatch(webhook, now=None):
+    """
+    Send the next batches of changes to `webhook` and move its cursor past
+    the delivered ones. Returns number of delivered changes.
+
+    Changes are sent in order of their sequence numbers, given in order of
+    commits (see `sequence_changes`), so ones committed late by concurrent
+    transactions aren't skipped.
+    """
+    now = time.time() if now is None else now
+    sequence_changes()
+    cursor = ChangeCursor.get_for(webhook.name)
+    changes = list(Change.objects.filter(
+        seq__gt=cursor.seq,
+    ).order_by('seq')[:webhook.batch_size * webhook.concurrency])
+    if not changes:
+        return 0
+    batches = [
+        changes[i:i + webhook.batch_size]
+        for i in range(0, len(changes), webhook.batch_size)
+    ]
+    with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+        results = list(executor.map(webhook.try_send, batches))
+    delivered = []
+    for batch, succeeded in zip(batches, results):
+        if not succeeded:
+            break
+        delivered.extend(batch)
+    if delivered:
+        cursor.advance(delivered[-1].seq)
+    webhook.report(all(results), now)
+    return len(delivered)
+
+
+def dispatch_events(webhooks, now=None):
+    """
+    Dispatch changes to all `webhooks` not waiting for a retry. Returns
+    number of delivered changes.
+    """
+    now = time.time() if now is None else now
+    return sum(
+        dispatch(webhook, now) for webhook in webhooks if webhook.is_due(now)
+    )
@@ -0,0 +1,91 @@
+"""Streaming export of whole zones"""
+
+import json
+
+from .models import Record
+from .utils import DOMAIN_NAME_RECORDS
+
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_FIELDS = ('id', 'name', 'type', 'content', 'ttl', 'prio', 'disabled')
+PRIO_RECORDS = ('MX', 'SRV')
+TEXT_RECORDS = ('TXT', 'SPF')
+
+
+def iter_zone_records(domain, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield records of `domain` as dicts of `EXPORT_FIELDS`, SOA first.
+
+    Records are read in primary key order, `chunk_size` at a time, so memory
+    use doesn't depend on the size of the zone.
+    """
+    records = Record.objects.filter(domain=domain)
+    yield from records.filter(type='SOA').values(*EXPORT_FIELDS)
+    records = records.exclude(type='SOA').order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(
+            records.filter(pk__gt=last_pk).values(*EXPORT_FIELDS)[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1]['id']
+        yield from chunk
+
+
+def _qualify(name):
+    return name if name.endswith('.') else name + '.'
+
+
+def _quote_text(content):
+    """
+    Return `content` of a TXT record as a quoted character string, unless
+    it's quoted already (as PowerDNS stores it).
+    """
+    content = content or ''
+    if len(content) > 1 and content.startswith('"') and content.endswith('"'):
+        return content
+    return '"{}"'.format(content.replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def _qualify_content(type_, content):
+    """
+    Make domain names in `content` absolute and quote texts, as a zone file
+    needs
+    """
+    if type_ in TEXT_RECORDS:
+        return _quote_text(content)
+    words = (content or '').split()
+    if not words:
+        return content or ''
+    if type_ == 'SOA':
+        words[:2] = [_qualify(word) for word in words[:2]]
+    elif type_ in DOMAIN_NAME_RECORDS or type_ == 'SRV':
+        words[-1] = _qualify(words[-1])
+    return ' '.join(words)
+
+
+def format_bind_line(record):
+    """Return `record` dict as a line of BIND zone file"""
+    fields = [_qualify(record['name'])]
+    if record['ttl'] is not None:
+        fields.append(str(record['ttl']))
+    fields.extend(['IN', record['type']])
+    if record['type'] in PRIO_RECORDS and record['prio'] is not None:
+        fields.append(str(record['prio']))
+    fields.append(_qualify_content(record['type'], record['content']))
+    line = '\t'.join(fields)
+    if record['disabled']:
+        line = '; ' + line
+    return line + '\n'
+
+
+def format_jsonl_line(record):
+    """Return `record` dict as a line of JSON Lines"""
+    return json.dumps(record, sort_keys=True) + '\n'
+
+
+def format_bind_header(domain, serial):
+    return '; zone {0}, serial {1}\n$ORIGIN {2}\n'.format(
+        domain.name, serial, _qualify(domain.name),
+    )
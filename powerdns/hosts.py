@@ -0,0 +1,133 @@
+"""Records related to hosts, looked up for many hosts at once"""
+
+import ipaddress
+from collections import defaultdict, OrderedDict
+
+from django.db.models import Q
+
+from .bulk import BULK_CHUNK_SIZE
+from .models import Record
+from .utils import chunks, reverse_pointer
+
+
+ADDRESS_TYPES = ('A', 'AAAA')
+HOST_RECORD_TYPES = ('A', 'AAAA', 'PTR', 'TXT', 'CNAME')
+HOST_RECORD_FIELDS = (
+    'id', 'domain', 'name', 'type', 'content', 'ttl', 'prio', 'disabled',
+    'depends_on', 'service', 'owner',
+)
+
+
+def _parse_address(host):
+    try:
+        return ipaddress.ip_address(host)
+    except ValueError:
+        return None
+
+
+def _chunked_q(conditions):
+    """
+    Yield Q objects matching any of `conditions` - (filters, lookup, values)
+    triples, eg. `({'type': 'A'}, 'number__in', numbers)` - with at most
+    `BULK_CHUNK_SIZE` values each.
+    """
+    items = [
+        (i, value)
+        for i, (filters, lookup, values) in enumerate(conditions)
+        for value in values
+    ]
+    for chunk in chunks(items, BULK_CHUNK_SIZE):
+        values_by_condition = OrderedDict()
+        for i, value in chunk:
+            values_by_condition.setdefault(i, []).append(value)
+        q = Q()
+        for i, values in values_by_condition.items():
+            filters, lookup, _ = conditions[i]
+            q |= Q(**dict(filters, **{lookup: values}))
+        yield q
+
+
+def _get_records(conditions, fields):
+    """Yield dicts of `fields` of records matching any of `conditions`"""
+    seen = set()
+    for q in _chunked_q(conditions):
+        for record in Record.objects.filter(q).values(*fields):
+            # a record may match conditions of more than one chunk
+            if record['id'] not in seen:
+                seen.add(record['id'])
+                yield record
+
+
+def get_host_records(hosts):
+    """
+    Return OrderedDict mapping every host from `hosts` (hostnames or IP
+    addresses) to dict of its records by type (HOST_RECORD_TYPES): A/AAAA
+    records of the name (or of the address), their PTRs (by `depends_on`)
+    and PTRs of the address, TXT records of the names and CNAMEs pointing to
+    them. Records are dicts of HOST_RECORD_FIELDS.
+
+    Takes two queries (more only for thousands of hosts, as values of `IN`
+    lookups are sent in chunks of `BULK_CHUNK_SIZE`).
+    """
+    results = OrderedDict()
+    hosts_by_name = defaultdict(set)
+    hosts_by_number = {'A': defaultdict(set), 'AAAA': defaultdict(set)}
+    hosts_by_ptr_name = defaultdict(set)
+    for host in hosts:
+        if host in results:
+            continue
+        results[host] = {type_: [] for type_ in HOST_RECORD_TYPES}
+        address = _parse_address(host)
+        if address is None:
+            hosts_by_name[host.rstrip('.')].add(host)
+        else:
+            type_ = 'A' if address.version == 4 else 'AAAA'
+            hosts_by_number[type_][int(address)].add(host)
+            hosts_by_ptr_name[reverse_pointer(str(address))].add(host)
+    if not results:
+        return results
+
+    address_conditions = [
+        ({'type__in': ADDRESS_TYPES}, 'name__in', list(hosts_by_name)),
+    ] + [
+        ({'type': type_}, 'number__in', list(numbers))
+        for type_, numbers in hosts_by_number.items()
+    ]
+    # hosts of names of found addresses (for their TXTs and CNAMEs)
+    hosts_by_related_name = defaultdict(set, {
+        name: set(name_hosts) for name, name_hosts in hosts_by_name.items()
+    })
+    hosts_by_address_id = {}
+    for record in _get_records(
+        address_conditions, HOST_RECORD_FIELDS + ('number',),
+    ):
+        number = record.pop('number')
+        record_hosts = hosts_by_name.get(record['name'], set())
+        if number is not None:
+            record_hosts = record_hosts | hosts_by_number[record['type']].get(
+                int(number), set(),
+            )
+        hosts_by_address_id[record['id']] = record_hosts
+        hosts_by_related_name[record['name']].update(record_hosts)
+        for host in record_hosts:
+            results[host][record['type']].append(record)
+
+    related_conditions = [
+        ({'type': 'PTR'}, 'depends_on__in', list(hosts_by_address_id)),
+        ({'type': 'PTR'}, 'name__in', list(hosts_by_ptr_name)),
+        ({'type': 'TXT'}, 'name__in', list(hosts_by_related_name)),
+        ({'type': 'CNAME'}, 'content__in', list(hosts_by_related_name)),
+    ]
+    for record in _get_records(related_conditions, HOST_RECORD_FIELDS):
+        if record['type'] == 'PTR':
+            record_hosts = (
+                hosts_by_address_id.get(record['depends_on'], set()) |
+                hosts_by_ptr_name.get(record['name'], set())
+            )
+        elif record['type'] == 'TXT':
+            record_hosts = hosts_by_related_name.get(record['name'], set())
+        else:
+            record_hosts = hosts_by_related_name.get(record['content'], set())
+        for host in record_hosts:
+            results[host][record['type']].append(record)
+    return results
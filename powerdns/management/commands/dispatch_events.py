@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from powerdns.events import Webhook, dispatch_events
+
+
+class Command(BaseCommand):
+    help = 'Deliver changes of domains and records to EVENT_WEBHOOKS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forever', action='store_true', default=False,
+            help='Keep waiting for new changes instead of exiting.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1,
+            help='Seconds to wait when there is nothing to deliver.',
+        )
+
+    def handle(self, *args, **options):
+        webhooks = Webhook.from_settings()
+        while True:
+            delivered = dispatch_events(webhooks)
+            if delivered:
+                self.stdout.write('Delivered {} changes'.format(delivered))
+                continue
+            if not options['forever']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from powerdns.bulk import BULK_CHUNK_SIZE, purge_domain
+from powerdns.models import Domain
+
+
+class Command(BaseCommand):
+    help = 'Delete domains with all their records, bypassing signals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--domain', action='append', dest='domains', default=[],
+            help='Name of the domain (can be repeated).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=BULK_CHUNK_SIZE,
+            help='Number of records deleted at once.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['domains']:
+            raise CommandError('At least one --domain is required')
+        for name in options['domains']:
+            try:
+                domain = Domain.objects.get(name=name)
+            except Domain.DoesNotExist:
+                raise CommandError('Domain {} does not exist'.format(name))
+            summary = purge_domain(domain, options['chunk_size'])
+            self.stdout.write(
+                'Purged {name}: {records} records, {dependent_records} '
+                'dependent records in other domains'.format(**summary)
+            )
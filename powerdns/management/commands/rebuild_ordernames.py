@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from powerdns.dnssec import rebuild_ordernames
+from powerdns.models import Domain
+
+
+class Command(BaseCommand):
+    help = 'Recompute DNSSEC ordernames of all records of given domains.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--domain', action='append', dest='domains', default=[],
+            help='Name of the domain (can be repeated).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of records read and updated at once.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['domains']:
+            raise CommandError('At least one --domain is required')
+        for name in options['domains']:
+            try:
+                domain = Domain.objects.get(name=name)
+            except Domain.DoesNotExist:
+                raise CommandError('Domain {} does not exist'.format(name))
+            updated = rebuild_ordernames(domain, options['chunk_size'])
+            self.stdout.write(
+                'Updated ordernames of {} records in {}'.format(updated, name)
+            )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from powerdns.models import Domain, Record
+from powerdns.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute search index (reversed names and n-grams) of records, '
+        'of given domains or of all of them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--domain', action='append', dest='domains', default=[],
+            help='Name of the domain (can be repeated).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of records read and indexed at once.',
+        )
+
+    def handle(self, *args, **options):
+        records = Record.objects.all()
+        if options['domains']:
+            domains = Domain.objects.filter(name__in=options['domains'])
+            missing = set(options['domains']) - {d.name for d in domains}
+            if missing:
+                raise CommandError('Domain {} does not exist'.format(
+                    ', '.join(sorted(missing))
+                ))
+            records = records.filter(domain__in=domains)
+        indexed = rebuild_search_index(records, options['chunk_size'])
+        self.stdout.write('Indexed {} records'.format(indexed))
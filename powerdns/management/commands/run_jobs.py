@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from powerdns.models import Job, JobStates
+
+
+class Command(BaseCommand):
+    help = 'Run pending background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forever', action='store_true', default=False,
+            help='Keep waiting for new jobs instead of exiting.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5,
+            help='Seconds to wait between checks for new jobs.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for job in Job.objects.filter(state=JobStates.PENDING):
+                job.run()
+                self.stdout.write('Job {}: {}'.format(
+                    job.pk, JobStates.DescFromID(job.state),
+                ))
+            if not options['forever']:
+                break
+            time.sleep(options['sleep'])
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import dj.choices.fields
+import django_extensions.db.fields.json
+import powerdns.models.jobs
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0037_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', models.DateTimeField(verbose_name='date created', auto_now_add=True)),
+                ('modified', models.DateTimeField(verbose_name='last modified', auto_now=True)),
+                ('handler', models.CharField(verbose_name='handler', max_length=255)),
+                ('params', django_extensions.db.fields.json.JSONField(verbose_name='parameters', blank=True, default=dict)),
+                ('state', dj.choices.fields.ChoiceField(default=1, choices=powerdns.models.jobs.JobStates)),
+                ('done', models.PositiveIntegerField(verbose_name='done', default=0)),
+                ('total', models.PositiveIntegerField(verbose_name='total', blank=True, null=True)),
+                ('result', django_extensions.db.fields.json.JSONField(verbose_name='result', blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'job',
+                'verbose_name_plural': 'jobs',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0038_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordSearchToken',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('token', models.CharField(verbose_name='token', max_length=3)),
+            ],
+            options={
+                'verbose_name': 'record search token',
+                'verbose_name_plural': 'record search tokens',
+            },
+        ),
+        migrations.AddField(
+            model_name='record',
+            name='reversed_name',
+            field=models.CharField(verbose_name='reversed name', max_length=255, blank=True, null=True, db_index=True, editable=False, help_text='Name spelled backwards, for searching by its suffix'),
+        ),
+        migrations.AddField(
+            model_name='recordsearchtoken',
+            name='record',
+            field=models.ForeignKey(related_name='search_tokens', to='powerdns.Record'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='recordsearchtoken',
+            unique_together=set([('token', 'record')]),
+        ),
+    ]
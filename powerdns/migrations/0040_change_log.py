@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_extensions.db.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0039_record_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('model', models.CharField(verbose_name='model', max_length=16, choices=[('domain', 'domain'), ('record', 'record')])),
+                ('object_id', models.PositiveIntegerField(verbose_name='object id')),
+                ('domain_id', models.PositiveIntegerField(verbose_name='domain id', blank=True, null=True, help_text='The changed domain or domain of the changed record')),
+                ('action', models.CharField(verbose_name='action', max_length=8, choices=[('create', 'create'), ('update', 'update'), ('delete', 'delete')])),
+                ('data', django_extensions.db.fields.json.JSONField(verbose_name='data', blank=True, null=True)),
+                ('created', models.DateTimeField(verbose_name='date created', auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'change',
+                'verbose_name_plural': 'changes',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='change',
+            index_together=set([('domain_id', 'id')]),
+        ),
+    ]
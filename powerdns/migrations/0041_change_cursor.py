@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0040_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeCursor',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('name', models.CharField(verbose_name='name', max_length=255, unique=True)),
+                ('seq', models.PositiveIntegerField(verbose_name='sequence number', default=0)),
+                ('modified', models.DateTimeField(verbose_name='last modified', auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'change cursor',
+                'verbose_name_plural': 'change cursors',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from powerdns.models.search import SEARCH_INDEX_CHUNK_SIZE, tokenize
+from powerdns.utils import bulk_update_column
+
+
+def fill_search_index(apps, schema_editor):
+    """Index records existing before the search index was added"""
+    Record = apps.get_model('powerdns', 'Record')
+    RecordSearchToken = apps.get_model('powerdns', 'RecordSearchToken')
+    records = Record.objects.only('pk', 'name', 'content', 'reversed_name')
+    last_pk = 0
+    while True:
+        chunk = list(records.filter(pk__gt=last_pk).order_by('pk')[
+            :SEARCH_INDEX_CHUNK_SIZE
+        ])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        bulk_update_column(Record, 'reversed_name', {
+            record.pk: record.name[::-1]
+            for record in chunk if record.reversed_name != record.name[::-1]
+        }, SEARCH_INDEX_CHUNK_SIZE)
+        RecordSearchToken.objects.filter(
+            record_id__in=[record.pk for record in chunk],
+        ).delete()
+        RecordSearchToken.objects.bulk_create([
+            RecordSearchToken(record_id=record.pk, token=token)
+            for record in chunk
+            for token in tokenize(record.name) | tokenize(record.content)
+        ], batch_size=SEARCH_INDEX_CHUNK_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0042_record_type_content_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def sequence_existing_changes(apps, schema_editor):
+    """Number changes logged so far with their ids, as before"""
+    Change = apps.get_model('powerdns', 'Change')
+    Counter = apps.get_model('powerdns', 'Counter')
+    Change.objects.update(seq=F('id'))
+    last_seq = Change.objects.aggregate(Max('id'))['id__max']
+    if last_seq:
+        Counter.objects.update_or_create(
+            name='change-log', defaults={'value': last_seq},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0043_fill_record_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='seq',
+            field=models.PositiveIntegerField(verbose_name='sequence number', unique=True, blank=True, null=True, help_text='Empty until the change is committed and sequenced'),
+        ),
+        migrations.AlterIndexTogether(
+            name='change',
+            index_together=set([('domain_id', 'seq')]),
+        ),
+        migrations.RunPython(
+            sequence_existing_changes, migrations.RunPython.noop,
+        ),
+    ]
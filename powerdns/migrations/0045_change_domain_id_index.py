@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('powerdns', '0044_change_seq'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='change',
+            index_together=set([('domain_id', 'id'), ('domain_id', 'seq')]),
+        ),
+    ]
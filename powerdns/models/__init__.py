@@ -1,5 +1,9 @@
+from .changes import *  # noqa
+from .counters import *  # noqa
+from .jobs import *  # noqa
 from .ownership import *  # noqa
 from .powerdns import *  # noqa
 from .requests import *  # noqa
+from .search import *  # noqa
 from .templates import *  # noqa
 from .tsigkeys import *  # noqa
@@ -0,0 +1,176 @@
+"""Append-only log of changes of domains and records"""
+
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import ugettext_lazy as _
+from django_extensions.db.fields.json import JSONField
+
+from ..utils import bulk_update_column
+from .counters import Counter
+from .powerdns import Domain, Record
+
+
+CHANGE_LOG_CHUNK_SIZE = 500
+# last sequence number given to a change (see `sequence_changes`)
+CHANGE_LOG_COUNTER = 'change-log'
+# fields of domains and records stored in `Change.data`
+CHANGE_FIELDS = {
+    'domain': (
+        'name', 'master', 'type', 'account', 'notified_serial', 'owner',
+        'service', 'template', 'reverse_template', 'auto_ptr',
+        'unrestricted',
+    ),
+    'record': (
+        'domain', 'name', 'type', 'content', 'ttl', 'prio', 'auth',
+        'disabled', 'change_date', 'owner', 'service', 'depends_on',
+    ),
+}
+
+
+class Change(models.Model):
+    """
+    Entry of the log of creates, updates and deletes of domains and records,
+    for mirrors syncing only what has changed. Changes are consumed in order
+    of their sequence numbers, given once they are committed (see
+    `sequence_changes`). Deleted objects leave tombstones - entries without
+    data.
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = (
+        (CREATE, _('create')),
+        (UPDATE, _('update')),
+        (DELETE, _('delete')),
+    )
+    MODELS = (
+        ('domain', _('domain')),
+        ('record', _('record')),
+    )
+    model = models.CharField(_("model"), max_length=16, choices=MODELS)
+    object_id = models.PositiveIntegerField(_("object id"))
+    domain_id = models.PositiveIntegerField(
+        _("domain id"), null=True, blank=True,
+        help_text=_("The changed domain or domain of the changed record"),
+    )
+    action = models.CharField(_("action"), max_length=8, choices=ACTIONS)
+    data = JSONField(_("data"), null=True, blank=True)
+    created = models.DateTimeField(_("date created"), auto_now_add=True)
+    seq = models.PositiveIntegerField(
+        _("sequence number"), null=True, blank=True, unique=True,
+        help_text=_("Empty until the change is committed and sequenced"),
+    )
+
+    class Meta:
+        ordering = ('id',)
+        index_together = (('domain_id', 'id'), ('domain_id', 'seq'))
+        verbose_name = _("change")
+        verbose_name_plural = _("changes")
+
+    def __str__(self):
+        return '{} {} {}'.format(self.action, self.model, self.object_id)
+
+
+def sequence_changes():
+    """
+    Give sequence numbers to changes committed since the last call and
+    return the last given number.
+
+    Numbers are given in a short transaction of its own, holding the lock of
+    the change log counter, so only committed changes get them, in order of
+    their commits - changes committed later (even if written earlier) get
+    greater numbers, and rolled back ones never get any. Consumers reading
+    the log by `seq` therefore neither skip changes nor wait for gaps.
+    """
+    if not Change.objects.filter(seq__isnull=True).exists():
+        return Counter.get_value(CHANGE_LOG_COUNTER)
+    Counter.objects.get_or_create(name=CHANGE_LOG_COUNTER)
+    with transaction.atomic():
+        counter = Counter.objects.select_for_update().get(
+            name=CHANGE_LOG_COUNTER,
+        )
+        pks = list(Change.objects.filter(seq__isnull=True).order_by(
+            'pk',
+        ).values_list('pk', flat=True))
+        bulk_update_column(Change, 'seq', {
+            pk: counter.value + i for i, pk in enumerate(pks, 1)
+        }, CHANGE_LOG_CHUNK_SIZE)
+        counter.value += len(pks)
+        counter.save(update_fields=['value'])
+    return counter.value
+
+
+def get_change_data(instance):
+    """Return dict of CHANGE_FIELDS of domain or record `instance`"""
+    meta = instance._meta
+    return {
+        name: getattr(instance, meta.get_field(name).attname)
+        for name in CHANGE_FIELDS[meta.model_name]
+    }
+
+
+def log_changes(action, instances):
+    """
+    Append `action` (one of `Change.ACTIONS`) on saved domains or records
+    `instances` to the change log, with one insert per chunk. Used where
+    signals are bypassed, eg. by `bulk_create` or `update`.
+    """
+    Change.objects.bulk_create([
+        Change(
+            model=instance._meta.model_name,
+            object_id=instance.pk,
+            domain_id=(
+                instance.pk if isinstance(instance, Domain)
+                else instance.domain_id
+            ),
+            action=action,
+            data=None if action == Change.DELETE else get_change_data(
+                instance,
+            ),
+        )
+        for instance in instances
+    ], batch_size=CHANGE_LOG_CHUNK_SIZE)
+
+
+@receiver(post_save, sender=Domain, dispatch_uid='domain_change_log')
+@receiver(post_save, sender=Record, dispatch_uid='record_change_log')
+def log_saved(sender, instance, created, **kwargs):
+    log_changes(Change.CREATE if created else Change.UPDATE, [instance])
+
+
+@receiver(post_delete, sender=Domain, dispatch_uid='domain_delete_change_log')
+@receiver(post_delete, sender=Record, dispatch_uid='record_delete_change_log')
+def log_deleted(sender, instance, **kwargs):
+    log_changes(Change.DELETE, [instance])
+
+
+class ChangeCursor(models.Model):
+    """
+    Position of a consumer of the change log (eg. a webhook) - sequence
+    number of the last change it has processed.
+    """
+    name = models.CharField(_("name"), max_length=255, unique=True)
+    seq = models.PositiveIntegerField(_("sequence number"), default=0)
+    modified = models.DateTimeField(_("last modified"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("change cursor")
+        verbose_name_plural = _("change cursors")
+
+    def __str__(self):
+        return '{}: {}'.format(self.name, self.seq)
+
+    @classmethod
+    def get_for(cls, name):
+        """Return cursor of consumer `name`; new ones start at the end"""
+        cursor = cls.objects.filter(name=name).first()
+        if cursor is None:
+            cursor, created = cls.objects.get_or_create(
+                name=name, defaults={'seq': sequence_changes()},
+            )
+        return cursor
+
+    def advance(self, seq):
+        self.seq = seq
+        self.save(update_fields=['seq', 'modified'])
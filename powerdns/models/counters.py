@@ -0,0 +1,33 @@
+"""Database counters keeping process-local caches coherent"""
+
+from django.db import models
+from django.db.models import F
+from django.utils.translation import ugettext_lazy as _
+
+
+class Counter(models.Model):
+    """
+    Named number, incremented whenever the data it guards changes. Processes
+    compare it with the value their cache was built for.
+    """
+    name = models.CharField(_("name"), max_length=64, unique=True)
+    value = models.PositiveIntegerField(_("value"), default=0)
+
+    class Meta:
+        verbose_name = _("counter")
+        verbose_name_plural = _("counters")
+
+    def __str__(self):
+        return '{}: {}'.format(self.name, self.value)
+
+    @classmethod
+    def get_value(cls, name):
+        return cls.objects.filter(name=name).values_list(
+            'value', flat=True
+        ).first() or 0
+
+    @classmethod
+    def increment(cls, name):
+        if not cls.objects.filter(name=name).update(value=F('value') + 1):
+            cls.objects.get_or_create(name=name)
+            cls.objects.filter(name=name).update(value=F('value') + 1)
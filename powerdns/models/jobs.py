@@ -0,0 +1,73 @@
+"""Long running operations executed in the background"""
+
+import logging
+
+from dj.choices import Choices
+from dj.choices.fields import ChoiceField
+from django.db import models
+from django.utils.module_loading import import_string
+from django.utils.translation import ugettext_lazy as _
+from django_extensions.db.fields.json import JSONField
+
+from ..utils import TimeTrackable
+
+
+log = logging.getLogger(__name__)
+
+
+class JobStates(Choices):
+    _ = Choices.Choice
+    PENDING = _('Pending')
+    RUNNING = _('Running')
+    DONE = _('Done')
+    FAILED = _('Failed')
+
+
+class Job(TimeTrackable):
+    """
+    Call of `handler` (dotted path to a function) with `params`, executed by
+    the `run_jobs` management command. The handler gets `progress` callback
+    as well, to report how many of total items are done.
+    """
+    handler = models.CharField(_("handler"), max_length=255)
+    params = JSONField(_("parameters"), blank=True, default=dict)
+    state = ChoiceField(choices=JobStates, default=JobStates.PENDING)
+    done = models.PositiveIntegerField(_("done"), default=0)
+    total = models.PositiveIntegerField(_("total"), null=True, blank=True)
+    result = JSONField(_("result"), null=True, blank=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = _("job")
+        verbose_name_plural = _("jobs")
+
+    def __str__(self):
+        return '{} {}'.format(self.handler, self.params)
+
+    @classmethod
+    def enqueue(cls, handler, **params):
+        return cls.objects.create(handler=handler, params=params)
+
+    def report_progress(self, done, total=None):
+        self.done = done
+        self.total = total
+        Job.objects.filter(pk=self.pk).update(done=done, total=total)
+
+    def run(self):
+        """Run the job, unless another worker has already taken it"""
+        if not Job.objects.filter(
+            pk=self.pk, state=JobStates.PENDING,
+        ).update(state=JobStates.RUNNING):
+            return
+        self.state = JobStates.RUNNING
+        try:
+            self.result = import_string(self.handler)(
+                progress=self.report_progress, **self.params
+            )
+        except Exception as e:
+            log.exception('Job {} failed'.format(self.pk))
+            self.state = JobStates.FAILED
+            self.result = {'error': str(e)}
+        else:
+            self.state = JobStates.DONE
+        self.save(update_fields=['state', 'result', 'modified'])
@@ -1,24 +1,33 @@
-import base64
+import binascii
 import datetime
-import hashlib
 import ipaddress
-import sys
+import threading
 import time
+from contextlib import contextmanager
 
 from dj.choices.fields import ChoiceField
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models.signals import post_delete, post_save
+from django.db.models import Case, F, Max, Value, When
+from django.db.models.signals import class_prepared, post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 from django.utils.deconstruct import deconstructible
 
+from .jobs import Job
 from .ownership import OwnershipByService, OwnershipType
+from ..dnssec import (
+    DNSSECMode,
+    get_dnssec_mode,
+    get_nsec3_hasher,
+    invalidate_dnssec_mode,
+    nsec_ordername,
+)
 from ..utils import (
     AutoPtrOptions,
     find_domain_for_record,
+    invalidate_domain_trie,
     Owned,
     RecordLike,
     TimeTrackable,
@@ -49,17 +58,65 @@ RECORD_A_TYPES = IP_TYPES_FOR_PTR = {'A', 'AAAA'}
 DEFAULT_REVERSE_DOMAIN_TEMPLATE = None
 
 
+class TrackedField(object):
+    """
+    Descriptor of a model field remembering its original value, ie. the one
+    before the first change. Setting the initial value (in `__init__`) costs
+    only a descriptor call.
+    """
+
+    def __init__(self, attname):
+        self.attname = attname
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.attname]
+        except KeyError:  # deferred field
+            instance.refresh_from_db(fields=[self.attname])
+            return instance.__dict__[self.attname]
+
+    def __set__(self, instance, value):
+        values = instance.__dict__
+        if self.attname in values:
+            values.setdefault('_changed_fields', {}).setdefault(
+                self.attname, values[self.attname]
+            )
+        values[self.attname] = value
+
+
 class PreviousStateMixin(models.Model):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        fields = [f.name for f in self._meta.get_fields()]
-        self._original_values = {
-            k: v for k, v in self.__dict__.items() if k in fields
-        }
+    """
+    Provides `_original_values` of fields listed in `tracked_fields` of the
+    model - values they had when the instance was created, fetched or last
+    saved (post_save receivers still see values from before the save).
+    """
+    tracked_fields = ()
 
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.__dict__.pop('_changed_fields', None)
+
+    @property
+    def _original_values(self):
+        changed = self.__dict__.get('_changed_fields', {})
+        return {
+            name: changed[name] if name in changed else getattr(self, name)
+            for name in self.tracked_fields
+        }
+
+
+@receiver(class_prepared, dispatch_uid='previous_state_tracked_fields')
+def install_tracked_fields(sender, **kwargs):
+    # only on models declaring the fields (not on eg. deferred subclasses)
+    if 'tracked_fields' in sender.__dict__:
+        for name in sender.tracked_fields:
+            setattr(sender, name, TrackedField(name))
+
 
 def get_ptr_obj(ip, content):
     """Return PTR object for `ip` and `content` or None"""
@@ -91,17 +148,6 @@ try:
 except AttributeError:
     pass
 
-# http://tools.ietf.org/html/rfc4648#section-7
-if sys.version_info[0] == 2:
-    import string
-    maketrans_func = string.maketrans
-else:
-    maketrans_func = str.maketrans
-b32_trans = maketrans_func(
-    'ABCDEFGHIJKLMNOPQRSTUVWXYZ234567',
-    '0123456789ABCDEFGHIJKLMNOPQRSTUV'
-)
-
 
 @deconstructible
 class SubDomainValidator():
@@ -124,6 +170,7 @@ class Domain(PreviousStateMixin, OwnershipByService, TimeTrackable, Owned):
         ('SLAVE', 'SLAVE'),
     )
     copy_fields = ['auto_ptr']
+    tracked_fields = ('auto_ptr', 'name')
     name = models.CharField(
         _("name"),
         unique=True,
@@ -210,9 +257,13 @@ class Domain(PreviousStateMixin, OwnershipByService, TimeTrackable, Owned):
     def save(self, *args, **kwargs):
         # This save can trigger creating some templated records.
         # So we do it atomically
-        with transaction.atomic():
+        with coalesce_serial_bumps():
             super(Domain, self).save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        with coalesce_serial_bumps():
+            super(Domain, self).delete(*args, **kwargs)
+
     def get_soa(self):
         """Returns the SOA record for this domain"""
         try:
@@ -220,6 +271,23 @@ class Domain(PreviousStateMixin, OwnershipByService, TimeTrackable, Owned):
         except Record.DoesNotExist:
             return
 
+    def get_serial(self):
+        """
+        Returns the SOA serial of this domain - the one from SOA content or,
+        when it's 0 (PowerDNS automatic serial), SOA change_date.
+        """
+        soa = Record.objects.filter(type='SOA', domain=self).values_list(
+            'content', 'change_date',
+        ).first()
+        if soa is None:
+            return
+        content, change_date = soa
+        try:
+            serial = int((content or '').split()[2])
+        except (IndexError, ValueError):
+            serial = 0
+        return serial or change_date
+
     def can_auto_accept(self, user):
         return (
             user.is_superuser or
@@ -268,6 +336,15 @@ class DomainOwner(models.Model):
         unique_together = (("domain", "owner", "ownership_type"),)
 
 
+class RecordQuerySet(models.QuerySet):
+
+    def delete(self):
+        with coalesce_serial_bumps():
+            return super(RecordQuerySet, self).delete()
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Record(
     PreviousStateMixin, OwnershipByService, TimeTrackable, Owned, RecordLike
 ):
@@ -275,6 +352,8 @@ class Record(
     PowerDNS DNS records
     '''
     prefix = ''
+    objects = RecordQuerySet.as_manager()
+    tracked_fields = ('content', 'name')
     RECORD_TYPE = [(r, r) for r in RECORD_TYPES]
     domain = models.ForeignKey(
         Domain,
@@ -299,6 +378,11 @@ class Record(
         help_text=_("The 'right hand side' of a DNS record. For an A"
                     " record, this is the IP address"),
     )
+    reversed_name = models.CharField(
+        _("reversed name"), max_length=255, blank=True, null=True,
+        editable=False, db_index=True,
+        help_text=_("Name spelled backwards, for searching by its suffix"),
+    )
     number = models.DecimalField(
         _("IP number"), null=True, blank=True, default=None, editable=False,
         db_index=True, max_digits=39, decimal_places=0
@@ -366,6 +450,8 @@ class Record(
         db_table = u'records'
         ordering = ('name', 'type')
         unique_together = ('name', 'type', 'content')
+        # lookups by content, eg. of CNAMEs pointing to a name
+        index_together = (('type', 'content'),)
         verbose_name = _("record")
         verbose_name_plural = _("records")
 
@@ -386,18 +472,15 @@ class Record(
         Check which DNSSEC Mode the domain is in and fill the `ordername`
         field depending on the mode.
         '''
-        cryptokey = CryptoKey.objects.filter(domain=self.domain)
-        if not cryptokey.count():
+        mode, nsec3param = get_dnssec_mode(self.domain_id)
+        if mode == DNSSECMode.UNSIGNED:
             return None
-        metadata = DomainMetadata.objects.filter(domain=self.domain)
-        nsec3param = metadata.filter(kind='NSEC3PARAM')
-        nsec3narrow = metadata.filter(kind='NSEC3NARROW')
-        if nsec3param.count():
-            if nsec3narrow.count():
-                # When running in NSEC3 'Narrow' mode, the ordername field is
-                # ignored and best left empty.
-                return ''
-            return self._generate_ordername_nsec3(nsec3param[0])
+        if mode == DNSSECMode.NSEC3_NARROW:
+            # When running in NSEC3 'Narrow' mode, the ordername field is
+            # ignored and best left empty.
+            return ''
+        if mode == DNSSECMode.NSEC3:
+            return self._generate_ordername_nsec3(nsec3param)
         return self._generate_ordername_nsec()
 
     def _generate_ordername_nsec(self):
@@ -405,12 +488,7 @@ class Record(
         In 'NSEC' mode, it should contain the relative part of a domain name,
         in reverse order, with dots replaced by spaces
         '''
-        domain_words = self.domain.name.split('.')
-        host_words = self.name.split('.')
-        relative_word_count = len(host_words) - len(domain_words)
-        relative_words = host_words[0:relative_word_count]
-        ordername = ' '.join(relative_words[::-1])
-        return ordername
+        return nsec_ordername(self.name, self.domain.name)
 
     def _generate_ordername_nsec3(self, nsec3param):
         '''
@@ -420,33 +498,9 @@ class Record(
         to calculate this hash.
         '''
         try:
-            algo, flags, iterations, salt = nsec3param.content.split()
-            if algo != '1':
-                raise ValueError("Incompatible hash algorithm.")
-            if flags != '1':
-                raise ValueError("Incompatible flags.")
-            salt = salt.decode('hex')
-            # convert the record name to the DNSSEC canonical form, e.g.
-            # a format suitable for digesting in hashes
-            record_name = '%s.' % self.name.lower().rstrip('.')
-            parts = ["%s%s" % (chr(len(x)), x) for x in record_name.split('.')]
-            record_name = ''.join(parts)
-        except (ValueError, TypeError, AttributeError):
+            return get_nsec3_hasher(nsec3param).hash_name(self.name)
+        except (ValueError, TypeError, AttributeError, binascii.Error):
             return None  # incompatible input
-        record_name = self._sha1(record_name, salt)
-        i = 0
-        while i < int(iterations):
-            record_name = self._sha1(record_name, salt)
-            i += 1
-        result = base64.b32encode(record_name)
-        result = result.translate(b32_trans)
-        return result.lower()
-
-    def _sha1(self, value, salt):
-        s = hashlib.sha1()
-        s.update(value)
-        s.update(salt)
-        return s.digest()
 
     def force_case(self):
         """Force the name and content case to upper and lower respectively"""
@@ -455,35 +509,22 @@ class Record(
         if self.type:
             self.type = self.type.upper()
 
-    def validate_for_conflicts(self):
-        """Ensure this record doesn't conflict with other records."""
-        def check_unique(comment, **kwargs):
-            conflicting = Record.objects.filter(**kwargs)
-            if self.pk is not None:
-                conflicting = conflicting.exclude(pk=self.pk)
-            if conflicting:
-                raise ValidationError(comment.format(
-                    ', '.join(str(record.id) for record in conflicting)
-                ))
-        if self.type == 'CNAME':
-            check_unique(
-                'Cannot create CNAME record. Following conflicting '
-                'records exist: {}',
-                name=self.name,
-            )
-        else:
-            check_unique(
-                'Cannot create a record. Following conflicting CNAME'
-                'record exists: {}',
-                type='CNAME',
-                name=self.name,
-            )
+    def get_record_pk(self):
+        return self.pk
 
-    def save(self, *args, **kwargs):
-        self.change_date = int(time.time())
+    def fill_computed_fields(self, change_date=None):
+        """
+        Set fields derived from the record data. Called by `save`, but also
+        needed by code that inserts records bypassing it (`bulk_create`).
+        """
+        self.change_date = change_date or int(time.time())
         self.ordername = self._generate_ordername()
+        self.reversed_name = self.name[::-1] if self.name else self.name
         if self.type in IP_TYPES_FOR_PTR:
             self.number = int(ipaddress.ip_address(self.content))
+
+    def save(self, *args, **kwargs):
+        self.fill_computed_fields()
         super(Record, self).save(*args, **kwargs)
 
     @property
@@ -606,19 +647,105 @@ class Record(
         }
 
 
-# When we delete a record, the zone changes, but there no change_date is
+def get_zone_version(domain_id):
+    """
+    Return a value changing with every change of records of domain with
+    `domain_id` - SOA change_date, bumped on every change (see
+    `update_serial`), or when there is no SOA, id of the last change of the
+    domain in the change log. None when neither is known.
+    """
+    # Avoid circular import (.changes imports this file)
+    from powerdns.models.changes import Change
+    version = Record.objects.filter(
+        domain_id=domain_id, type='SOA',
+    ).values_list('change_date', flat=True).first()
+    if version is None:
+        last_change = Change.objects.filter(domain_id=domain_id).aggregate(
+            last=Max('id'),
+        )['last']
+        if last_change is not None:
+            version = 'change-{}'.format(last_change)
+    return version
+
+
+def bump_soa_serials(domain_ids):
+    """
+    Update SOA change_date of all domains from `domain_ids` at once.
+
+    change_date always grows, even when bumped more than once a second.
+    """
+    # Avoid circular import (.changes imports this file)
+    from powerdns.models.changes import Change, log_changes
+    domain_ids = set(domain_ids)
+    if not domain_ids:
+        return
+    now = int(time.time())
+    soa_records = Record.objects.filter(type='SOA', domain_id__in=domain_ids)
+    soa_records.update(change_date=Case(
+        When(change_date__gte=now, then=F('change_date') + 1),
+        default=Value(now),
+        output_field=models.PositiveIntegerField(),
+    ))
+    log_changes(Change.UPDATE, soa_records)
+
+
+_serial_bumps = threading.local()
+
+
+@contextmanager
+def coalesce_serial_bumps():
+    """
+    Run the block in a transaction and bump SOA serial of every domain
+    changed inside it only once, at the end of the outermost block.
+
+    Can be used as a decorator as well.
+    """
+    if getattr(_serial_bumps, 'domain_ids', None) is not None:
+        yield
+        return
+    _serial_bumps.domain_ids = set()
+    try:
+        with transaction.atomic():
+            yield
+            bump_soa_serials(_serial_bumps.domain_ids)
+    finally:
+        _serial_bumps.domain_ids = None
+
+
+def schedule_serial_bump(domain_id):
+    """
+    Bump SOA serial of domain with `domain_id` - at the end of the current
+    `coalesce_serial_bumps` block, or right away outside of it.
+    """
+    domain_ids = getattr(_serial_bumps, 'domain_ids', None)
+    if domain_ids is None:
+        bump_soa_serials([domain_id])
+    else:
+        domain_ids.add(domain_id)
+
+
+# When we change a record, the zone changes, but the SOA change_date is not
 # updated. We update the SOA record, so the serial changes
+@receiver(post_save, sender=Record, dispatch_uid='record_save_update_serial')
 @receiver(post_delete, sender=Record, dispatch_uid='record_update_serial')
 def update_serial(sender, instance, **kwargs):
-    soa = instance.domain.get_soa()
-    if soa:
-        soa.save()
+    if instance.type != 'SOA' and instance.domain_id is not None:
+        schedule_serial_bump(instance.domain_id)
 
 
 def _update_records_ptrs(domain):
-    records = Record.objects.filter(domain=domain, type__in=IP_TYPES_FOR_PTR)
-    for record in records:
-        _create_ptr(record)
+    """
+    Reconcile PTRs of the whole `domain` - right away for small domains,
+    in a background job otherwise.
+    """
+    from ..bulk import reconcile_ptrs
+    records_count = Record.objects.filter(
+        domain=domain, type__in=IP_TYPES_FOR_PTR,
+    ).count()
+    if records_count > getattr(settings, 'PTR_RECONCILE_INLINE_LIMIT', 1000):
+        Job.enqueue('powerdns.bulk.reconcile_domain_ptrs', domain_id=domain.pk)
+    else:
+        reconcile_ptrs(domain)
 
 
 @receiver(post_save, sender=Domain, dispatch_uid='domain_update_ptr')
@@ -696,3 +823,37 @@ class CryptoKey(TimeTrackable):
 
     def __str__(self):
         return self.domain
+
+
+@receiver(post_save, sender=CryptoKey, dispatch_uid='cryptokey_dnssec_mode')
+@receiver(
+    post_delete, sender=CryptoKey, dispatch_uid='cryptokey_dnssec_mode_delete'
+)
+@receiver(
+    post_save, sender=DomainMetadata, dispatch_uid='metadata_dnssec_mode'
+)
+@receiver(
+    post_delete, sender=DomainMetadata,
+    dispatch_uid='metadata_dnssec_mode_delete',
+)
+def update_dnssec_mode(sender, instance, **kwargs):
+    invalidate_dnssec_mode(instance.domain_id)
+
+
+# Domain ids can be reused (eg. after a rollback), so don't trust the cache
+# for a freshly saved domain either.
+@receiver(post_save, sender=Domain, dispatch_uid='domain_dnssec_mode')
+@receiver(post_delete, sender=Domain, dispatch_uid='domain_dnssec_mode_delete')
+def reset_dnssec_mode(sender, instance, **kwargs):
+    invalidate_dnssec_mode(instance.pk)
+
+
+@receiver(post_save, sender=Domain, dispatch_uid='domain_trie')
+def update_domain_trie(sender, instance, created, **kwargs):
+    if created or instance._original_values.get('name') != instance.name:
+        invalidate_domain_trie()
+
+
+@receiver(post_delete, sender=Domain, dispatch_uid='domain_trie_delete')
+def update_domain_trie_on_delete(sender, instance, **kwargs):
+    invalidate_domain_trie()
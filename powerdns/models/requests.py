@@ -2,8 +2,11 @@
 
 import logging
 
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django_extensions.db.fields.json import JSONField
 from dj.choices import Choices
 from dj.choices.fields import ChoiceField
@@ -15,12 +18,14 @@ from .powerdns import (
     Domain,
     Owned,
     Record,
+    coalesce_serial_bumps,
     validate_domain_name,
 )
 from .ownership import Service
 
 from ..utils import \
-    AutoPtrOptions, RecordLike, TimeTrackable, flat_dict_diff
+    AutoPtrOptions, RecordLike, TimeTrackable, bulk_update_column, \
+    flat_dict_diff
 
 
 log = logging.getLogger(__name__)
@@ -110,7 +115,7 @@ class DeleteRequest(Request):
     target_id = models.PositiveIntegerField()
     target = GenericForeignKey('content_type', 'target_id')
 
-    @transaction.atomic
+    @coalesce_serial_bumps()
     def accept(self):
         if self.state != RequestStates.OPEN:
             self._log_processed_request_message()
@@ -179,14 +184,8 @@ class ChangeCreateRequest(Request):
     def _set_json_history(self, object_):
         self.last_change_json = self._get_json_history(object_)
 
-    @transaction.atomic
-    def accept(self):
-        object_ = self.get_object()
-        if self.state != RequestStates.OPEN:
-            self._log_processed_request_message()
-            return object_
-
-        self._set_json_history(object_)
+    def copy_to_object(self, object_):
+        """Set requested `target_` values on `object_` (without saving)"""
         for field_name in type(self).copy_fields:
             if field_name in self.ignore_fields:
                 continue
@@ -197,6 +196,16 @@ class ChangeCreateRequest(Request):
                 field_name[len(self.prefix):],
                 getattr(self, field_name)
             )
+
+    @coalesce_serial_bumps()
+    def accept(self):
+        object_ = self.get_object()
+        if self.state != RequestStates.OPEN:
+            self._log_processed_request_message()
+            return object_
+
+        self._set_json_history(object_)
+        self.copy_to_object(object_)
         object_.save()
         self.assign_object(object_)
         self.state = RequestStates.ACCEPTED
@@ -436,8 +445,45 @@ class RecordRequest(ChangeCreateRequest, RecordLike):
     )
 
     def get_record_pk(self):
-        if self.record:
-            return self.record.pk
+        return self.record_id
+
+    def save(self, *args, **kwargs):
+        if self.state == RequestStates.OPEN:
+            # stored, so that listing open requests needs no record lookups
+            self._set_json_history(self.get_object())
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_open_diffs(cls, requests):
+        """
+        Recompute and store `last_change_json` of open `requests` (eg. a page
+        of them or ones of a changed record), resolving their records and
+        target owners with one query each.
+        """
+        requests = [r for r in requests if r.state == RequestStates.OPEN]
+        if not requests:
+            return
+        records = Record.objects.select_related('owner').in_bulk(
+            {r.record_id for r in requests if r.record_id}
+        )
+        owners = get_user_model().objects.in_bulk(
+            {r.target_owner_id for r in requests if r.target_owner_id}
+        )
+        field = cls._meta.get_field('last_change_json')
+        diffs = {}
+        for request in requests:
+            if request.record_id:
+                if request.record_id not in records:
+                    continue  # record deleted meanwhile
+                object_ = records[request.record_id]
+            else:
+                object_ = Record(domain_id=request.domain_id)
+            request.target_owner = owners.get(request.target_owner_id)
+            request._set_json_history(object_)
+            diffs[request.pk] = field.get_db_prep_save(
+                request.last_change_json, connection,
+            )
+        bulk_update_column(cls, 'last_change_json', diffs)
 
     def __str__(self):
         if self.target_prio is not None:
@@ -480,3 +526,11 @@ class RecordRequest(ChangeCreateRequest, RecordLike):
             ) and
             self.domain.require_sec_acceptance
         )
+
+
+@receiver(post_save, sender=Record, dispatch_uid='record_open_requests_diff')
+def update_open_requests_diff(sender, instance, created, **kwargs):
+    if not created:
+        RecordRequest.refresh_open_diffs(RecordRequest.objects.filter(
+            record_id=instance.pk, state=RequestStates.OPEN,
+        ))
@@ -0,0 +1,70 @@
+"""Search index of records"""
+
+from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.translation import ugettext_lazy as _
+
+from .powerdns import Record
+
+
+SEARCH_TOKEN_LENGTH = 3
+SEARCH_INDEX_CHUNK_SIZE = 500
+
+
+def tokenize(value):
+    """Return set of lowercase n-grams (trigrams) of `value`"""
+    value = (value or '').lower()
+    return {
+        value[i:i + SEARCH_TOKEN_LENGTH]
+        for i in range(len(value) - SEARCH_TOKEN_LENGTH + 1)
+    }
+
+
+class RecordSearchToken(models.Model):
+    """
+    N-gram of name or content of a record. Records containing a substring
+    are those having all its n-grams, found by the index on `token` instead
+    of scanning the whole records table.
+    """
+    record = models.ForeignKey(
+        Record, related_name='search_tokens', on_delete=models.CASCADE,
+    )
+    token = models.CharField(_("token"), max_length=SEARCH_TOKEN_LENGTH)
+
+    class Meta:
+        unique_together = ('token', 'record')
+        verbose_name = _("record search token")
+        verbose_name_plural = _("record search tokens")
+
+    def __str__(self):
+        return self.token
+
+
+def index_records(records):
+    """
+    (Re)build search tokens of saved `records`, eg. ones inserted with
+    `bulk_create` or changed with `update`.
+    """
+    records = [r for r in records if r.pk is not None]
+    for i in range(0, len(records), SEARCH_INDEX_CHUNK_SIZE):
+        chunk = records[i:i + SEARCH_INDEX_CHUNK_SIZE]
+        RecordSearchToken.objects.filter(
+            record_id__in=[r.pk for r in chunk],
+        ).delete()
+        RecordSearchToken.objects.bulk_create([
+            RecordSearchToken(record_id=record.pk, token=token)
+            for record in chunk
+            for token in tokenize(record.name) | tokenize(record.content)
+        ], batch_size=SEARCH_INDEX_CHUNK_SIZE)
+
+
+@receiver(post_save, sender=Record, dispatch_uid='record_search_tokens')
+def update_search_tokens(sender, instance, created, **kwargs):
+    original = instance._original_values
+    if (
+        created or
+        original['name'] != instance.name or
+        original['content'] != instance.content
+    ):
+        index_records([instance])
@@ -6,7 +6,7 @@ from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 from dj.choices.fields import ChoiceField
 
-from .powerdns import Domain, Record
+from .powerdns import Domain, Record, coalesce_serial_bumps
 from ..utils import AutoPtrOptions
 
 
@@ -163,6 +163,7 @@ def update_templated_records(sender, instance, **kwargs):
     sender=RecordTemplate,
     dispatch_uid='record_template_modify_templated_records',
 )
+@coalesce_serial_bumps()
 def modify_templated_records(sender, instance, created, **kwargs):
     if created:
         for domain in instance.domain_template.domain_set.all():
@@ -0,0 +1,140 @@
+"""Indexed search of records"""
+
+import ipaddress
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+
+from .models import (
+    RECORD_TYPES,
+    SEARCH_TOKEN_LENGTH,
+    Record,
+    RecordSearchToken,
+    index_records,
+    tokenize,
+)
+from .utils import bulk_update_column, reverse_pointer
+
+
+def matching_record_ids(term):
+    """
+    Return subquery of ids of records having all n-grams of `term` (at
+    least `SEARCH_TOKEN_LENGTH` long) in their name or content.
+    """
+    tokens = tokenize(term)
+    return RecordSearchToken.objects.filter(token__in=tokens).values(
+        'record_id',
+    ).annotate(matched=Count('token')).filter(
+        matched=len(tokens),
+    ).values('record_id')
+
+
+def contains_q(term, fields=('name', 'content')):
+    """
+    Return Q of records with any of `fields` (name or content) containing
+    `term`, using the search index instead of a table scan.
+
+    Terms too short for the index match only prefixes of `fields` and
+    suffixes of names.
+    """
+    if len(term) < SEARCH_TOKEN_LENGTH:
+        q = Q()
+        for field in fields:
+            q |= Q(**{field + '__istartswith': term})
+        if 'name' in fields:
+            q |= Q(reversed_name__istartswith=term[::-1])
+        return q
+    q = Q()
+    for field in fields:
+        q |= Q(**{field + '__icontains': term})
+    return Q(pk__in=matching_record_ids(term)) & q
+
+
+def subtree_q(name):
+    """
+    Return Q of records named `name` or any name under it (eg. for
+    'example.com': 'example.com', 'www.example.com', 'a.b.example.com'),
+    as a range scan of the `reversed_name` index.
+    """
+    name = name.rstrip('.')
+    return (
+        Q(reversed_name=name[::-1]) |
+        Q(reversed_name__startswith=('.' + name)[::-1])
+    )
+
+
+def ip_records_q(ips):
+    """
+    Return Q of records related to IP addresses `ips`: their A/AAAA records
+    (found by the indexed `number`), CNAMEs pointing to and TXTs of names of
+    these records, and their PTRs. Invalid addresses are ignored.
+
+    Evaluates as a single query, however long `ips` is.
+    """
+    numbers = {'A': set(), 'AAAA': set()}
+    ptr_names = set()
+    for ip in ips:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            continue
+        numbers['A' if address.version == 4 else 'AAAA'].add(int(address))
+        ptr_names.add(reverse_pointer(str(address)))
+    if not ptr_names:
+        return Q(pk__in=[])
+    address_q = Q()
+    for type_, type_numbers in numbers.items():
+        if type_numbers:
+            address_q |= Q(type=type_, number__in=type_numbers)
+    address_names = Record.objects.filter(address_q).values('name')
+    return (
+        address_q |
+        Q(type='CNAME', content__in=address_names) |
+        Q(type='TXT', name__in=address_names) |
+        Q(type='PTR', name__in=ptr_names)
+    )
+
+
+def search_q(term):
+    """
+    Return Q of records matching search `term`: by name or content, type or
+    username of the owner.
+    """
+    q = contains_q(term)
+    if term.upper() in RECORD_TYPES:
+        q |= Q(type=term.upper())
+    owner_ids = list(get_user_model().objects.filter(
+        username__icontains=term,
+    ).values_list('pk', flat=True))
+    if owner_ids:
+        q |= Q(owner_id__in=owner_ids)
+    return q
+
+
+def rebuild_search_index(records=None, chunk_size=1000):
+    """
+    Recompute reversed names and search tokens of `records` (queryset, all
+    records by default), eg. after the index was added.
+
+    Records are read in primary key order, `chunk_size` at a time.
+    Returns number of indexed records.
+    """
+    if records is None:
+        records = Record.objects.all()
+    records = records.only('pk', 'name', 'content', 'reversed_name')
+    indexed = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            records.filter(pk__gt=last_pk).order_by('pk')[:chunk_size]
+        )
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+        bulk_update_column(Record, 'reversed_name', {
+            record.pk: record.name[::-1]
+            for record in chunk if record.reversed_name != record.name[::-1]
+        }, chunk_size)
+        index_records(chunk)
+        indexed += len(chunk)
+    return indexed
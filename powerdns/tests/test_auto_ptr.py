@@ -3,9 +3,10 @@
 from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 
-from powerdns.models import Domain, Record, get_ptr_obj
+from powerdns.models import Domain, Job, JobStates, Record, get_ptr_obj
 from .utils import (
     DomainFactory,
     DomainTemplateFactory,
@@ -185,6 +186,54 @@ class TestAutoPtr(TestCase):
             name='1.1.168.192.in-addr.arpa',
         )
 
+    def test_auto_ptr_on_creates_ptrs_for_all_records(self):
+        domain = DomainFactory(name='1.168.192.in-addr.arpa')
+        for i in range(3):
+            RecordFactory(
+                domain=self.no_ptr_domain,
+                type='A',
+                name='site{}.no-ptr--domain.com'.format(i),
+                content='192.168.1.{}'.format(i),
+            )
+
+        self.no_ptr_domain.auto_ptr = AutoPtrOptions.ONLY_IF_DOMAIN
+        self.no_ptr_domain.save()
+
+        self.assertEqual(
+            set(Record.objects.filter(domain=domain, type='PTR').values_list(
+                'name', 'content',
+            )),
+            {
+                (
+                    '{}.1.168.192.in-addr.arpa'.format(i),
+                    'site{}.no-ptr--domain.com'.format(i),
+                )
+                for i in range(3)
+            }
+        )
+
+    @override_settings(PTR_RECONCILE_INLINE_LIMIT=1)
+    def test_big_domain_ptrs_are_reconciled_by_job(self):
+        for i in range(3):
+            RecordFactory(
+                domain=self.no_ptr_domain,
+                type='A',
+                name='site{}.no-ptr--domain.com'.format(i),
+                content='192.168.1.{}'.format(i),
+            )
+
+        self.no_ptr_domain.auto_ptr = AutoPtrOptions.ALWAYS
+        self.no_ptr_domain.save()
+
+        assert_not_exists(Record, type='PTR')
+        job = Job.objects.get()
+        call_command('run_jobs', stdout=mock.Mock())
+        job.refresh_from_db()
+        self.assertEqual(job.state, JobStates.DONE)
+        self.assertEqual((job.done, job.total), (3, 3))
+        self.assertEqual(job.result, {'created': 3, 'deleted': 0})
+        self.assertEqual(Record.objects.filter(type='PTR').count(), 3)
+
     def test_default_ptr_never(self):
         """A PTR record is not created if auto_ptr set to NEVER"""
         domain = DomainFactory(name='1.168.192.in-addr.arpa')
@@ -0,0 +1,149 @@
+"""Tests for the change log of domains and records"""
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from powerdns.bulk import bulk_create_records, purge_domain
+from powerdns.models import (
+    Change,
+    Record,
+    bump_soa_serials,
+    sequence_changes,
+)
+from powerdns.utils import AutoPtrOptions
+from .utils import DomainFactory, RecordFactory
+
+
+class TestChangeLog(TestCase):
+
+    def setUp(self):
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.record = RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.1.1',
+        )
+        self.last_seq = Change.objects.order_by('-id')[0].pk
+
+    def changes(self):
+        return [
+            (change.model, change.object_id, change.action)
+            for change in Change.objects.filter(
+                id__gt=self.last_seq,
+            ).exclude(model='record', data__contains='"SOA"')
+        ]
+
+    def test_create_is_logged(self):
+        change = Change.objects.get(
+            model='record', object_id=self.record.pk,
+        )
+        self.assertEqual(change.action, Change.CREATE)
+        self.assertEqual(change.domain_id, self.domain.pk)
+        self.assertEqual(change.data['content'], '192.168.1.1')
+        self.assertEqual(change.data['domain'], self.domain.pk)
+
+    def test_update_is_logged(self):
+        self.record.content = '192.168.1.2'
+        self.record.save()
+
+        self.assertEqual(
+            self.changes(), [('record', self.record.pk, Change.UPDATE)],
+        )
+        self.assertEqual(
+            Change.objects.last().data['content'], '192.168.1.2',
+        )
+
+    def test_delete_leaves_tombstone(self):
+        pk = self.record.pk
+        self.record.delete()
+
+        self.assertEqual(self.changes(), [('record', pk, Change.DELETE)])
+
+    def test_bulk_create_is_logged(self):
+        record, = bulk_create_records([Record(
+            domain=self.domain, type='A', name='bulk.example.com',
+            content='192.168.1.3',
+        )])
+
+        self.assertEqual(
+            self.changes(), [('record', record.pk, Change.CREATE)],
+        )
+
+    def test_purge_leaves_tombstones(self):
+        domain_pk = self.domain.pk
+        purge_domain(self.domain)
+
+        self.assertIn(
+            ('record', self.record.pk, Change.DELETE), self.changes(),
+        )
+        self.assertEqual(
+            self.changes()[-1], ('domain', domain_pk, Change.DELETE),
+        )
+
+    def test_soa_bump_is_logged(self):
+        soa = RecordFactory(
+            domain=self.domain, type='SOA', name='example.com',
+            content='ns1.example.com. hostmaster.example.com. 0 43200 600 '
+                    '1209600 600',
+        )
+        Change.objects.all().delete()
+
+        bump_soa_serials([self.domain.pk])
+
+        change, = Change.objects.all()
+        self.assertEqual(
+            (change.object_id, change.action), (soa.pk, Change.UPDATE),
+        )
+        soa.refresh_from_db()
+        self.assertEqual(change.data['change_date'], soa.change_date)
+
+
+class TestSequenceChanges(TestCase):
+
+    def setUp(self):
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.last_seq = sequence_changes()
+
+    def create_record(self, i):
+        return RecordFactory(
+            domain=self.domain, type='A', name='host{}.example.com'.format(i),
+            content='192.168.1.{}'.format(i),
+        )
+
+    def sequenced(self):
+        return list(Change.objects.filter(
+            seq__gt=self.last_seq,
+        ).order_by('seq').values_list('seq', 'object_id'))
+
+    def test_rolled_back_changes_leave_no_gaps(self):
+        first = self.create_record(1)
+        try:
+            with transaction.atomic():
+                self.create_record(2)
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        last = self.create_record(3)
+
+        self.assertEqual(sequence_changes(), self.last_seq + 2)
+        self.assertEqual(self.sequenced(), [
+            (self.last_seq + 1, first.pk), (self.last_seq + 2, last.pk),
+        ])
+
+    def test_changes_are_sequenced_in_commit_order(self):
+        self.create_record(1)
+        self.create_record(2)
+        late, last = Change.objects.filter(seq__isnull=True)
+        # transaction of `late` not committed yet
+        late.delete()
+        sequence_changes()
+        late.save(force_insert=True)
+
+        self.assertEqual(sequence_changes(), self.last_seq + 2)
+        self.assertEqual(
+            [object_id for seq, object_id in self.sequenced()],
+            [last.object_id, late.object_id],
+        )
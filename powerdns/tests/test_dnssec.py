@@ -0,0 +1,166 @@
+"""Tests for DNSSEC mode detection and ordernames"""
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from powerdns.dnssec import (
+    DNSSECMode,
+    NSEC3Hasher,
+    NSEC3Params,
+    get_dnssec_mode,
+    to_wire_format,
+)
+from powerdns.models import CryptoKey, DomainMetadata, Record
+from .utils import DomainFactory, RecordFactory
+
+
+class TestDNSSECMode(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.domain = DomainFactory(name='example.com')
+        self.record = Record(
+            domain=self.domain, type='A', name='www.sub.example.com',
+            content='192.168.1.1',
+        )
+
+    def _sign(self):
+        return CryptoKey.objects.create(domain=self.domain, flags=257)
+
+    def test_unsigned_domain(self):
+        self.assertEqual(
+            get_dnssec_mode(self.domain.id), (DNSSECMode.UNSIGNED, None)
+        )
+        self.assertIsNone(self.record._generate_ordername())
+
+    def test_mode_is_resolved_without_queries_when_cached(self):
+        get_dnssec_mode(self.domain.id)
+        with self.assertNumQueries(0):
+            self.record._generate_ordername()
+
+    def test_nsec_mode(self):
+        self._sign()
+        self.assertEqual(
+            get_dnssec_mode(self.domain.id)[0], DNSSECMode.NSEC
+        )
+        self.assertEqual(self.record._generate_ordername(), 'sub www')
+
+    def test_nsec3_narrow_mode(self):
+        self._sign()
+        DomainMetadata.objects.create(
+            domain=self.domain, kind='NSEC3PARAM', content='1 0 1 ab',
+        )
+        DomainMetadata.objects.create(
+            domain=self.domain, kind='NSEC3NARROW', content='1',
+        )
+        self.assertEqual(self.record._generate_ordername(), '')
+
+    def test_nsec3_mode_parses_params(self):
+        self._sign()
+        DomainMetadata.objects.create(
+            domain=self.domain, kind='NSEC3PARAM', content='1 0 10 ab12',
+        )
+        mode, params = get_dnssec_mode(self.domain.id)
+        self.assertEqual(mode, DNSSECMode.NSEC3)
+        self.assertEqual(params.iterations, 10)
+        self.assertEqual(params.salt, 'ab12')
+
+    def test_cache_is_invalidated_when_keys_change(self):
+        self.assertEqual(
+            get_dnssec_mode(self.domain.id)[0], DNSSECMode.UNSIGNED
+        )
+        key = self._sign()
+        self.assertEqual(
+            get_dnssec_mode(self.domain.id)[0], DNSSECMode.NSEC
+        )
+        key.delete()
+        self.assertEqual(
+            get_dnssec_mode(self.domain.id)[0], DNSSECMode.UNSIGNED
+        )
+
+
+class TestNSEC3Hasher(TestCase):
+    # test vectors from RFC 5155, appendix A
+    params = NSEC3Params(1, 1, 12, 'aabbccdd')
+
+    def test_wire_format(self):
+        self.assertEqual(
+            to_wire_format('WWW.example.com.'),
+            b'\x03www\x07example\x03com\x00',
+        )
+
+    def test_hash_name(self):
+        hasher = NSEC3Hasher(self.params)
+        self.assertEqual(
+            hasher.hash_name('example'), '0p9mhaveqvm6t7vbl5lop2u3t2rp3tom'
+        )
+        self.assertEqual(
+            hasher.hash_name('a.example'), '35mthgpgcu1qg68fab165klnsnk3dpvl'
+        )
+
+    def test_hash_names(self):
+        hashes = NSEC3Hasher(self.params).hash_names(
+            ['example', 'a.example', 'example']
+        )
+        self.assertEqual(hashes, {
+            'example': '0p9mhaveqvm6t7vbl5lop2u3t2rp3tom',
+            'a.example': '35mthgpgcu1qg68fab165klnsnk3dpvl',
+        })
+
+    def test_empty_salt(self):
+        hasher = NSEC3Hasher(NSEC3Params(1, 0, 0, '-'))
+        self.assertEqual(hasher.salt, b'')
+        self.assertEqual(len(hasher.hash_name('example.com')), 32)
+
+    def test_incompatible_algorithm(self):
+        with self.assertRaises(ValueError):
+            NSEC3Hasher(NSEC3Params(2, 1, 12, 'aabbccdd'))
+
+
+class TestRebuildOrdernames(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.domain = DomainFactory(name='example')
+        CryptoKey.objects.create(domain=self.domain, flags=257)
+        DomainMetadata.objects.create(
+            domain=self.domain, kind='NSEC3PARAM', content='1 0 12 aabbccdd',
+        )
+
+    def test_record_ordername_in_nsec3_mode(self):
+        record = RecordFactory(
+            domain=self.domain, type='A', name='a.example',
+            content='192.168.1.1',
+        )
+        self.assertEqual(
+            record.ordername, '35mthgpgcu1qg68fab165klnsnk3dpvl'
+        )
+
+    def test_rebuild_ordernames_command(self):
+        records = [
+            RecordFactory(
+                domain=self.domain, type='A', name=name,
+                content='192.168.1.{}'.format(i),
+            )
+            for i, name in enumerate(['example', 'a.example', 'a.example'])
+        ]
+        Record.objects.filter(
+            pk__in=[r.pk for r in records]
+        ).update(ordername='stale')
+        out = StringIO()
+        call_command(
+            'rebuild_ordernames', domain=['example'], chunk_size=2, stdout=out
+        )
+        self.assertIn('Updated ordernames of 3 records', out.getvalue())
+        self.assertEqual(
+            dict(Record.objects.filter(
+                domain=self.domain, type='A'
+            ).values_list('name', 'ordername')),
+            {
+                'example': '0p9mhaveqvm6t7vbl5lop2u3t2rp3tom',
+                'a.example': '35mthgpgcu1qg68fab165klnsnk3dpvl',
+            },
+        )
@@ -1,7 +1,11 @@
 # -*- encoding: utf-8 -*-
 
+import time
 
-from powerdns.models import Record
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from powerdns.models import Record, bump_soa_serials, coalesce_serial_bumps
 from .utils import RecordTestCase, RecordFactory
 
 
@@ -42,3 +46,46 @@ class TestSOASerialUpdate(RecordTestCase):
         self.a_record.delete()
         new_serial = Record.objects.get(pk=self.soa_record.pk).change_date
         self.assertGreater(new_serial, old_serial)
+
+    def test_soa_update_on_record_save(self):
+        self.a_record.content = '192.168.1.2'
+        self.a_record.save()
+        self.assertGreater(
+            Record.objects.get(pk=self.soa_record.pk).change_date,
+            1432720132,
+        )
+
+    def _soa_updates(self, queries):
+        return [
+            q for q in queries
+            if 'UPDATE "records" SET "change_date"' in q['sql']
+        ]
+
+    def test_soa_is_bumped_once_per_block(self):
+        with CaptureQueriesContext(connection) as queries:
+            with coalesce_serial_bumps():
+                self.a_record.delete()
+                self.cname_record.content = 'www2.example.com'
+                self.cname_record.save()
+        self.assertEqual(len(self._soa_updates(queries)), 1)
+        self.assertGreater(
+            Record.objects.get(pk=self.soa_record.pk).change_date,
+            1432720132,
+        )
+
+    def test_soa_is_bumped_once_per_queryset_delete(self):
+        with CaptureQueriesContext(connection) as queries:
+            Record.objects.filter(domain=self.domain).exclude(
+                type='SOA'
+            ).delete()
+        self.assertEqual(len(self._soa_updates(queries)), 1)
+
+    def test_soa_bump_is_monotonic(self):
+        future = int(time.time()) + 100
+        Record.objects.filter(pk=self.soa_record.pk).update(
+            change_date=future
+        )
+        bump_soa_serials([self.domain.id])
+        self.assertEqual(
+            Record.objects.get(pk=self.soa_record.pk).change_date, future + 1
+        )
@@ -0,0 +1,111 @@
+"""Tests for lookups of records related to hosts"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from powerdns.hosts import get_host_records
+from powerdns.utils import AutoPtrOptions
+from .utils import DomainFactory, RecordFactory
+
+
+class TestHostRecords(TestCase):
+
+    def setUp(self):
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.reverse_domain = DomainFactory(
+            name='1.168.192.in-addr.arpa', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.www = RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.1.1',
+        )
+        self.www_v6 = RecordFactory(
+            domain=self.domain, type='AAAA', name='www.example.com',
+            content='2001:db8::1',
+        )
+        self.ptr = RecordFactory(
+            domain=self.reverse_domain, type='PTR',
+            name='1.1.168.192.in-addr.arpa', content='www.example.com',
+            depends_on=self.www,
+        )
+        self.txt = RecordFactory(
+            domain=self.domain, type='TXT', name='www.example.com',
+            content='Rack 1',
+        )
+        self.cname = RecordFactory(
+            domain=self.domain, type='CNAME', name='blog.example.com',
+            content='www.example.com',
+        )
+        self.other = RecordFactory(
+            domain=self.domain, type='A', name='other.example.com',
+            content='192.168.1.2',
+        )
+
+    def ids(self, records):
+        return {
+            type_: {record['id'] for record in type_records}
+            for type_, type_records in records.items() if type_records
+        }
+
+    def test_records_of_hostname(self):
+        records = get_host_records(['www.example.com'])['www.example.com']
+
+        self.assertEqual(self.ids(records), {
+            'A': {self.www.pk},
+            'AAAA': {self.www_v6.pk},
+            'PTR': {self.ptr.pk},
+            'TXT': {self.txt.pk},
+            'CNAME': {self.cname.pk},
+        })
+
+    def test_records_of_address(self):
+        records = get_host_records(['192.168.1.1'])['192.168.1.1']
+
+        self.assertEqual(self.ids(records), {
+            'A': {self.www.pk},
+            'PTR': {self.ptr.pk},
+            'TXT': {self.txt.pk},
+            'CNAME': {self.cname.pk},
+        })
+
+    def test_hosts_are_kept_apart_in_request_order(self):
+        results = get_host_records(
+            ['other.example.com', 'www.example.com', 'missing.example.com'],
+        )
+
+        self.assertEqual(list(results), [
+            'other.example.com', 'www.example.com', 'missing.example.com',
+        ])
+        self.assertEqual(
+            self.ids(results['other.example.com']), {'A': {self.other.pk}},
+        )
+        self.assertEqual(self.ids(results['missing.example.com']), {})
+
+    def test_number_of_queries_is_fixed(self):
+        hosts = ['host{}.example.com'.format(i) for i in range(50)]
+        hosts += ['10.0.0.{}'.format(i) for i in range(50)]
+
+        with CaptureQueriesContext(connection) as context:
+            get_host_records(hosts)
+
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_lookups_are_chunked(self):
+        hosts = ['host{}.example.com'.format(i) for i in range(600)]
+        hosts += ['www.example.com', '192.168.1.2']
+
+        with CaptureQueriesContext(connection) as context:
+            results = get_host_records(hosts)
+
+        # 602 names and addresses, then 602 names for both TXTs and CNAMEs
+        # (and a few PTR lookups) - in chunks of 500 values
+        self.assertEqual(len(context.captured_queries), 2 + 3)
+        self.assertEqual(
+            self.ids(results['www.example.com'])['CNAME'], {self.cname.pk},
+        )
+        self.assertEqual(
+            self.ids(results['192.168.1.2']), {'A': {self.other.pk}},
+        )
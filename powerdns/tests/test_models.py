@@ -2,10 +2,11 @@
 
 from django.test import TestCase
 
-from powerdns.models import OwnershipType
+from powerdns.models import OwnershipType, Record
 from powerdns.tests.utils import (
     DomainFactory,
     DomainOwnerFactory,
+    RecordFactory,
     ServiceFactory,
     ServiceOwnerFactory,
     UserFactory,
@@ -29,6 +30,39 @@ class TestDomain(TestCase):
         )
 
 
+class TestPreviousState(TestCase):
+
+    def test_original_values_of_tracked_fields(self):
+        record = RecordFactory(
+            type='A', name='www.example.com', content='192.168.1.1',
+        )
+        record = Record.objects.get(pk=record.pk)
+        record.content = '192.168.1.2'
+        record.content = '192.168.1.3'
+
+        self.assertEqual(record._original_values, {
+            'content': '192.168.1.1',
+            'name': 'www.example.com',
+        })
+
+    def test_original_values_are_reset_by_save(self):
+        record = RecordFactory(
+            type='A', name='www.example.com', content='192.168.1.1',
+        )
+        record.content = '192.168.1.2'
+        record.save()
+
+        self.assertEqual(record._original_values['content'], '192.168.1.2')
+
+    def test_deferred_tracked_field_is_loaded(self):
+        record = RecordFactory(
+            type='A', name='www.example.com', content='192.168.1.1',
+        )
+        record = Record.objects.only('id').get(pk=record.pk)
+
+        self.assertEqual(record._original_values['name'], 'www.example.com')
+
+
 class TestServiceOwners(TestCase):
     def test_returns_service_owner_when_no_direct_owners(self):
         users = UserFactory.create_batch(2)
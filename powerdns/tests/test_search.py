@@ -0,0 +1,129 @@
+"""Tests for the search index of records"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from powerdns.bulk import bulk_create_records, purge_domain
+from powerdns.models import Record, RecordSearchToken, tokenize
+from powerdns.search import contains_q, search_q, subtree_q
+from powerdns.utils import AutoPtrOptions
+from .utils import DomainFactory, RecordFactory, UserFactory
+
+
+class TestRecordSearch(TestCase):
+
+    def setUp(self):
+        self.domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.www = RecordFactory(
+            domain=self.domain, type='A', name='www.example.com',
+            content='192.168.1.1',
+        )
+        self.mail = RecordFactory(
+            domain=self.domain, type='MX', name='example.com',
+            content='mail.example.com',
+        )
+
+    def search(self, q):
+        return set(Record.objects.filter(q))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('WWW.ex'), {'www', 'ww.', 'w.e', '.ex'})
+        self.assertEqual(tokenize('ab'), set())
+        self.assertEqual(tokenize(None), set())
+
+    def test_saved_record_is_indexed(self):
+        self.assertEqual(
+            set(self.www.search_tokens.values_list('token', flat=True)),
+            tokenize('www.example.com') | tokenize('192.168.1.1'),
+        )
+
+    def test_changed_record_is_reindexed(self):
+        self.www.name = 'web.example.com'
+        self.www.save()
+        self.assertEqual(self.search(contains_q('web.')), {self.www})
+        self.assertEqual(self.search(contains_q('www')), set())
+
+    def test_record_changed_back_is_reindexed(self):
+        self.www.name = 'web.example.com'
+        self.www.save()
+        self.www.name = 'www.example.com'
+        self.www.save()
+        self.assertEqual(self.search(contains_q('www')), {self.www})
+        self.assertEqual(self.search(contains_q('web.')), set())
+
+    def test_contains_by_field(self):
+        self.assertEqual(
+            self.search(contains_q('mail', fields=('name',))), set(),
+        )
+        self.assertEqual(
+            self.search(contains_q('mail', fields=('content',))),
+            {self.mail},
+        )
+
+    def test_contains_matches_whole_term(self):
+        record = RecordFactory(
+            domain=self.domain, type='CNAME', name='abc.bcd.example.com',
+            content='www.example.com',
+        )
+        # has all trigrams of 'abcd', but doesn't contain it
+        self.assertEqual(self.search(contains_q('abcd')), set())
+        self.assertEqual(self.search(contains_q('abc.b')), {record})
+
+    def test_short_term_matches_prefix_and_suffix(self):
+        self.assertEqual(self.search(contains_q('ww')), {self.www})
+        self.assertEqual(
+            self.search(contains_q('om', fields=('name',))),
+            {self.www, self.mail},
+        )
+
+    def test_search_by_type_and_owner(self):
+        owner = UserFactory(username='mailmaster')
+        Record.objects.filter(pk=self.www.pk).update(owner=owner)
+        self.assertEqual(self.search(search_q('mx')), {self.mail})
+        self.assertEqual(
+            self.search(search_q('mailmaster')), {self.www},
+        )
+
+    def test_bulk_created_records_are_indexed(self):
+        record, = bulk_create_records([Record(
+            domain=self.domain, type='A', name='bulk.example.com',
+            content='192.168.1.2',
+        )])
+        self.assertEqual(self.search(contains_q('bulk')), {record})
+
+    def test_purged_records_lose_tokens(self):
+        purge_domain(self.domain)
+        self.assertFalse(RecordSearchToken.objects.exists())
+
+    def test_rebuild_command(self):
+        RecordSearchToken.objects.all().delete()
+        Record.objects.update(reversed_name=None)
+
+        out = StringIO()
+        call_command(
+            'rebuild_search_index', domain=['example.com'], stdout=out,
+        )
+
+        self.assertIn('Indexed 2 records', out.getvalue())
+        self.assertEqual(self.search(contains_q('www.')), {self.www})
+        self.assertEqual(
+            Record.objects.get(pk=self.www.pk).reversed_name,
+            'moc.elpmaxe.www',
+        )
+
+    def test_subtree(self):
+        sub = RecordFactory(
+            domain=self.domain, type='A', name='a.www.example.com',
+            content='192.168.1.3',
+        )
+        RecordFactory(
+            domain=self.domain, type='A', name='awww.example.com',
+            content='192.168.1.4',
+        )
+        self.assertEqual(
+            self.search(subtree_q('www.example.com')), {self.www, sub},
+        )
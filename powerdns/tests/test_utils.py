@@ -1,6 +1,20 @@
+from unittest import mock
+
 from django.test import TestCase
 
-from powerdns.utils import to_reverse, reverse_pointer
+from powerdns.models import Counter, Domain
+from powerdns.utils import (
+    DOMAIN_TRIE_COUNTER,
+    DomainTrie,
+    RecordConflict,
+    find_domain_for_record,
+    find_domains_for_records,
+    find_record_conflicts,
+    get_domain_trie,
+    reverse_pointer,
+    to_reverse,
+)
+from .utils import DomainFactory, RecordFactory
 
 
 class TestReversing(TestCase):
@@ -29,3 +43,123 @@ class TestReversing(TestCase):
         last_byte, domain = to_reverse(self.ipv6)
         self.assertEqual(domain, 'a.7.5.8.2.4.1.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.8.b.d.0.1.0.0.2.ip6.arpa')  # noqa
         self.assertEqual(last_byte, 'b')
+
+
+class TestFindDomains(TestCase):
+    def test_finds_longest_matching_domain_for_every_name(self):
+        DomainFactory(name='example.com')
+        sub = DomainFactory(name='sub.example.com')
+        reverse = DomainFactory(name='168.192.in-addr.arpa')
+
+        domains = find_domains_for_records([
+            'www.sub.example.com',
+            'sub.example.com',
+            '1.1.168.192.in-addr.arpa',
+            'www.example.org',
+        ])
+
+        self.assertEqual(domains['www.sub.example.com'], sub)
+        self.assertEqual(domains['sub.example.com'], sub)
+        self.assertEqual(domains['1.1.168.192.in-addr.arpa'], reverse)
+        self.assertIsNone(domains['www.example.org'])
+
+
+class TestDomainTrie(TestCase):
+    def test_lookup_returns_longest_suffix(self):
+        trie = DomainTrie([('example.com', 1), ('sub.example.com', 2)])
+
+        self.assertEqual(trie.lookup('example.com'), 1)
+        self.assertEqual(trie.lookup('www.example.com'), 1)
+        self.assertEqual(trie.lookup('www.sub.example.com'), 2)
+        self.assertIsNone(trie.lookup('com'))
+        self.assertIsNone(trie.lookup('www.example.org'))
+
+    def test_trie_follows_domain_changes(self):
+        domain = DomainFactory(name='example.com')
+        self.assertEqual(find_domain_for_record('www.example.com'), domain)
+
+        domain.name = 'example.org'
+        domain.save()
+        self.assertIsNone(find_domain_for_record('www.example.com'))
+        self.assertEqual(find_domain_for_record('www.example.org'), domain)
+
+        domain.delete()
+        self.assertIsNone(find_domain_for_record('www.example.org'))
+
+    def test_trie_is_rebuilt_when_counter_changes(self):
+        get_domain_trie()
+        # change done by another process: no signals, only the counter
+        Domain.objects.bulk_create([Domain(name='sub.example.net')])
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_domain_trie().lookup('www.sub.example.net'))
+
+        Counter.increment(DOMAIN_TRIE_COUNTER)
+        self.assertIsNotNone(
+            find_domain_for_record('www.sub.example.net'),
+        )
+
+    def test_trie_is_rebuilt_when_domain_is_missing(self):
+        domain = DomainFactory(name='example.net')
+        get_domain_trie()
+        # recreated by another process, without bumping the counter
+        with mock.patch('powerdns.models.powerdns.invalidate_domain_trie'):
+            domain.delete()
+            Domain.objects.bulk_create([Domain(name='example.net')])
+
+        self.assertEqual(
+            find_domain_for_record('www.example.net'),
+            Domain.objects.get(name='example.net'),
+        )
+
+
+class TestFindRecordConflicts(TestCase):
+    def setUp(self):
+        domain = DomainFactory(name='example.com')
+        self.a_record = RecordFactory(
+            domain=domain, type='A', name='www.example.com',
+            content='192.168.1.1',
+        )
+        self.cname_record = RecordFactory(
+            domain=domain, type='CNAME', name='blog.example.com',
+            content='www.example.com',
+        )
+
+    def test_conflicts_are_found_with_single_query(self):
+        with self.assertNumQueries(1):
+            conflicts = find_record_conflicts([
+                ('www.example.com', 'CNAME'),
+                ('blog.example.com', 'A'),
+                ('wiki.example.com', 'A'),
+                ('wiki.example.com', 'CNAME'),
+            ])
+
+        self.assertEqual(conflicts, {
+            0: [RecordConflict(
+                RecordConflict.CNAME, [self.a_record.id], None,
+            )],
+            1: [RecordConflict(
+                RecordConflict.CNAME_EXISTS, [self.cname_record.id], None,
+            )],
+            3: [RecordConflict(RecordConflict.CNAME, (), 2)],
+        })
+        self.assertEqual(
+            conflicts[3][0].message, 'Conflicts with item 2 of the batch'
+        )
+
+    def test_duplicates_are_found_when_content_is_given(self):
+        conflicts = find_record_conflicts([
+            ('www.example.com', 'A', '192.168.1.1'),
+            ('www.example.com', 'A', '192.168.1.2'),
+        ])
+
+        self.assertEqual(conflicts, {
+            0: [RecordConflict(
+                RecordConflict.DUPLICATE, [self.a_record.id], None,
+            )],
+        })
+
+    def test_excluded_records_dont_conflict(self):
+        self.assertEqual(find_record_conflicts(
+            [('blog.example.com', 'CNAME')],
+            exclude_ids=[self.cname_record.id],
+        ), {})
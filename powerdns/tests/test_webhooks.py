@@ -0,0 +1,137 @@
+"""Tests for delivery of changes to webhooks"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from powerdns.events import Webhook, dispatch, dispatch_events
+from powerdns.models import Change, ChangeCursor, sequence_changes
+from powerdns.utils import AutoPtrOptions
+from .utils import DomainFactory, RecordFactory
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server = self.server
+        if server.failures:
+            server.failures -= 1
+            self.send_response(500)
+        else:
+            server.batches.append(json.loads(body.decode('utf-8')))
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestWebhooks(TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.batches = []
+        self.server.failures = 0
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.webhook = Webhook(
+            name='stub', batch_size=2, concurrency=2,
+            url='http://127.0.0.1:{}/'.format(self.server.server_port),
+        )
+        # starts at the end of the log
+        ChangeCursor.get_for(self.webhook.name)
+        domain = DomainFactory(
+            name='example.com', auto_ptr=AutoPtrOptions.NEVER,
+        )
+        self.records = [
+            RecordFactory(
+                domain=domain, type='A',
+                name='host{}.example.com'.format(i),
+                content='192.168.5.{}'.format(i),
+            )
+            for i in range(3)
+        ]
+        self.seqs = list(range(
+            ChangeCursor.get_for('stub').seq + 1, sequence_changes() + 1,
+        ))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def delivered_seqs(self):
+        return sorted(
+            event['seq']
+            for batch in self.server.batches for event in batch['events']
+        )
+
+    def test_changes_are_delivered_in_batches(self):
+        while dispatch_events([self.webhook]):
+            pass
+
+        self.assertEqual(self.delivered_seqs(), self.seqs)
+        self.assertTrue(all(
+            len(batch['events']) <= 2 for batch in self.server.batches
+        ))
+        self.assertEqual(
+            ChangeCursor.get_for('stub').seq, self.seqs[-1],
+        )
+        self.assertEqual(dispatch_events([self.webhook]), 0)
+
+    def test_failed_delivery_is_retried_after_backoff(self):
+        self.server.failures = 2
+
+        self.assertLess(dispatch(self.webhook, now=100), 4)
+        self.assertFalse(self.webhook.is_due(100))
+        self.assertEqual(dispatch_events([self.webhook], now=100), 0)
+
+        while dispatch_events([self.webhook], now=1000):
+            pass
+
+        self.assertEqual(sorted(set(self.delivered_seqs())), self.seqs)
+        self.assertEqual(ChangeCursor.get_for('stub').seq, self.seqs[-1])
+        self.assertEqual(self.webhook.failures, 0)
+
+    def test_rolled_back_changes_dont_hold_back_others(self):
+        try:
+            with transaction.atomic():
+                self.records[0].delete()
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        deleted_pk = self.records[1].pk
+        self.records[1].delete()
+
+        while dispatch_events([self.webhook]):
+            pass
+
+        last_seq = self.seqs[-1] + 1
+        self.assertEqual(self.delivered_seqs(), self.seqs + [last_seq])
+        self.assertEqual(
+            Change.objects.get(seq=last_seq).object_id, deleted_pk,
+        )
+
+    def test_late_commits_are_delivered(self):
+        late = Change.objects.get(seq=self.seqs[1])
+        # as if its transaction wasn't committed yet
+        late.delete()
+
+        while dispatch_events([self.webhook]):
+            pass
+        late.seq = None
+        late.save(force_insert=True)
+        while dispatch_events([self.webhook]):
+            pass
+
+        last_seq = self.seqs[-1] + 1
+        self.assertEqual(
+            self.delivered_seqs(),
+            self.seqs[:1] + self.seqs[2:] + [last_seq],
+        )
+        self.assertEqual(Change.objects.get(seq=last_seq).pk, late.pk)
+        self.assertEqual(ChangeCursor.get_for('stub').seq, last_seq)
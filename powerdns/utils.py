@@ -1,6 +1,7 @@
 """Utilities for powerdns models"""
 
 import ipaddress
+from collections import namedtuple
 
 from django import VERSION
 from django.conf import settings
@@ -11,6 +12,7 @@ from django.core.validators import (
     RegexValidator
 )
 from django.db import models
+from django.db.models import Case, Value, When
 from django.utils.translation import ugettext_lazy as _
 from dj.choices import Choices
 
@@ -258,29 +260,14 @@ class RecordLike(models.Model):
 
     def validate_for_conflicts(self):
         """Ensure this record doesn't conflict with other records."""
-        from .models import Record
-
-        def check_unique(comment, **kwargs):
-            conflicting = Record.objects.filter(**kwargs)
-            record_pk = self.get_record_pk()
-            if record_pk is not None:
-                conflicting = conflicting.exclude(pk=record_pk)
-            if conflicting:
-                raise ValidationError(comment.format(
-                    ', '.join(str(record.id) for record in conflicting)
-                ))
-        if self.get_field('type') == 'CNAME':
-            check_unique(
-                'Cannot create CNAME record. Following conflicting '
-                'records exist: {}',
-                name=self.get_field('name'),
-            )
-        else:
-            check_unique(
-                'Cannot create a record. Following conflicting CNAME'
-                'record exists: {}',
-                type='CNAME',
-                name=self.get_field('name'),
+        record_pk = self.get_record_pk()
+        conflicts = find_record_conflicts(
+            [(self.get_field('name'), self.get_field('type'))],
+            exclude_ids=[record_pk] if record_pk is not None else (),
+        )
+        if conflicts:
+            raise ValidationError(
+                '; '.join(conflict.message for conflict in conflicts[0])
             )
 
     def force_case(self):
@@ -291,6 +278,110 @@ class RecordLike(models.Model):
             self.set_field('type', self.get_field('type').upper())
 
 
+class RecordConflict(
+    namedtuple('RecordConflict', ['reason', 'record_ids', 'item'])
+):
+    """
+    Conflict of a candidate record with existing records (`record_ids`) or
+    with another candidate of the same batch (its index is `item`).
+    """
+    __slots__ = ()
+
+    DUPLICATE = 'duplicate'
+    # CNAME candidate and other records of the same name
+    CNAME = 'cname'
+    # candidate and a CNAME of the same name
+    CNAME_EXISTS = 'cname-exists'
+
+    @property
+    def message(self):
+        if self.item is not None:
+            return 'Conflicts with item {} of the batch'.format(self.item)
+        ids = ', '.join(str(pk) for pk in self.record_ids)
+        if self.reason == self.DUPLICATE:
+            return 'Record already exists: {}'.format(ids)
+        if self.reason == self.CNAME:
+            return (
+                'Cannot create CNAME record. Following conflicting records '
+                'exist: {}'.format(ids)
+            )
+        return (
+            'Cannot create a record. Following conflicting CNAME record '
+            'exists: {}'.format(ids)
+        )
+
+
+CONFLICTS_CHUNK_SIZE = 500
+
+
+def find_record_conflicts(candidates, exclude_ids=()):
+    """
+    Check `candidates` - (name, type) or (name, type, content) tuples -
+    against existing records (except `exclude_ids`) and against each other,
+    with a single query (per 500 names). Exact duplicates are reported only
+    for candidates with content.
+
+    Returns dict mapping index of every conflicting candidate to a list of
+    RecordConflicts.
+    """
+    from .models import Record
+    names = list({candidate[0] for candidate in candidates})
+    with_content = any(len(candidate) > 2 for candidate in candidates)
+    existing = Record.objects.exclude(pk__in=exclude_ids)
+    if not with_content and all(c[1] != 'CNAME' for c in candidates):
+        existing = existing.filter(type='CNAME')
+    by_name = {}
+    for i in range(0, len(names), CONFLICTS_CHUNK_SIZE):
+        for pk, name, type_, content in existing.filter(
+            name__in=names[i:i + CONFLICTS_CHUNK_SIZE],
+        ).values_list('id', 'name', 'type', 'content'):
+            by_name.setdefault(name, []).append((pk, type_, content))
+
+    conflicts = {}
+    seen = {}
+    for index, candidate in enumerate(candidates):
+        name, type_ = candidate[:2]
+        content = candidate[2] if len(candidate) > 2 else None
+        item_conflicts = []
+        same_name = by_name.get(name, [])
+        duplicates = [
+            pk for pk, t, c in same_name
+            if content is not None and (t, c) == (type_, content)
+        ]
+        if duplicates:
+            item_conflicts.append(RecordConflict(
+                RecordConflict.DUPLICATE, duplicates, None,
+            ))
+        if type_ == 'CNAME':
+            conflicting = [
+                pk for pk, _, _ in same_name if pk not in duplicates
+            ]
+            reason = RecordConflict.CNAME
+        else:
+            conflicting = [pk for pk, t, _ in same_name if t == 'CNAME']
+            reason = RecordConflict.CNAME_EXISTS
+        if conflicting:
+            item_conflicts.append(RecordConflict(reason, conflicting, None))
+        for other_index, other_type, other_content in seen.get(name, []):
+            if (
+                content is not None and
+                (other_type, other_content) == (type_, content)
+            ):
+                item_conflicts.append(RecordConflict(
+                    RecordConflict.DUPLICATE, (), other_index,
+                ))
+            elif 'CNAME' in (type_, other_type):
+                item_conflicts.append(RecordConflict(
+                    RecordConflict.CNAME
+                    if type_ == 'CNAME' else RecordConflict.CNAME_EXISTS,
+                    (), other_index,
+                ))
+        seen.setdefault(name, []).append((index, type_, content))
+        if item_conflicts:
+            conflicts[index] = item_conflicts
+    return conflicts
+
+
 def flat_dict_diff(old_dict, new_dict):
     """
     return: {
@@ -324,6 +415,73 @@ def patterns(prefix, *args):
         return list(args)
 
 
+class DomainTrie(object):
+    """
+    Trie of domain names by their labels (from the top level one), answering
+    which domain is the longest suffix of a name.
+    """
+
+    def __init__(self, domains=()):
+        self.root = {}
+        for name, domain_id in domains:
+            self.add(name, domain_id)
+
+    def add(self, name, domain_id):
+        node = self.root
+        for label in reversed(name.split('.')):
+            node = node.setdefault(label, {})
+        # labels are strings, so None can't collide with them
+        node[None] = domain_id
+
+    def lookup(self, name):
+        """Return id of the domain matching `name` or None"""
+        node = self.root
+        domain_id = None
+        for label in reversed(name.split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            domain_id = node.get(None, domain_id)
+        return domain_id
+
+
+DOMAIN_TRIE_COUNTER = 'domain-names'
+# (counter value, DomainTrie) - replaced as a whole, so it's thread safe
+_domain_trie = (None, None)
+
+
+def get_domain_trie(rebuild=False):
+    """
+    Return process-local DomainTrie of all domains.
+
+    It's rebuilt when the domain names counter (incremented by every process
+    changing domain names, see `invalidate_domain_trie`) differs from the
+    value it was built for, which costs one single row query per call, or
+    when `rebuild` is set.
+    """
+    from .models import Counter, Domain
+    global _domain_trie
+    built_for, trie = _domain_trie
+    value = Counter.get_value(DOMAIN_TRIE_COUNTER)
+    if rebuild or trie is None or built_for != value:
+        trie = DomainTrie(Domain.objects.values_list('name', 'id'))
+        _domain_trie = (value, trie)
+    return trie
+
+
+def invalidate_domain_trie():
+    """Mark domain tries of all processes as stale"""
+    from .models import Counter
+    global _domain_trie
+    Counter.increment(DOMAIN_TRIE_COUNTER)
+    _domain_trie = (None, None)
+
+
+def find_domain_id_for_record(record_name):
+    """Returns id of the Domain matching to provided name or None"""
+    return get_domain_trie().lookup(record_name)
+
+
 def find_domain_for_record(record_name):
     """
     Returns matching to provided name Domain object instances.
@@ -336,18 +494,57 @@ def find_domain_for_record(record_name):
     >>> get_matching_domains(sub-domain.on.existing-domain.com)
         <Domain: existing-domain.com>
     """
+    return find_domains_for_records([record_name])[record_name]
+
+
+def find_domains_for_records(record_names):
+    """
+    Batch version of `find_domain_for_record`.
+
+    Returns dict mapping every name from `record_names` to its best matching
+    Domain (or None), resolved with a single query. When a matched domain
+    no longer exists (deleted without bumping the domain names counter) the
+    trie is rebuilt and the lookup repeated.
+    """
     from .models import Domain
-    chunks = record_name.split('.')
+    record_names = set(record_names)
+    for rebuild in (False, True):
+        trie = get_domain_trie(rebuild=rebuild)
+        domain_ids = {
+            record_name: trie.lookup(record_name)
+            for record_name in record_names
+        }
+        ids = {domain_id for domain_id in domain_ids.values() if domain_id}
+        domains = Domain.objects.select_related(
+            'template', 'reverse_template',
+        ).in_bulk(ids) if ids else {}
+        if len(domains) == len(ids):
+            break
+    return {
+        record_name: domains.get(domain_id)
+        for record_name, domain_id in domain_ids.items()
+    }
 
-    search_partial_domains = [
-        '.'.join(chunks[i:]) for i in range(len(chunks))
-    ]
 
-    matching_domains = Domain.objects.filter(name__in=search_partial_domains)
-    matching_domains = sorted(
-        matching_domains, key=lambda domain: len(domain.name), reverse=True
-    )
-    if matching_domains:
-        return matching_domains[0]
-    else:
-        return None
+def chunks(items, size=500):
+    """Yield lists of at most `size` consecutive items of `items`"""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def bulk_update_column(model, field_name, values_by_pk, chunk_size=500):
+    """
+    Set `field_name` of `model` rows to values from `values_by_pk` dict
+    ({pk: value}), with a single UPDATE ... CASE statement per chunk.
+    """
+    field = model._meta.get_field(field_name)
+    pks = list(values_by_pk)
+    for i in range(0, len(pks), chunk_size):
+        chunk = pks[i:i + chunk_size]
+        model.objects.filter(pk__in=chunk).update(**{
+            field_name: Case(
+                *[When(pk=pk, then=Value(values_by_pk[pk])) for pk in chunk],
+                output_field=field
+            )
+        })
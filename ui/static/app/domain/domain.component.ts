@@ -30,6 +30,11 @@ export class DomainComponent extends SearchComponent implements OnInit {
   currentOffset: number = 0;
   perPage: number = 100;
   totalCount: number;
+  // cursor pagination (`;pagination=cursor` route param) skips counting
+  cursorMode: boolean = false;
+  cursor: string = null;
+  nextUrl: string = null;
+  previousUrl: string = null;
   searchValue: string = "";
   additionalRouteParams: {[key: string]: string} = {
     "search": null
@@ -47,6 +52,10 @@ export class DomainComponent extends SearchComponent implements OnInit {
   ngOnInit() {
     let url_offset: string = this.routeParams.get("offset");
     this.currentOffset = url_offset ? Number(url_offset) : 0;
+    this.cursor = this.routeParams.get("cursor");
+    this.cursorMode = (
+      this.cursor !== null || this.routeParams.get("pagination") === "cursor"
+    );
     let search: string = this.routeParams.get("search");
     this.searchValue = (search !== null) ? search : "";
     this.getDomains();
@@ -61,7 +70,15 @@ export class DomainComponent extends SearchComponent implements OnInit {
   getDomains() {
     let params: URLSearchParams = new URLSearchParams();
     params.set("limit", String(this.perPage));
-    params.set("offset", String(this.currentOffset));
+    if (this.cursorMode) {
+      params.set("pagination", "cursor");
+      this.additionalRouteParams["pagination"] = "cursor";
+      if (this.cursor) {
+        params.set("cursor", this.cursor);
+      }
+    } else {
+      params.set("offset", String(this.currentOffset));
+    }
     this.additionalRouteParams["search"] = this.searchValue;
 
     if (this.searchValue) {
@@ -74,6 +91,8 @@ export class DomainComponent extends SearchComponent implements OnInit {
       (json) => {
         this.totalCount = json.count;
         this.domains = json.results;
+        this.nextUrl = this.cursorMode ? json.next : null;
+        this.previousUrl = this.cursorMode ? json.previous : null;
       },
       error => this.errorMessage = <any>error
     );
@@ -81,6 +100,8 @@ export class DomainComponent extends SearchComponent implements OnInit {
 
   search(value: string) {
     this.currentOffset = 0;
+    this.cursor = null;
+    delete this.additionalRouteParams["cursor"];
     if (value.length > 1) {
       this.searchValue = value;
       this.getDomains();
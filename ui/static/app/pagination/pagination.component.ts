@@ -36,6 +36,22 @@ import { Router } from "@angular/router-deprecated";
         </ul>
       </nav>
     </div>
+    <div class="text-center" *ngIf="cursorMode">
+      <nav>
+        <ul class="pager">
+          <li class="previous" [class.disabled]="!previousUrl">
+            <a (click)="onSelectCursor(previousUrl)" aria-label="Previous">
+              <span aria-hidden="true">&laquo;</span> previous
+            </a>
+          </li>
+          <li class="next" [class.disabled]="!nextUrl">
+            <a (click)="onSelectCursor(nextUrl)" aria-label="Next">
+              next <span aria-hidden="true">&raquo;</span>
+            </a>
+          </li>
+        </ul>
+      </nav>
+    </div>
   `,
   styles: ["a { cursor:pointer; }"],
 })
@@ -45,6 +61,10 @@ export class PaginationComponent {
   @Input() currentOffset: number;
   @Input() routeName: string;
   @Input() additionalRouteParams: {[key: string]: string} = {};
+  // `next` and `previous` links of API responses in cursor mode
+  // (`?pagination=cursor`), where total count is unknown
+  @Input() nextUrl: string;
+  @Input() previousUrl: string;
 
   allPages: number;
   nextOffset: number = 0;
@@ -54,6 +74,10 @@ export class PaginationComponent {
 
   constructor(private router: Router) { }
 
+  get cursorMode(): boolean {
+    return Boolean(this.nextUrl || this.previousUrl);
+  }
+
   get lastPageOffset(): number {
     return this.allPages * this.perPage - this.perPage;
   }
@@ -106,4 +130,13 @@ export class PaginationComponent {
     this.additionalRouteParams["offset"] = String(offset);
     this.router.navigate([this.routeName, this.additionalRouteParams]);
   }
+
+  onSelectCursor(url: string) {
+    if (!url) {
+      return;
+    }
+    let match: Array<string> = /[?&]cursor=([^&]*)/.exec(url);
+    this.additionalRouteParams["cursor"] = match ? decodeURIComponent(match[1]) : "";
+    this.router.navigate([this.routeName, this.additionalRouteParams]);
+  }
 }
@@ -45,6 +45,11 @@ export class RecordComponent extends SearchComponent implements AfterViewInit, O
   currentOffset: number = 0;
   perPage: number = 100;
   totalCount: number;
+  // cursor pagination (`;pagination=cursor` route param) skips counting
+  cursorMode: boolean = false;
+  cursor: string = null;
+  nextUrl: string = null;
+  previousUrl: string = null;
   showAllRecords: boolean = false;
   activeUser: string;
   searchValue: string = "";
@@ -74,6 +79,10 @@ export class RecordComponent extends SearchComponent implements AfterViewInit, O
     this.additionalRouteParams["showAll"] = this.routeParams.get("showAll");
     let url_offset: string = this.routeParams.get("offset");
     this.currentOffset = url_offset ? Number(url_offset) : 0;
+    this.cursor = this.routeParams.get("cursor");
+    this.cursorMode = (
+      this.cursor !== null || this.routeParams.get("pagination") === "cursor"
+    );
     let search: string = this.routeParams.get("search");
     this.searchValue = (search !== null) ? search : "";
 
@@ -103,6 +112,7 @@ export class RecordComponent extends SearchComponent implements AfterViewInit, O
 
   searchUpdateUrls() {
     this.additionalRouteParams["search"] = this.searchValue;
+    delete this.additionalRouteParams["cursor"];
     this.router.navigate(["Records", this.additionalRouteParams]);
   }
 
@@ -117,7 +127,15 @@ export class RecordComponent extends SearchComponent implements AfterViewInit, O
     this.showResults = false;
     let params: URLSearchParams = new URLSearchParams();
     params.set("limit", String(this.perPage));
-    params.set("offset",  String(this.currentOffset));
+    if (this.cursorMode) {
+      params.set("pagination", "cursor");
+      this.additionalRouteParams["pagination"] = "cursor";
+      if (this.cursor) {
+        params.set("cursor", this.cursor);
+      }
+    } else {
+      params.set("offset",  String(this.currentOffset));
+    }
 
     if (!this.showAllRecords) {
       params.set("owner", String(this.authService.getUserId()));
@@ -133,6 +151,8 @@ export class RecordComponent extends SearchComponent implements AfterViewInit, O
     ).subscribe((json) => {
       this.totalCount = json.count;
       this.records = json.results;
+      this.nextUrl = this.cursorMode ? json.next : null;
+      this.previousUrl = this.cursorMode ? json.previous : null;
       this.showResults = true;
     }, error => this.errorMessage = <any>error);
   }
@@ -143,6 +163,7 @@ export class RecordComponent extends SearchComponent implements AfterViewInit, O
     } else {
       this.additionalRouteParams["showAll"] = "false";
     }
+    delete this.additionalRouteParams["cursor"];
     this.router.navigate(["Records", this.additionalRouteParams]);
   }
 